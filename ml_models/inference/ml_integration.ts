@@ -9,16 +9,107 @@ export interface MLDetectionResult extends HumanDetectionResult {
   formAnalysis?: {
     formScore: number;
     recommendations: string[];
+    issues?: FormIssue[];
   };
   holisticFeatures?: {
     faceLandmarks?: any[];
     handLandmarks?: any[];
   };
+  analysisProfile?: AnalysisProfile;
+  qualityTier?: QualityTier;
+  reps?: RepTracking | null;
+  timingsMs?: Record<string, number>;
+  // Answered from the server's result cache (a retried or duplicate frame)
+  cached?: boolean;
+}
+
+// Metrics of one finished training epoch (Keras logs)
+export interface TrainingEpoch {
+  epoch: number;
+  loss: number;
+  accuracy: number;
+  val_loss?: number;
+  val_accuracy?: number;
+  [metric: string]: number | undefined;
+}
+
+// A classifier training job as reported by /training_jobs/<job_id>
+export interface TrainingJob {
+  job_id: string;
+  status: 'queued' | 'running' | 'succeeded' | 'failed' | 'cancelled';
+  stage: string | null;
+  epoch: number;
+  epochs: TrainingEpoch[];
+  result: { test_accuracy: number; test_loss: number; epochs_run: number } | null;
+  error: string | null;
+}
+
+// A violated rule from the server's form rule table
+export interface FormIssue {
+  rule: string;
+  message: string;
+  severity: 'info' | 'warning';
+  value: number;
+}
+
+export interface RepTempo {
+  eccentric_s: number;
+  bottom_s: number;
+  concentric_s: number;
+  duration_s: number;
+}
+
+export type RepEvent =
+  | { type: 'phase'; phase: string; timestamp: number }
+  | { type: 'rep'; count: number; tempo: RepTempo; timestamp: number }
+  | { type: 'partial_rep'; count: number; timestamp: number }
+  | { type: 'hold'; duration_s: number; timestamp: number };
+
+// Server-side rep / phase state of the session (pushup, squat, lunge, jumping_jack, plank)
+export interface RepTracking {
+  exercise: string;
+  reps: number;
+  partial_reps: number;
+  phase: 'setup' | 'rest' | 'eccentric' | 'bottom' | 'concentric' | 'hold';
+  phase_duration_s: number;
+  hold_s: number;
+  angle: number | null;
+  angular_velocity: number | null;
+  last_rep: RepTempo | null;
+  events: RepEvent[];
+}
+
+export type AnalysisProfile = 'pose_only' | 'pose+hands' | 'holistic';
+export type FrameSkipping = 'off' | 'adaptive';
+export type ROIMode = 'off' | 'bbox';
+export type QualityTier = 'full' | 'reduced' | 'low' | 'minimal';
+
+export interface MLStreamOptions {
+  exerciseType?: string;
+  analysisProfile?: AnalysisProfile;
+  frameSkipping?: FrameSkipping;
+  roi?: ROIMode;
+  // Cheapest tier the client accepts up front; the server may still step lower under load
+  qualityTier?: QualityTier;
+  sessionId?: string;
+  targetFps?: number;
+  onResult: (result: MLDetectionResult) => void;
+  onClose?: () => void;
+}
+
+export interface MLStream {
+  setExerciseType: (exerciseType: string) => void;
+  close: () => void;
 }
 
 export class MLModelIntegration {
   private apiUrl: string;
   private isServerRunning: boolean = false;
+  private supportsBinaryFrames: boolean = false;
+  private streamEndpoint: string | null = null;
+  private canvas: HTMLCanvasElement | null = null;
+  // Identifies this client so the server keeps a dedicated pose tracker for it
+  readonly sessionId: string = `${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 10)}`;
 
   constructor(apiUrl: string = 'http://localhost:5000') {
     this.apiUrl = apiUrl;
@@ -32,6 +123,9 @@ export class MLModelIntegration {
       const response = await fetch(`${this.apiUrl}/health`);
       const data = await response.json();
       this.isServerRunning = data.status === 'healthy';
+      // Older servers only understand base64 JSON uploads
+      this.supportsBinaryFrames = Array.isArray(data.frame_formats) && data.frame_formats.includes('image/jpeg');
+      this.streamEndpoint = data.stream_endpoint || null;
       return this.isServerRunning;
     } catch (error) {
       console.warn('ML server not available:', error);
@@ -41,21 +135,47 @@ export class MLModelIntegration {
   }
 
   /**
-   * Convert video frame to base64 for API transmission
+   * Draw the current video frame onto a reusable canvas
    */
-  private async frameToBase64(videoElement: HTMLVideoElement): Promise<string> {
-    const canvas = document.createElement('canvas');
+  private drawFrame(videoElement: HTMLVideoElement): HTMLCanvasElement {
+    if (!this.canvas) {
+      this.canvas = document.createElement('canvas');
+    }
+    const canvas = this.canvas;
     const ctx = canvas.getContext('2d');
     
     if (!ctx) {
       throw new Error('Could not get canvas context');
     }
 
-    canvas.width = videoElement.videoWidth;
-    canvas.height = videoElement.videoHeight;
+    if (canvas.width !== videoElement.videoWidth || canvas.height !== videoElement.videoHeight) {
+      canvas.width = videoElement.videoWidth;
+      canvas.height = videoElement.videoHeight;
+    }
     ctx.drawImage(videoElement, 0, 0, canvas.width, canvas.height);
     
-    return canvas.toDataURL('image/jpeg', 0.8).split(',')[1];
+    return canvas;
+  }
+
+  /**
+   * Convert video frame to base64 for API transmission
+   */
+  private async frameToBase64(videoElement: HTMLVideoElement): Promise<string> {
+    return this.drawFrame(videoElement).toDataURL('image/jpeg', 0.8).split(',')[1];
+  }
+
+  /**
+   * Encode video frame as a binary JPEG blob for API transmission
+   */
+  private frameToBlob(videoElement: HTMLVideoElement): Promise<Blob> {
+    const canvas = this.drawFrame(videoElement);
+    return new Promise((resolve, reject) => {
+      canvas.toBlob(
+        (blob) => blob ? resolve(blob) : reject(new Error('Could not encode frame')),
+        'image/jpeg',
+        0.8
+      );
+    });
   }
 
   /**
@@ -63,7 +183,8 @@ export class MLModelIntegration {
    */
   async processFrame(
     videoElement: HTMLVideoElement,
-    exerciseType: string = 'general'
+    exerciseType: string = 'general',
+    analysisProfile?: AnalysisProfile
   ): Promise<MLDetectionResult> {
     try {
       // Check if server is running
@@ -74,20 +195,41 @@ export class MLModelIntegration {
         }
       }
 
-      // Convert frame to base64
-      const imageBase64 = await this.frameToBase64(videoElement);
+      let response: Response;
+      if (this.supportsBinaryFrames) {
+        // Send the JPEG bytes as the request body; options go in the query string
+        const frameBlob = await this.frameToBlob(videoElement);
+        const params = new URLSearchParams({ exercise_type: exerciseType, keypoints_format: 'flat' });
+        if (analysisProfile) {
+          params.set('analysis_profile', analysisProfile);
+        }
+        response = await fetch(`${this.apiUrl}/process_video_frame?${params.toString()}`, {
+          method: 'POST',
+          headers: {
+            'Content-Type': 'image/jpeg',
+            'X-Session-Id': this.sessionId,
+          },
+          body: frameBlob
+        });
+      } else {
+        // Convert frame to base64
+        const imageBase64 = await this.frameToBase64(videoElement);
 
-      // Send request to Python API
-      const response = await fetch(`${this.apiUrl}/process_video_frame`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({
-          image: imageBase64,
-          exercise_type: exerciseType
-        })
-      });
+        // Send request to Python API
+        response = await fetch(`${this.apiUrl}/process_video_frame`, {
+          method: 'POST',
+          headers: {
+            'Content-Type': 'application/json',
+            'X-Session-Id': this.sessionId,
+          },
+          body: JSON.stringify({
+            image: imageBase64,
+            exercise_type: exerciseType,
+            keypoints_format: 'flat',
+            ...(analysisProfile ? { analysis_profile: analysisProfile } : {})
+          })
+        });
+      }
 
       if (!response.ok) {
         throw new Error(`API request failed: ${response.statusText}`);
@@ -114,6 +256,129 @@ export class MLModelIntegration {
     }
   }
 
+  /**
+   * Whether the server offers a WebSocket streaming session
+   */
+  canStream(): boolean {
+    return this.isServerRunning && this.streamEndpoint !== null;
+  }
+
+  /**
+   * Open a persistent streaming session and push frames over it.
+   * A new frame is only sent once the socket has flushed the previous one,
+   * and the server drops stale frames, so latency stays bounded.
+   */
+  openStream(videoElement: HTMLVideoElement, options: MLStreamOptions): MLStream {
+    if (!this.streamEndpoint) {
+      throw new Error('ML server does not support streaming');
+    }
+
+    const params = new URLSearchParams({
+      exercise_type: options.exerciseType || 'general',
+      keypoints_format: 'flat'
+    });
+    if (options.analysisProfile) {
+      params.set('analysis_profile', options.analysisProfile);
+    }
+    if (options.frameSkipping) {
+      params.set('frame_skipping', options.frameSkipping);
+    }
+    if (options.roi) {
+      params.set('roi', options.roi);
+    }
+    if (options.qualityTier) {
+      params.set('quality_tier', options.qualityTier);
+    }
+    params.set('session_id', options.sessionId || this.sessionId);
+    const wsUrl = `${this.apiUrl.replace(/^http/, 'ws')}${this.streamEndpoint}?${params.toString()}`;
+    const socket = new WebSocket(wsUrl);
+    socket.binaryType = 'arraybuffer';
+
+    const frameInterval = 1000 / (options.targetFps || 30);
+    let lastSent = 0;
+    let encoding = false;
+    let animationFrame: number | null = null;
+    let closed = false;
+
+    const pump = async () => {
+      if (closed) return;
+      animationFrame = requestAnimationFrame(pump);
+
+      const now = performance.now();
+      if (
+        encoding ||
+        socket.readyState !== WebSocket.OPEN ||
+        socket.bufferedAmount > 0 ||
+        now - lastSent < frameInterval ||
+        !videoElement.videoWidth
+      ) {
+        return;
+      }
+
+      encoding = true;
+      lastSent = now;
+      try {
+        const frameBlob = await this.frameToBlob(videoElement);
+        if (socket.readyState === WebSocket.OPEN) {
+          socket.send(frameBlob);
+        }
+      } catch (error) {
+        console.error('Error streaming frame:', error);
+      } finally {
+        encoding = false;
+      }
+    };
+
+    socket.onopen = () => pump();
+    socket.onmessage = (event) => {
+      const message = JSON.parse(event.data);
+      if (message.type === 'result') {
+        options.onResult(this.convertApiResponse(message));
+      } else if (message.type === 'error') {
+        console.warn('ML stream error:', message.error);
+      }
+    };
+    socket.onclose = () => {
+      closed = true;
+      if (animationFrame !== null) cancelAnimationFrame(animationFrame);
+      options.onClose?.();
+    };
+
+    return {
+      setExerciseType: (exerciseType: string) => {
+        if (socket.readyState === WebSocket.OPEN) {
+          socket.send(JSON.stringify({ type: 'config', exercise_type: exerciseType }));
+        }
+      },
+      close: () => {
+        closed = true;
+        if (animationFrame !== null) cancelAnimationFrame(animationFrame);
+        socket.close();
+      }
+    };
+  }
+
+  /**
+   * Rebuild keypoint objects from the compact flat [x, y, z, visibility, ...] format
+   */
+  private unpackKeypoints(poseDetection: any): any[] {
+    const keypoints = poseDetection.keypoints || [];
+    if (poseDetection.keypoints_format !== 'flat') {
+      return keypoints;
+    }
+
+    const unpacked = [];
+    for (let i = 0; i + 3 < keypoints.length; i += 4) {
+      unpacked.push({
+        x: keypoints[i],
+        y: keypoints[i + 1],
+        z: keypoints[i + 2],
+        visibility: keypoints[i + 3]
+      });
+    }
+    return unpacked;
+  }
+
   /**
    * Convert Python API response to our TypeScript interface
    */
@@ -124,7 +389,7 @@ export class MLModelIntegration {
 
     return {
       isHumanDetected: poseDetection.is_human_detected || false,
-      poseKeypoints: poseDetection.keypoints || [],
+      poseKeypoints: this.unpackKeypoints(poseDetection),
       boundingBox: poseDetection.bounding_box ? {
         x: poseDetection.bounding_box.x,
         y: poseDetection.bounding_box.y,
@@ -139,7 +404,8 @@ export class MLModelIntegration {
       } : undefined,
       formAnalysis: exerciseClassification ? {
         formScore: exerciseClassification.form_score || 0,
-        recommendations: exerciseClassification.recommendations || []
+        recommendations: exerciseClassification.recommendations || [],
+        issues: exerciseClassification.form_issues
       } : undefined,
       holisticFeatures: {
         faceLandmarks: holisticDetection.face_landmarks,
@@ -147,18 +413,125 @@ export class MLModelIntegration {
           ...(holisticDetection.left_hand_landmarks || []),
           ...(holisticDetection.right_hand_landmarks || [])
         ]
-      }
+      },
+      analysisProfile: apiResult.analysis_profile,
+      qualityTier: apiResult.quality_tier,
+      reps: apiResult.reps,
+      timingsMs: apiResult.timings_ms,
+      cached: apiResult.cached === true
     };
   }
 
+  /**
+   * Analyze a batch of recorded frames (e.g. sampled from a clip) in one request.
+   * The server runs them through one detector and one classifier pass.
+   */
+  async processFrames(
+    frames: Blob[],
+    exerciseType: string = 'general',
+    analysisProfile?: AnalysisProfile
+  ): Promise<MLDetectionResult[]> {
+    const form = new FormData();
+    frames.forEach((frame, index) => form.append('images', frame, `frame-${index}.jpg`));
+    form.append('exercise_type', exerciseType);
+    form.append('keypoints_format', 'flat');
+    if (analysisProfile) {
+      form.append('analysis_profile', analysisProfile);
+    }
+
+    const response = await fetch(`${this.apiUrl}/process_video_frame`, {
+      method: 'POST',
+      headers: { 'X-Session-Id': this.sessionId },
+      body: form
+    });
+    if (!response.ok) {
+      throw new Error(`Batch request failed: ${response.statusText}`);
+    }
+
+    const result = await response.json();
+    return (result.results || []).map((frameResult: any) => this.convertApiResponse(frameResult));
+  }
+
+  /**
+   * Upload a recorded clip (mp4/webm) for server-side analysis.
+   * Resolves to the server's aggregate report (and landmark track unless disabled).
+   */
+  async analyzeVideoFile(
+    video: Blob,
+    options: {
+      exerciseType?: string;
+      analysisProfile?: AnalysisProfile;
+      sampleFps?: number;
+      frameSkipping?: FrameSkipping;
+      roi?: ROIMode;
+      includeTrack?: boolean;
+    } = {}
+  ): Promise<any> {
+    const form = new FormData();
+    form.append('video', video, 'clip');
+    form.append('exercise_type', options.exerciseType || 'general');
+    form.append('include_track', String(options.includeTrack ?? true));
+    if (options.analysisProfile) {
+      form.append('analysis_profile', options.analysisProfile);
+    }
+    if (options.sampleFps) {
+      form.append('sample_fps', String(options.sampleFps));
+    }
+    if (options.frameSkipping) {
+      form.append('frame_skipping', options.frameSkipping);
+    }
+    if (options.roi) {
+      form.append('roi', options.roi);
+    }
+
+    const response = await fetch(`${this.apiUrl}/analyze_video`, {
+      method: 'POST',
+      body: form
+    });
+    if (!response.ok) {
+      throw new Error(`Video analysis failed: ${response.statusText}`);
+    }
+    return response.json();
+  }
+
+  /**
+   * Classify a sequence of poses ((F, 33, 3) landmarks) in one forward pass
+   */
+  async classifyExerciseBatch(landmarks: number[][][]): Promise<Array<{
+    exercise: string;
+    confidence: number;
+    allPredictions: Record<string, number>;
+  }>> {
+    const response = await fetch(`${this.apiUrl}/classify_exercise`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ landmarks })
+    });
+    if (!response.ok) {
+      throw new Error(`Classification failed: ${response.statusText}`);
+    }
+
+    const result = await response.json();
+    return (result.predictions || []).map((prediction: any) => ({
+      exercise: prediction.exercise,
+      confidence: prediction.confidence,
+      allPredictions: prediction.all_predictions || {}
+    }));
+  }
+
   /**
    * Train the exercise classifier
+   *
+   * Training runs as a background job on the server; this starts it and polls
+   * until it finishes, reporting each finished epoch through `onEpoch`.
    */
   async trainClassifier(options: {
     numSamples?: number;
     epochs?: number;
     batchSize?: number;
-  } = {}): Promise<{ success: boolean; message: string; accuracy?: number }> {
+    pollIntervalMs?: number;
+    onEpoch?: (epoch: TrainingEpoch) => void;
+  } = {}): Promise<{ success: boolean; message: string; accuracy?: number; jobId?: string }> {
     try {
       const response = await fetch(`${this.apiUrl}/train_classifier`, {
         method: 'POST',
@@ -173,14 +546,31 @@ export class MLModelIntegration {
       });
 
       if (!response.ok) {
-        throw new Error(`Training failed: ${response.statusText}`);
+        const body = await response.json().catch(() => ({}));
+        throw new Error(body.error || response.statusText);
       }
 
-      const result = await response.json();
+      let job: TrainingJob = await response.json();
+      let reportedEpochs = 0;
+      while (job.status === 'queued' || job.status === 'running') {
+        await new Promise(resolve => setTimeout(resolve, options.pollIntervalMs || 1000));
+        const poll = await fetch(`${this.apiUrl}/training_jobs/${job.job_id}`);
+        if (!poll.ok) {
+          throw new Error(`Polling training job failed: ${poll.statusText}`);
+        }
+        job = await poll.json();
+        job.epochs.slice(reportedEpochs).forEach(epoch => options.onEpoch?.(epoch));
+        reportedEpochs = job.epochs.length;
+      }
+
+      if (job.status !== 'succeeded' || !job.result) {
+        throw new Error(job.error || `job ${job.status}`);
+      }
       return {
         success: true,
-        message: result.message,
-        accuracy: result.test_accuracy
+        message: 'Training completed successfully',
+        accuracy: job.result.test_accuracy,
+        jobId: job.job_id
       };
 
     } catch (error) {
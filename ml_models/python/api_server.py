@@ -1,71 +1,286 @@
-from flask import Flask, request, jsonify
+import time
+
+# Start of the server import: the first stage of the startup report
+_import_started = time.perf_counter()
+
+from flask import Flask, request, jsonify, Response
 from flask_cors import CORS
-import cv2
 import numpy as np
-import base64
 import json
 import os
-from human_detection_model import HumanDetectionModel
+import tempfile
+import uuid
+from flask_sock import Sock
+from human_detection_model import HumanDetectionModel, ANALYSIS_PROFILES, DEFAULT_ANALYSIS_PROFILE
+from frame_decoding import FrameDecoder, ENCODED_IMAGE_TYPES, RAW_FRAME_FORMATS, ENCODED_PAYLOAD
+from frame_analysis import analyze_frame, analyze_frames
 from train_exercise_classifier import ExerciseClassifierTrainer
+from classifier_inference import DEFAULT_INFERENCE_BACKEND
+from classification_batcher import ClassificationBatcher
+from streaming import StreamSession
+from detector_pool import DetectorPool, PoolExhaustedError
+from inference_workers import WorkerUnavailableError
+from video_analysis import VideoAnalyzer, VIDEO_TYPES
+from frame_scheduler import resolve_frame_skipping
+from roi_tracking import resolve_roi_mode
+from quality_controller import QualityController, DEFAULT_TARGET_P95_MS
+from result_cache import ResultCache, DEFAULT_CACHE_TTL_S
+from training_jobs import TrainingJobManager, TrainingBusyError, FINISHED_STATES
+from result_encoding import encode_result, negotiate_mimetype, resolve_mimetype, available_mimetypes, JSON_MIMETYPE
+from startup import StartupReport, resolve_startup_mode
 
 app = Flask(__name__)
 CORS(app)
+sock = Sock(app)
 
 # Initialize models
-detector = HumanDetectionModel()
-classifier_trainer = ExerciseClassifierTrainer()
+default_analysis_profile = os.environ.get('ML_ANALYSIS_PROFILE', DEFAULT_ANALYSIS_PROFILE)
+
+# One detector per client session so MediaPipe tracking state is never shared
+detector_pool = DetectorPool(
+    lambda: HumanDetectionModel(analysis_profile=default_analysis_profile),
+    max_instances=int(os.environ.get('ML_MAX_DETECTORS', 8)),
+    idle_timeout=float(os.environ.get('ML_DETECTOR_IDLE_SECONDS', 300))
+)
+classifier_trainer = ExerciseClassifierTrainer(
+    inference_backend=os.environ.get('ML_CLASSIFIER_BACKEND', DEFAULT_INFERENCE_BACKEND)
+)
+frame_decoder = FrameDecoder()
+
+# Concurrent classifications share batched forward passes
+classification_batcher = ClassificationBatcher(
+    classifier_trainer,
+    max_batch_size=int(os.environ.get('ML_CLASSIFY_BATCH_SIZE', 32)),
+    max_wait_ms=float(os.environ.get('ML_CLASSIFY_BATCH_WINDOW_MS', 2))
+)
+
+# Set by serve.py when frames are analyzed in separate worker processes
+inference_workers = None
+
+# Live analysis steps down to cheaper quality tiers when latency or queueing builds up
+quality_controller = QualityController(
+    target_p95_ms=float(os.environ.get('ML_TARGET_P95_MS', DEFAULT_TARGET_P95_MS)),
+    max_queue=int(os.environ.get('ML_QUALITY_MAX_QUEUE', os.environ.get('ML_MAX_DETECTORS', 8))),
+    enabled=os.environ.get('ML_QUALITY_AUTOSCALE', '1') != '0'
+)
+
+# Opt-in: retried and resubmitted frames are answered from recent results
+# (ML_RESULT_CACHE_MB sets the memory budget; unset or 0 disables the cache)
+result_cache = ResultCache(
+    max_bytes=int(float(os.environ.get('ML_RESULT_CACHE_MB', 0)) * 1024 * 1024),
+    ttl_s=float(os.environ.get('ML_RESULT_CACHE_TTL_S', DEFAULT_CACHE_TTL_S))
+)
+
+# Upper bound on the frames in one /process_video_frame batch
+max_batch_frames = int(os.environ.get('ML_MAX_BATCH_FRAMES', 32))
 
-# Load trained classifier if available
-try:
-    classifier_trainer.load_model_and_preprocessors()
-    print("Exercise classifier loaded successfully")
-except:
-    print("No trained classifier found. Train one first.")
+# Upper bound on an uploaded /analyze_video clip
+max_video_bytes = int(os.environ.get('ML_MAX_VIDEO_BYTES', 500 * 1024 * 1024))
+
+# The classifier and the default MediaPipe graph are loaded by warm_up, in a
+# background thread unless ML_STARTUP_MODE=eager. /live answers as soon as the
+# process serves requests, /health (readiness) once warm-up has finished.
+startup = StartupReport(resolve_startup_mode(os.environ.get('ML_STARTUP_MODE')), started=_import_started)
+
+# serve.py sets ML_WARM_DETECTOR=0: its workers analyze the frames, not the front process
+warm_detector = os.environ.get('ML_WARM_DETECTOR', '1') != '0'
+
+def swap_classifier(trainer):
+    """Route live inference to a loaded trainer"""
+    global classifier_trainer
+    classification_batcher.swap_classifier(trainer)
+    classifier_trainer = trainer
+    # Cached results carry the previous model's classifications
+    result_cache.clear()
+
+def load_classifier(model_dir):
+    """
+    Load a newly trained classifier from `model_dir` into a fresh trainer
+    
+    Requests keep using the previous model meanwhile, and a model that fails
+    to load is never promoted.
+    """
+    trainer = ExerciseClassifierTrainer(model_dir=classifier_trainer.model_dir,
+                                        inference_backend=classifier_trainer.inference_backend)
+    trainer.load_model_and_preprocessors(model_dir=model_dir)
+    return trainer
+
+def install_classifier(trainer):
+    """
+    Swap a loaded classifier in for live inference, once it is the serving model on disk
+    """
+    swap_classifier(trainer)
+    if inference_workers is not None:
+        inference_workers.reload_classifier()
+
+def warm_up(report):
+    """
+    Load the trained classifier and build the default detector's graph
+    
+    Each step is a stage of the startup report. Until the classifier is
+    swapped in, classifications answer 'unknown' as without a trained model.
+    """
+    with report.stage('import_tensorflow'):
+        import tensorflow
+    with report.stage('import_sklearn'):
+        import sklearn.preprocessing
+    with report.stage('load_classifier'):
+        trainer = ExerciseClassifierTrainer(model_dir=classifier_trainer.model_dir,
+                                            inference_backend=classifier_trainer.inference_backend)
+        try:
+            trainer.load_model_and_preprocessors()
+            swap_classifier(trainer)
+            print("Exercise classifier loaded successfully")
+        except Exception:
+            print("No trained classifier found. Train one first.")
+    
+    if warm_detector:
+        with report.stage('import_mediapipe'):
+            import mediapipe
+        with report.stage('build_detector'):
+            with detector_pool.acquire(None) as detector:
+                detector.warm_up()
+
+# Training runs in a separate process; the model is swapped in only once it saved successfully
+training_jobs = TrainingJobManager(classifier_trainer.model_dir, load_classifier, install_classifier)
+
+startup.record('import_server', time.perf_counter() - _import_started)
+startup.run(warm_up)
+
+def result_response(result):
+    """
+    Encode a detection result in one pass, as JSON or a negotiated binary format
+    
+    The format comes from the `format` query option (json, msgpack, cbor) or
+    the Accept header.
+    """
+    mimetype = negotiate_mimetype(request.accept_mimetypes, request.args.get('format'))
+    return Response(encode_result(result, mimetype), mimetype=mimetype)
+
+def request_session_id(options):
+    """Client session id from the X-Session-Id header or the request options"""
+    return request.headers.get('X-Session-Id') or options.get('session_id')
+
+def use_inference_workers(pool):
+    """Route frame analysis to a started InferenceWorkerPool"""
+    global inference_workers
+    inference_workers = pool
+
+def analyze_request_frame(classify=True):
+    """
+    Decode and analyze the frame carried by the current request
+    
+    Runs in-process with the session's pooled detector (behind the result
+    cache), or in an inference worker process when the server was started in
+    production mode.
+    """
+    data = frame_decoder.request_options(request)
+    data['quality_tier'] = quality_controller.tier_for(data.get('quality_tier'))
+    session_id = request_session_id(data)
+    
+    if inference_workers is not None:
+        payload, descriptor = frame_decoder.read_request(request)
+        return inference_workers.analyze(payload, descriptor, data, session_id, classify)
+    
+    frame = frame_decoder.decode_request(request)
+    with detector_pool.acquire(session_id) as session_detector:
+        return analyze_frame(session_detector, classification_batcher, frame, data, classify, result_cache, session_id)
+
+def analyze_request_frames(classify=True):
+    """
+    Decode and analyze a batch of frames ("images") from the current request
+    
+    All frames go through one detector (so pose tracking carries across them)
+    and share one classifier forward pass.
+    """
+    data = frame_decoder.request_options(request)
+    data['quality_tier'] = quality_controller.tier_for(data.get('quality_tier'))
+    session_id = request_session_id(data)
+    
+    frames = frame_decoder.read_request_batch(request)
+    if len(frames) > max_batch_frames:
+        raise ValueError(f'At most {max_batch_frames} frames per batch')
+    payloads = [payload for payload, _ in frames]
+    descriptors = [descriptor for _, descriptor in frames]
+    
+    if inference_workers is not None:
+        return inference_workers.analyze_batch(payloads, descriptors, data, session_id, classify)
+    
+    decoded = (frame_decoder.decode_payload(payload, descriptor) for payload, descriptor in frames)
+    with detector_pool.acquire(session_id) as session_detector:
+        return analyze_frames(session_detector, classification_batcher, decoded, data, classify, result_cache, session_id)
+
+def analyze_request(classify=True):
+    """
+    Analyze the single frame or frame batch carried by the current request
+    
+    Both run at the quality controller's current tier unless the client asked
+    for a cheaper one. Only single frames count towards the controller's load
+    and latency: a batch of offline frames takes far longer than the live
+    latency target without the server being saturated.
+    """
+    if frame_decoder.is_batch_request(request):
+        start = time.perf_counter()
+        results = analyze_request_frames(classify)
+        return {
+            'frames': len(results),
+            'results': results,
+            'timings_ms': {'total': round((time.perf_counter() - start) * 1000.0, 3)}
+        }
+    with quality_controller.track():
+        return analyze_request_frame(classify)
+
+@app.route('/live', methods=['GET'])
+def liveness_check():
+    """Liveness: the process is up and serving requests (models may still be loading)"""
+    return jsonify({'status': 'alive'})
 
 @app.route('/health', methods=['GET'])
 def health_check():
-    """Health check endpoint"""
+    """
+    Readiness: 200 once warm-up has finished (and every inference worker is ready), 503 while starting
+    """
+    ready = startup.ready and (inference_workers is None or inference_workers.wait_until_ready(0))
     return jsonify({
-        'status': 'healthy',
-        'message': 'ML API server is running'
-    })
+        'status': 'healthy' if ready else 'starting',
+        'ready': ready,
+        'message': 'ML API server is running' if ready else 'ML API server is loading models',
+        'frame_formats': ['application/json', 'multipart/form-data', 'application/octet-stream'] + list(ENCODED_IMAGE_TYPES),
+        'raw_frame_formats': list(RAW_FRAME_FORMATS),
+        'stream_endpoint': '/stream',
+        'result_formats': available_mimetypes(),
+        'max_batch_frames': max_batch_frames,
+        'quality_tier': quality_controller.tier
+    }), 200 if ready else 503
+
+@app.route('/startup_report', methods=['GET'])
+def startup_report():
+    """
+    Startup mode, readiness and the cost of each import / model-load stage
+    """
+    return jsonify(startup.as_dict())
 
 @app.route('/detect_human', methods=['POST'])
 def detect_human():
     """
     Detect human in image and return pose information
+    
+    The frame can be sent as base64 JSON ({"image": ...}), as a multipart
+    "image" file, as a raw image/jpeg|webp|png body, or as a raw RGBA/YUV
+    buffer (application/octet-stream with X-Frame-Format, X-Frame-Width and
+    X-Frame-Height headers). Options go in the JSON body, form fields or
+    query string respectively.
     """
     try:
-        data = request.get_json()
+        try:
+            result = analyze_request(classify=False)
+            response = result_response(result)
+        except (PoolExhaustedError, WorkerUnavailableError) as e:
+            return jsonify({'error': str(e)}), 503
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        if 'image' not in data:
-            return jsonify({'error': 'No image provided'}), 400
-        
-        # Decode base64 image
-        image_data = base64.b64decode(data['image'])
-        nparr = np.frombuffer(image_data, np.uint8)
-        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        
-        if frame is None:
-            return jsonify({'error': 'Invalid image format'}), 400
-        
-        # Process frame
-        result = detector.process_video_frame(frame, data.get('exercise_type', 'general'))
-        
-        # Convert numpy arrays to lists for JSON serialization
-        def convert_numpy(obj):
-            if isinstance(obj, np.ndarray):
-                return obj.tolist()
-            elif isinstance(obj, np.integer):
-                return int(obj)
-            elif isinstance(obj, np.floating):
-                return float(obj)
-            return obj
-        
-        # Clean up the result for JSON serialization
-        clean_result = json.loads(json.dumps(result, default=convert_numpy))
-        
-        return jsonify(clean_result)
+        return response
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -74,6 +289,10 @@ def detect_human():
 def classify_exercise():
     """
     Classify exercise from pose landmarks
+    
+    A single pose is (33, 3) landmarks (or a flat vector). A clip is an
+    (F, 33, 3) tensor (or (F, 99) rows) and is classified in one forward pass,
+    returning {"frames": F, "predictions": [...]}.
     """
     try:
         data = request.get_json()
@@ -81,10 +300,21 @@ def classify_exercise():
         if 'landmarks' not in data:
             return jsonify({'error': 'No landmarks provided'}), 400
         
-        landmarks = np.array(data['landmarks'])
+        try:
+            landmarks = np.asarray(data['landmarks'], dtype=np.float32)
+        except ValueError:
+            return jsonify({'error': 'landmarks must be a numeric array'}), 400
         
         # Classify exercise
-        prediction = classifier_trainer.predict_exercise(landmarks)
+        try:
+            if landmarks.ndim == 3 or (landmarks.ndim == 2 and landmarks.shape[1] != 3):
+                frames = landmarks.reshape(len(landmarks), -1)
+                predictions = classification_batcher.predict_exercise_batch(frames) if len(frames) else []
+                return jsonify({'frames': len(frames), 'predictions': predictions})
+            
+            prediction = classification_batcher.predict_exercise(landmarks)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         return jsonify(prediction)
         
@@ -106,7 +336,8 @@ def analyze_form():
         exercise_type = data['exercise_type']
         
         # Analyze form
-        form_analysis = detector.classify_exercise(landmarks, exercise_type)
+        with detector_pool.acquire(request_session_id(data)) as session_detector:
+            form_analysis = session_detector.classify_exercise(landmarks, exercise_type)
         
         return jsonify(form_analysis)
         
@@ -116,40 +347,86 @@ def analyze_form():
 @app.route('/train_classifier', methods=['POST'])
 def train_classifier():
     """
-    Train the exercise classifier
+    Start training the exercise classifier in a background job
+    
+    Returns 202 with the job's state (`job_id`, `status`, ...); poll
+    GET /training_jobs/<job_id> or stream GET /training_jobs/<job_id>/events.
+    With "wait": true the request blocks until the job finishes and returns
+    the test metrics like before.
     """
     try:
-        data = request.get_json()
-        
-        # Get training parameters
-        num_samples = data.get('num_samples', 1000)
-        epochs = data.get('epochs', 50)
-        batch_size = data.get('batch_size', 32)
-        
-        # Generate synthetic data
-        X, y = classifier_trainer.generate_synthetic_data(num_samples)
+        data = request.get_json(silent=True) or {}
         
-        # Preprocess data
-        X_train, X_test, y_train, y_test = classifier_trainer.preprocess_data(X, y)
+        try:
+            job = training_jobs.submit(data)
+        except TrainingBusyError as e:
+            return jsonify({'error': str(e)}), 409
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        # Train model
-        results = classifier_trainer.train_model(
-            X_train, y_train, X_test, y_test, 
-            epochs=epochs, batch_size=batch_size
-        )
+        if not data.get('wait'):
+            return jsonify(dict(job, status_url=f"/training_jobs/{job['job_id']}")), 202
         
-        # Save model
-        classifier_trainer.save_model_and_preprocessors()
+        version = -1
+        while job['status'] not in FINISHED_STATES:
+            version, job = training_jobs.wait_for_change(job['job_id'], version, timeout=60.0)
+        if job['status'] != 'succeeded':
+            return jsonify({'error': job['error'] or f"Training job {job['status']}", 'job_id': job['job_id']}), 500
         
         return jsonify({
             'message': 'Training completed successfully',
-            'test_accuracy': results['test_accuracy'],
-            'test_loss': results['test_loss']
+            'job_id': job['job_id'],
+            'test_accuracy': job['result']['test_accuracy'],
+            'test_loss': job['result']['test_loss']
         })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/training_jobs', methods=['GET'])
+def list_training_jobs():
+    """Recent training jobs, oldest first"""
+    return jsonify({'jobs': training_jobs.list()})
+
+@app.route('/training_jobs/<job_id>', methods=['GET', 'DELETE'])
+def training_job(job_id):
+    """
+    State of a training job, including per-epoch metrics (DELETE cancels it)
+    """
+    job = training_jobs.cancel(job_id) if request.method == 'DELETE' else training_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': f'Unknown training job {job_id}'}), 404
+    return jsonify(job)
+
+@app.route('/training_jobs/<job_id>/events', methods=['GET'])
+def training_job_events(job_id):
+    """
+    Server-sent events for a training job
+    
+    Each finished epoch is sent as an `epoch` event with its metrics, and
+    every state change as a `state` event (the job state without the epoch
+    list). The stream ends after the job finishes.
+    """
+    if training_jobs.get(job_id) is None:
+        return jsonify({'error': f'Unknown training job {job_id}'}), 404
+    
+    def events():
+        version, sent_epochs = -1, 0
+        while True:
+            changed_version, job = training_jobs.wait_for_change(job_id, version, timeout=15.0)
+            if changed_version == version and job['status'] not in FINISHED_STATES:
+                yield ': keep-alive\n\n'
+                continue
+            version = changed_version
+            for epoch in job.pop('epochs')[sent_epochs:]:
+                sent_epochs += 1
+                yield f'event: epoch\ndata: {json.dumps(epoch)}\n\n'
+            yield f'event: state\ndata: {json.dumps(job)}\n\n'
+            if job['status'] in FINISHED_STATES:
+                return
+    
+    return Response(events(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
 @app.route('/get_model_info', methods=['GET'])
 def get_model_info():
     """
@@ -160,13 +437,23 @@ def get_model_info():
             'human_detection': {
                 'loaded': True,
                 'type': 'MediaPipe + TensorFlow',
-                'features': ['pose_detection', 'holistic_detection', 'form_analysis']
+                'features': ['pose_detection', 'holistic_detection', 'form_analysis'],
+                'analysis_profile': default_analysis_profile,
+                'available_profiles': list(ANALYSIS_PROFILES),
+                'detector_pool': detector_pool.stats(),
+                'quality': quality_controller.stats(),
+                'result_cache': result_cache.stats(),
+                'inference_workers': inference_workers.stats() if inference_workers is not None else None
             },
             'exercise_classifier': {
                 'loaded': classifier_trainer.model is not None,
                 'type': 'Custom TensorFlow Neural Network',
-                'classes': classifier_trainer.label_encoder.classes_.tolist() if hasattr(classifier_trainer.label_encoder, 'classes_') else []
-            }
+                'inference_backend': classifier_trainer.inference.backend if classifier_trainer.inference else classifier_trainer.inference_backend,
+                'classes': classifier_trainer.label_encoder.classes_.tolist() if hasattr(classifier_trainer.label_encoder, 'classes_') else [],
+                'batching': classification_batcher.stats(),
+                'training_job': next((job['job_id'] for job in training_jobs.list() if job['status'] == 'running'), None)
+            },
+            'startup': startup.as_dict()
         }
         
         return jsonify(info)
@@ -174,63 +461,192 @@ def get_model_info():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/cache_stats', methods=['GET'])
+def cache_stats():
+    """
+    Hit / miss counters and memory use of the frame result cache
+    """
+    return jsonify(result_cache.stats())
+
 @app.route('/process_video_frame', methods=['POST'])
 def process_video_frame():
     """
     Complete processing of a video frame including detection and classification
+    
+    Accepts the same frame encodings as /detect_human. A batch of frames
+    (a JSON "images" list or repeated multipart "images" files) is analyzed
+    with one detector and one classifier pass and returns
+    {"frames": F, "results": [...], "timings_ms": {...}}.
     """
     try:
-        data = request.get_json()
-        
-        if 'image' not in data:
-            return jsonify({'error': 'No image provided'}), 400
+        try:
+            result = analyze_request()
+            response = result_response(result)
+        except (PoolExhaustedError, WorkerUnavailableError) as e:
+            return jsonify({'error': str(e)}), 503
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        # Decode base64 image
-        image_data = base64.b64decode(data['image'])
-        nparr = np.frombuffer(image_data, np.uint8)
-        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        return response
         
-        if frame is None:
-            return jsonify({'error': 'Invalid image format'}), 400
-        
-        exercise_type = data.get('exercise_type', 'general')
-        
-        # Process frame
-        result = detector.process_video_frame(frame, exercise_type)
-        
-        # Add exercise classification if landmarks are available
-        if result['pose_detection']['landmarks']:
-            landmarks = np.array(result['pose_detection']['landmarks'])
-            classification = classifier_trainer.predict_exercise(landmarks)
-            result['exercise_classification'] = classification
-        
-        # Convert numpy arrays to lists for JSON serialization
-        def convert_numpy(obj):
-            if isinstance(obj, np.ndarray):
-                return obj.tolist()
-            elif isinstance(obj, np.integer):
-                return int(obj)
-            elif isinstance(obj, np.floating):
-                return float(obj)
-            return obj
-        
-        # Clean up the result for JSON serialization
-        clean_result = json.loads(json.dumps(result, default=convert_numpy))
-        
-        return jsonify(clean_result)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def save_uploaded_video(target):
+    """
+    Stream the uploaded clip (multipart "video" file or raw video/* body) into a file
+    """
+    if request.mimetype == 'multipart/form-data':
+        upload = request.files.get('video')
+        if upload is None:
+            raise ValueError('No video provided')
+        source = upload.stream
+    elif request.mimetype in VIDEO_TYPES:
+        source = request.stream
+    else:
+        raise ValueError(f'Unsupported content type: {request.mimetype or "none"}')
+    
+    if request.content_length is not None and request.content_length > max_video_bytes:
+        raise ValueError(f'Video exceeds {max_video_bytes} bytes')
+    
+    written = 0
+    while True:
+        chunk = source.read(1024 * 1024)
+        if not chunk:
+            break
+        written += len(chunk)
+        if written > max_video_bytes:
+            raise ValueError(f'Video exceeds {max_video_bytes} bytes')
+        target.write(chunk)
+    if not written:
+        raise ValueError('No video provided')
+    target.flush()
+
+@app.route('/analyze_video', methods=['POST'])
+def analyze_video():
+    """
+    Analyze a recorded clip (mp4/webm) server-side
+    
+    Options (query string or form fields): exercise_type, analysis_profile,
+    sample_fps, max_frames, frame_skipping ('off' or 'adaptive'), roi ('off'
+    or 'bbox') and include_track (default true). The clip is
+    spooled to a temporary file and decoded frame by frame through its own
+    detector, so tracking carries across the whole clip.
+    """
+    try:
+        options = request.form.to_dict() if request.mimetype == 'multipart/form-data' else {}
+        options = {**request.args.to_dict(), **options}
+        analysis_profile = options.get('analysis_profile', default_analysis_profile)
+        if analysis_profile not in ANALYSIS_PROFILES:
+            return jsonify({'error': f'Unknown analysis_profile. Expected one of {list(ANALYSIS_PROFILES)}'}), 400
+        try:
+            sample_fps = float(options['sample_fps']) if options.get('sample_fps') else None
+            max_frames = int(options['max_frames']) if options.get('max_frames') else None
+        except ValueError:
+            return jsonify({'error': 'sample_fps and max_frames must be numbers'}), 400
+        try:
+            adaptive = resolve_frame_skipping(options.get('frame_skipping'))
+            roi = resolve_roi_mode(options.get('roi'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        include_track = str(options.get('include_track', 'true')).lower() not in ('0', 'false', 'no')
+        
+        session_id = f'video-{uuid.uuid4().hex}'
+        with tempfile.NamedTemporaryFile(suffix='.video') as clip:
+            try:
+                save_uploaded_video(clip)
+                with detector_pool.acquire(session_id) as session_detector:
+                    analyzer = VideoAnalyzer(
+                        session_detector,
+                        classification_batcher if classifier_trainer.model is not None else None,
+                        options.get('exercise_type', 'general'),
+                        analysis_profile,
+                        adaptive=adaptive,
+                        roi=roi
+                    )
+                    analysis = analyzer.analyze(clip.name, sample_fps, max_frames, include_track)
+            except PoolExhaustedError as e:
+                return jsonify({'error': str(e)}), 503
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            finally:
+                detector_pool.release(session_id)
+        
+        return result_response(analysis)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@sock.route('/stream')
+def stream(ws):
+    """
+    Live analysis session over a WebSocket
+    
+    Query parameters (exercise_type, analysis_profile, session_id) set the
+    initial options. The client streams binary JPEG/WebP frames and receives
+    one result per processed frame (JSON text, or binary messages with
+    format=msgpack|cbor); frames that arrive while the session is busy are
+    dropped in favour of the newest one.
+    """
+    options = request.args.to_dict()
+    session_id = options.pop('session_id', None) or uuid.uuid4().hex
+    
+    try:
+        mimetype = resolve_mimetype(options.pop('format', None))
+    except ValueError as e:
+        ws.send(json.dumps({'type': 'error', 'error': str(e)}))
+        return
+    
+    def encode(result):
+        message = encode_result(result, mimetype)
+        return message.decode('utf-8') if mimetype == JSON_MIMETYPE else message
+    
+    def payload_bytes(payload):
+        # Text frames carry base64, binary frames the encoded image itself
+        return frame_decoder.base64_payload(payload) if isinstance(payload, str) else payload
+    
+    try:
+        if inference_workers is not None:
+            # Session affinity in the worker pool keeps the tracker in one worker
+            def analyze_payload(payload, frame_options):
+                with quality_controller.track():
+                    frame_options['quality_tier'] = quality_controller.tier_for(frame_options.get('quality_tier'))
+                    return inference_workers.analyze(payload_bytes(payload), ENCODED_PAYLOAD, frame_options, session_id)
+            
+            StreamSession(session_id, analyze_payload, encode, options).run(ws)
+        else:
+            # The session keeps its pooled detector for its whole lifetime
+            with detector_pool.acquire(session_id) as session_detector:
+                def analyze_payload(payload, frame_options):
+                    with quality_controller.track():
+                        frame_options['quality_tier'] = quality_controller.tier_for(frame_options.get('quality_tier'))
+                        frame = frame_decoder.decode_payload(payload_bytes(payload), ENCODED_PAYLOAD)
+                        return analyze_frame(session_detector, classification_batcher, frame, frame_options)
+                
+                StreamSession(session_id, analyze_payload, encode, options).run(ws)
+    except (PoolExhaustedError, WorkerUnavailableError) as e:
+        ws.send(json.dumps({'type': 'error', 'error': str(e)}))
+    finally:
+        if inference_workers is not None:
+            inference_workers.release_session(session_id)
+        else:
+            detector_pool.release(session_id)
+
 if __name__ == '__main__':
     print("Starting ML API server...")
     print("Available endpoints:")
     print("- POST /detect_human - Detect human pose in image")
     print("- POST /classify_exercise - Classify exercise from landmarks")
     print("- POST /analyze_form - Analyze exercise form")
-    print("- POST /train_classifier - Train exercise classifier")
+    print("- POST /train_classifier - Start a classifier training job")
+    print("- GET /training_jobs/<job_id>[/events] - Training job progress")
     print("- GET /get_model_info - Get model information")
+    print("- GET /cache_stats - Frame result cache statistics")
+    print("- GET /health, /live - Readiness and liveness")
+    print("- GET /startup_report - Startup import / model-load timings")
     print("- POST /process_video_frame - Complete frame processing")
+    print("- POST /analyze_video - Analyze a recorded video file")
+    print("- WS /stream - Live frame streaming session")
     
     app.run(host='0.0.0.0', port=5000, debug=True)
 
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Compare per-frame exercise classifier latency across inference backends
+
+Loads the trained classifier from --model-dir (or, with --untrained, a freshly
+initialized model of the same architecture) and times single-row predictions
+for each backend, checking that every backend returns the same probabilities
+as Keras model.predict.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from classifier_inference import ClassifierInference, INFERENCE_BACKENDS
+from pose_features import FEATURE_VECTOR_SIZE
+from train_exercise_classifier import ExerciseClassifierTrainer
+
+NUM_CLASSES = 5
+
+
+def load_trainer(model_dir: str, untrained: bool) -> ExerciseClassifierTrainer:
+    trainer = ExerciseClassifierTrainer(model_dir=model_dir)
+    if untrained:
+        trainer.model = trainer.create_model(FEATURE_VECTOR_SIZE, NUM_CLASSES)
+        trainer.scaler.fit(np.random.default_rng(0).random((256, FEATURE_VECTOR_SIZE)))
+    else:
+        trainer.load_model_and_preprocessors()
+    return trainer
+
+
+def benchmark(inference: ClassifierInference, samples: np.ndarray, warmup: int = 20) -> np.ndarray:
+    """Per-call latencies in microseconds for single-row predictions"""
+    for row in samples[:warmup]:
+        inference.predict_proba(row)
+
+    latencies = np.empty(len(samples))
+    for i, row in enumerate(samples):
+        start = time.perf_counter()
+        inference.predict_proba(row)
+        latencies[i] = (time.perf_counter() - start) * 1e6
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark exercise classifier inference backends")
+    parser.add_argument('--model-dir', default='trained_models')
+    parser.add_argument('--untrained', action='store_true',
+                        help="Benchmark a randomly initialized model instead of a trained one")
+    parser.add_argument('--frames', type=int, default=500, help="Single-row predictions per backend")
+    parser.add_argument('--backends', nargs='+', choices=INFERENCE_BACKENDS, default=list(INFERENCE_BACKENDS))
+    args = parser.parse_args()
+
+    trainer = load_trainer(args.model_dir, args.untrained)
+    # Models trained on different feature sets take rows of different widths
+    num_features = trainer.model.inputs[0].shape[-1]
+    samples = np.random.default_rng(1).random((args.frames, num_features)).astype(np.float32)
+    reference = ClassifierInference(trainer.model, trainer.scaler, 'keras').predict_proba(samples)
+
+    print(f"{'backend':<12} {'mean us':>10} {'p50 us':>10} {'p95 us':>10} {'max |diff|':>12}")
+    for backend in args.backends:
+        inference = ClassifierInference(trainer.model, trainer.scaler, backend)
+        latencies = benchmark(inference, samples)
+        max_diff = float(np.abs(inference.predict_proba(samples) - reference).max())
+        print(f"{inference.backend:<12} {latencies.mean():>10.1f} {np.percentile(latencies, 50):>10.1f} "
+              f"{np.percentile(latencies, 95):>10.1f} {max_diff:>12.2e}")
+
+
+if __name__ == "__main__":
+    main()
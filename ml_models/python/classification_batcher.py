@@ -0,0 +1,154 @@
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from timing import Histogram
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+QUEUE_WAIT_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 25, 50, 100)
+
+
+class ClassificationBatcher:
+    """
+    Coalesce concurrent exercise classifications into batched forward passes
+
+    Requests call `predict_exercise(landmarks)` (or `predict_features` with a
+    ready model input row) exactly like they would on the classifier and block
+    until their result is ready. A scheduler thread takes the first waiting
+    request, keeps collecting for up to `max_wait_ms` (or until `max_batch_size`
+    requests are waiting), runs one `predict_features_batch` on the stacked
+    rows and hands each request its own row.
+    """
+
+    def __init__(self, classifier, max_batch_size: int = 32, max_wait_ms: float = 2.0,
+                 result_timeout: float = 10.0):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+
+        self.classifier = classifier
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.result_timeout = result_timeout
+
+        self._queue: List[Tuple[np.ndarray, Future, float]] = []
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        # Backends such as the TFLite interpreter must not run concurrently
+        self._predict_lock = threading.Lock()
+
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_wait_ms = Histogram(QUEUE_WAIT_BUCKETS_MS)
+        self.batches = 0
+        self.failures = 0
+
+    @property
+    def feature_set(self) -> str:
+        return self.classifier.feature_set
+
+    def swap_classifier(self, classifier):
+        """Route the following predictions to `classifier`; a running forward pass finishes on the old one"""
+        with self._predict_lock:
+            self.classifier = classifier
+
+    def predict_exercise(self, landmarks: np.ndarray) -> Dict:
+        """Classify one pose's landmarks as part of the next batch"""
+        return self.predict_features(self.classifier.classifier_features(landmarks)[0])
+
+    def predict_exercise_batch(self, landmarks: np.ndarray) -> List[Dict]:
+        """Classify a caller-assembled batch of landmarks directly in one forward pass"""
+        return self.predict_features_batch(self.classifier.classifier_features(landmarks))
+
+    def predict_features(self, features: np.ndarray) -> Dict:
+        """Classify one model input row as part of the next batch"""
+        return self.submit(features).result(timeout=self.result_timeout)
+
+    def predict_features_batch(self, features: np.ndarray) -> List[Dict]:
+        """Classify a caller-assembled (batch, features) array directly in one forward pass"""
+        with self._predict_lock:
+            return self.classifier.predict_features_batch(features)
+
+    def submit(self, features: np.ndarray) -> Future:
+        """Queue one model input row; the future resolves to its prediction dict"""
+        future = Future()
+        features = np.asarray(features, dtype=np.float32).ravel()
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Classification batcher is closed")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='classification-batcher', daemon=True)
+                self._thread.start()
+            self._queue.append((features, future, time.perf_counter()))
+            self._condition.notify()
+        return future
+
+    def _next_batch(self) -> List[Tuple[np.ndarray, Future, float]]:
+        with self._condition:
+            while not self._queue and not self._closed:
+                self._condition.wait()
+            if not self._queue:
+                return []
+
+            # Window opens when the oldest request arrived
+            deadline = self._queue[0][2] + self.max_wait_ms / 1000.0
+            while len(self._queue) < self.max_batch_size and not self._closed:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+
+            batch = self._queue[:self.max_batch_size]
+            del self._queue[:self.max_batch_size]
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+
+            started = time.perf_counter()
+            for _, _, queued_at in batch:
+                self.queue_wait_ms.observe((started - queued_at) * 1000.0)
+            self.batch_sizes.observe(len(batch))
+            self.batches += 1
+
+            # Vectors of an unexpected length only fail their own group
+            groups: Dict[int, List[Tuple[np.ndarray, Future, float]]] = {}
+            for item in batch:
+                groups.setdefault(item[0].size, []).append(item)
+
+            for group in groups.values():
+                try:
+                    features = np.stack([features for features, _, _ in group])
+                    predictions = self.predict_features_batch(features)
+                except Exception as e:
+                    self.failures += 1
+                    for _, future, _ in group:
+                        future.set_exception(e)
+                    continue
+
+                for (_, future, _), prediction in zip(group, predictions):
+                    future.set_result(prediction)
+
+    def close(self):
+        """Stop the scheduler once the queued requests have been answered"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def stats(self) -> Dict:
+        with self._condition:
+            queued = len(self._queue)
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait_ms,
+            'queued': queued,
+            'batches': self.batches,
+            'failures': self.failures,
+            'batch_size': self.batch_sizes.as_dict(),
+            'queue_wait_ms': self.queue_wait_ms.as_dict()
+        }
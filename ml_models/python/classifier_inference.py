@@ -0,0 +1,203 @@
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+import numpy as np
+
+# A model object means TensorFlow is already loaded; the module itself does
+# not import it, so importers that never build a model skip the cost
+if TYPE_CHECKING:
+    import tensorflow as tf
+
+# Inference backends for a trained exercise classifier
+#   numpy       - forward pass over weights extracted from the Dense/BatchNorm layers
+#   tf_function - the Keras model traced once into a graph function
+#   tflite      - TFLite export run by the TFLite interpreter
+#   keras       - model.predict (reference; large per-call overhead)
+INFERENCE_BACKENDS = ('numpy', 'tf_function', 'tflite', 'keras')
+DEFAULT_INFERENCE_BACKEND = 'numpy'
+
+
+def _softmax(x: np.ndarray) -> np.ndarray:
+    x -= x.max(axis=-1, keepdims=True)
+    np.exp(x, out=x)
+    x /= x.sum(axis=-1, keepdims=True)
+    return x
+
+
+_ACTIVATIONS = {
+    'linear': lambda x: x,
+    'relu': lambda x: np.maximum(x, 0.0, out=x),
+    'sigmoid': lambda x: 1.0 / (1.0 + np.exp(-x)),
+    'tanh': np.tanh,
+    'softmax': _softmax
+}
+
+
+class NumpyForward:
+    """
+    Pure NumPy forward pass of a Sequential Dense/BatchNormalization/Dropout model
+
+    Dropout is dropped, and each inference-mode BatchNormalization (an affine
+    transform) is folded into the following Dense layer, so the network runs as
+    one matmul + bias + activation per Dense layer.
+    """
+
+    def __init__(self, model: 'tf.keras.Model'):
+        import tensorflow as tf
+
+        self.layers: List[Tuple[np.ndarray, np.ndarray, str]] = []
+        pending_scale = None
+        pending_shift = None
+
+        for layer in model.layers:
+            if isinstance(layer, (tf.keras.layers.Dropout, tf.keras.layers.InputLayer)):
+                continue
+
+            if isinstance(layer, tf.keras.layers.BatchNormalization):
+                gamma, beta, mean, variance = self._batch_norm_weights(layer)
+                scale = gamma / np.sqrt(variance + layer.epsilon)
+                shift = beta - mean * scale
+                if pending_scale is not None:
+                    shift = pending_shift * scale + shift
+                    scale = pending_scale * scale
+                pending_scale, pending_shift = scale, shift
+                continue
+
+            if not isinstance(layer, tf.keras.layers.Dense):
+                raise ValueError(f"Layer type {type(layer).__name__} has no NumPy implementation")
+
+            activation = layer.activation.__name__
+            if activation not in _ACTIVATIONS:
+                raise ValueError(f"Activation '{activation}' has no NumPy implementation")
+
+            kernel, bias = (w.astype(np.float32) for w in layer.get_weights())
+            if not layer.use_bias:
+                bias = np.zeros(kernel.shape[1], dtype=np.float32)
+            if pending_scale is not None:
+                # (x * s + t) @ W + b == x @ (s[:, None] * W) + (t @ W + b)
+                bias = pending_shift @ kernel + bias
+                kernel = pending_scale[:, None] * kernel
+                pending_scale = pending_shift = None
+
+            self.layers.append((np.ascontiguousarray(kernel, dtype=np.float32), bias.astype(np.float32), activation))
+
+        if pending_scale is not None:
+            raise ValueError("A trailing BatchNormalization layer cannot be folded")
+
+    @staticmethod
+    def _batch_norm_weights(layer) -> List[np.ndarray]:
+        weights = {w.name.split('/')[-1].split(':')[0]: w.numpy().astype(np.float32) for w in layer.weights}
+        size = weights['moving_mean'].shape[0]
+        gamma = weights.get('gamma', np.ones(size, dtype=np.float32))
+        beta = weights.get('beta', np.zeros(size, dtype=np.float32))
+        return [gamma, beta, weights['moving_mean'], weights['moving_variance']]
+
+    def __call__(self, x: np.ndarray) -> np.ndarray:
+        for kernel, bias, activation in self.layers:
+            x = x @ kernel
+            x += bias
+            x = _ACTIVATIONS[activation](x)
+        return x
+
+
+class TFFunctionForward:
+    """Keras model call traced once into a tf.function with a fixed input signature"""
+
+    def __init__(self, model: 'tf.keras.Model'):
+        import tensorflow as tf
+
+        features = model.inputs[0].shape[-1]
+        self._call = tf.function(
+            lambda x: model(x, training=False),
+            input_signature=[tf.TensorSpec([None, features], tf.float32)]
+        )
+        # Trace now instead of on the first frame
+        self._call.get_concrete_function()
+        self._to_tensor = tf.convert_to_tensor
+
+    def __call__(self, x: np.ndarray) -> np.ndarray:
+        return self._call(self._to_tensor(x)).numpy()
+
+
+class TFLiteForward:
+    """Keras model converted to TFLite and run by the TFLite interpreter"""
+
+    def __init__(self, model: 'tf.keras.Model'):
+        import tensorflow as tf
+
+        converter = tf.lite.TFLiteConverter.from_keras_model(model)
+        self.interpreter = tf.lite.Interpreter(model_content=converter.convert())
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]['index']
+        self._output = self.interpreter.get_output_details()[0]['index']
+        self._batch_size = 1
+
+    def __call__(self, x: np.ndarray) -> np.ndarray:
+        if x.shape[0] != self._batch_size:
+            self.interpreter.resize_tensor_input(self._input, x.shape)
+            self.interpreter.allocate_tensors()
+            self._batch_size = x.shape[0]
+        self.interpreter.set_tensor(self._input, x)
+        self.interpreter.invoke()
+        return self.interpreter.get_tensor(self._output).copy()
+
+
+class KerasForward:
+    """Reference backend: model.predict"""
+
+    def __init__(self, model: 'tf.keras.Model'):
+        self.model = model
+
+    def __call__(self, x: np.ndarray) -> np.ndarray:
+        return self.model.predict(x, verbose=0)
+
+
+_BACKEND_CLASSES = {
+    'numpy': NumpyForward,
+    'tf_function': TFFunctionForward,
+    'tflite': TFLiteForward,
+    'keras': KerasForward
+}
+
+
+class ClassifierInference:
+    """
+    Scaler + model forward pass for per-frame classification
+
+    Applies the fitted StandardScaler in NumPy and runs the selected backend.
+    If the requested backend cannot represent the model it falls back to the
+    tf.function backend.
+    """
+
+    def __init__(self, model: 'tf.keras.Model', scaler, backend: str = DEFAULT_INFERENCE_BACKEND):
+        if backend not in INFERENCE_BACKENDS:
+            raise ValueError(f"Unknown inference backend '{backend}'. Expected one of {INFERENCE_BACKENDS}")
+
+        self.model = model
+        try:
+            self.forward = _BACKEND_CLASSES[backend](model)
+        except ValueError as e:
+            print(f"{backend} inference backend unavailable ({e}); using tf_function")
+            backend = 'tf_function'
+            self.forward = TFFunctionForward(model)
+        self.backend = backend
+
+        self._mean = self._scaler_vector(scaler, 'mean_', 'with_mean')
+        self._scale = self._scaler_vector(scaler, 'scale_', 'with_std')
+
+    @staticmethod
+    def _scaler_vector(scaler, attribute: str, flag: str) -> Optional[np.ndarray]:
+        value = getattr(scaler, attribute, None)
+        if value is None or not getattr(scaler, flag, True):
+            return None
+        return np.asarray(value, dtype=np.float32)
+
+    def predict_proba(self, features: np.ndarray) -> np.ndarray:
+        """Class probabilities for a (batch, features) array of raw (unscaled) features"""
+        x = np.array(features, dtype=np.float32, ndmin=2)
+        if self._mean is not None and x.shape[1] != self._mean.size:
+            raise ValueError(f"Expected {self._mean.size} landmark values per sample, got {x.shape[1]}")
+        if self._mean is not None:
+            x -= self._mean
+        if self._scale is not None:
+            x /= self._scale
+        return self.forward(x)
@@ -0,0 +1,162 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+# Key used for requests that do not identify a client session
+DEFAULT_SESSION_ID = '_default'
+
+
+class PoolExhaustedError(RuntimeError):
+    """Raised when every detector in the pool is busy and none frees up in time"""
+
+
+class _PoolEntry:
+    def __init__(self, detector):
+        self.detector = detector
+        self.lock = threading.Lock()
+        self.in_use = 0
+        self.last_used = time.monotonic()
+
+
+class DetectorPool:
+    """
+    Bounded pool of HumanDetectionModel instances keyed by client session id
+
+    Each session gets its own detector so MediaPipe tracking state never mixes
+    frames from different athletes, and a session's detector is used by one
+    request at a time. When the pool is full the least recently used idle
+    session is evicted and its detector is reset and handed to the new session.
+    Sessions idle for longer than `idle_timeout` seconds are closed.
+    """
+
+    def __init__(self, factory: Callable[[], object], max_instances: int = 8,
+                 idle_timeout: float = 300.0, acquire_timeout: float = 5.0):
+        if max_instances < 1:
+            raise ValueError("max_instances must be at least 1")
+
+        self.factory = factory
+        self.max_instances = max_instances
+        self.idle_timeout = idle_timeout
+        self.acquire_timeout = acquire_timeout
+
+        self._entries: 'OrderedDict[str, _PoolEntry]' = OrderedDict()
+        self._condition = threading.Condition()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @contextmanager
+    def acquire(self, session_id: Optional[str] = None):
+        """
+        Borrow the detector bound to a session for the duration of the block
+        """
+        entry = self._checkout(session_id or DEFAULT_SESSION_ID)
+        try:
+            if not entry.lock.acquire(timeout=self.acquire_timeout):
+                raise PoolExhaustedError("Session detector is busy; try again later")
+            try:
+                if entry.detector is None:
+                    raise RuntimeError("Detector could not be created for this session")
+                yield entry.detector
+            finally:
+                entry.lock.release()
+        finally:
+            with self._condition:
+                entry.in_use -= 1
+                entry.last_used = time.monotonic()
+                self._condition.notify_all()
+
+    def release(self, session_id: str):
+        """Close a session's detector once the client is done with it"""
+        with self._condition:
+            entry = self._entries.get(session_id)
+            if entry is not None and entry.in_use == 0:
+                del self._entries[session_id]
+                self._close(entry.detector)
+                self._condition.notify_all()
+
+    def _checkout(self, session_id: str) -> _PoolEntry:
+        deadline = time.monotonic() + self.acquire_timeout
+        with self._condition:
+            while True:
+                entry = self._entries.get(session_id)
+                if entry is not None:
+                    self.hits += 1
+                    self._entries.move_to_end(session_id)
+                    entry.in_use += 1
+                    return entry
+
+                self._expire_idle()
+                if len(self._entries) < self.max_instances:
+                    # Reserve the slot, then build the detector outside the pool lock
+                    self.misses += 1
+                    entry = _PoolEntry(None)
+                    entry.lock.acquire()
+                    entry.in_use += 1
+                    self._entries[session_id] = entry
+                    break
+
+                detector = self._recycle_idle()
+                if detector is not None:
+                    self.misses += 1
+                    entry = _PoolEntry(detector)
+                    entry.in_use += 1
+                    self._entries[session_id] = entry
+                    return entry
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolExhaustedError(
+                        f"All {self.max_instances} detectors are busy; try again later"
+                    )
+                self._condition.wait(remaining)
+
+        try:
+            entry.detector = self.factory()
+        except Exception:
+            with self._condition:
+                self._entries.pop(session_id, None)
+                self._condition.notify_all()
+            raise
+        finally:
+            entry.lock.release()
+        return entry
+
+    def _recycle_idle(self):
+        """Evict the least recently used idle session and reset its detector for reuse"""
+        for session_id, entry in self._entries.items():
+            if entry.in_use == 0:
+                del self._entries[session_id]
+                self.evictions += 1
+                entry.detector.reset()
+                return entry.detector
+        return None
+
+    def _expire_idle(self):
+        now = time.monotonic()
+        expired = [
+            session_id for session_id, entry in self._entries.items()
+            if entry.in_use == 0 and now - entry.last_used > self.idle_timeout
+        ]
+        for session_id in expired:
+            entry = self._entries.pop(session_id)
+            self.evictions += 1
+            self._close(entry.detector)
+
+    @staticmethod
+    def _close(detector):
+        if detector is not None:
+            detector.close()
+
+    def stats(self) -> Dict:
+        with self._condition:
+            return {
+                'instances': len(self._entries),
+                'in_use': sum(1 for entry in self._entries.values() if entry.in_use),
+                'max_instances': self.max_instances,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Evaluate a trained exercise classifier on a landmark dataset
+
+Streams a landmark_store dataset through the model in memory-mapped chunks
+(so datasets larger than memory evaluate in constant space) and reports
+accuracy, per-exercise precision / recall and the confusion matrix. Rows can
+be restricted to the test split used by streaming training, or to one
+exercise, athlete or session from the dataset index.
+"""
+
+import argparse
+import json
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from landmark_store import LandmarkDataset
+from pose_dataset import DEFAULT_TEST_FRACTION, landmark_split_keys, session_keys, test_mask
+from train_exercise_classifier import ExerciseClassifierTrainer
+
+SPLITS = ('all', 'train', 'test')
+DEFAULT_EVAL_CHUNK_ROWS = 4096
+
+
+def evaluate(trainer: ExerciseClassifierTrainer, dataset: LandmarkDataset, split: str = 'all',
+             test_fraction: float = DEFAULT_TEST_FRACTION, segments: Optional[Sequence[Dict]] = None,
+             chunk_rows: int = DEFAULT_EVAL_CHUNK_ROWS) -> Dict:
+    """
+    Confusion matrix and metrics of the trainer's model over a dataset (or the given index segments)
+    """
+    if split not in SPLITS:
+        raise ValueError(f"Unknown split '{split}'. Expected one of {SPLITS}")
+
+    classes: List[str] = trainer.label_encoder.classes_.tolist()
+    # Dataset exercises the model has no class for count as misclassified
+    labels = classes + [exercise for exercise in dataset.exercises if exercise not in classes]
+    code_to_label = np.array([labels.index(exercise) for exercise in dataset.exercises], dtype=np.int64)
+    confusion = np.zeros((len(labels), len(classes)), dtype=np.int64)
+    segment_keys = session_keys([segment['session_id'] for segment in dataset.segments])
+
+    inference = trainer.get_inference()
+    started = time.perf_counter()
+    for shard, start, landmarks, codes in dataset.iter_chunks(chunk_rows, segments):
+        if split != 'all':
+            keys = landmark_split_keys(dataset, shard, start, start + len(landmarks), segment_keys)
+            rows = test_mask(keys, test_fraction)
+            if split == 'train':
+                rows = ~rows
+            landmarks, codes = landmarks[rows], codes[rows]
+        if not len(landmarks):
+            continue
+
+        probabilities = inference.predict_proba(trainer.classifier_features(landmarks))
+        np.add.at(confusion, (code_to_label[codes], np.argmax(probabilities, axis=1)), 1)
+    elapsed = time.perf_counter() - started
+
+    total = int(confusion.sum())
+    correct = int(np.trace(confusion[:len(classes)]))
+    per_exercise = {}
+    for i, label in enumerate(labels):
+        support = int(confusion[i].sum())
+        predicted = int(confusion[:, i].sum()) if i < len(classes) else 0
+        hits = int(confusion[i, i]) if i < len(classes) else 0
+        if support or predicted:
+            per_exercise[label] = {
+                'support': support,
+                'precision': round(hits / predicted, 4) if predicted else 0.0,
+                'recall': round(hits / support, 4) if support else 0.0
+            }
+
+    return {
+        'rows': total,
+        'accuracy': round(correct / total, 4) if total else 0.0,
+        'per_exercise': per_exercise,
+        'confusion': {'labels': labels, 'predicted': classes, 'matrix': confusion.tolist()},
+        'rows_per_s': round(total / elapsed, 1) if elapsed > 0 else 0.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the exercise classifier on a landmark dataset")
+    parser.add_argument('dataset', help="landmark_store dataset directory")
+    parser.add_argument('--model-dir', default='trained_models')
+    parser.add_argument('--split', choices=SPLITS, default='test',
+                        help="Rows of the streaming-training hash split to evaluate")
+    parser.add_argument('--test-fraction', type=float, default=DEFAULT_TEST_FRACTION)
+    parser.add_argument('--exercise', help="Only sessions indexed with this exercise")
+    parser.add_argument('--athlete', help="Only sessions of this athlete")
+    parser.add_argument('--session', help="Only this session")
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_EVAL_CHUNK_ROWS, help="Rows per forward pass")
+    parser.add_argument('--json', action='store_true', help="Print the full result as JSON")
+    args = parser.parse_args()
+
+    trainer = ExerciseClassifierTrainer(model_dir=args.model_dir)
+    trainer.load_model_and_preprocessors()
+    dataset = LandmarkDataset(args.dataset)
+
+    segments = None
+    if args.exercise or args.athlete or args.session:
+        segments = dataset.select(args.exercise, args.athlete, args.session)
+        if not segments:
+            parser.error("No indexed sessions match the filters")
+
+    result = evaluate(trainer, dataset, args.split, args.test_fraction, segments, args.chunk_rows)
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+
+    print(f"{result['rows']} rows ({args.split} split), accuracy {result['accuracy']:.4f}, "
+          f"{result['rows_per_s']:.0f} rows/s")
+    print(f"{'exercise':<16} {'support':>9} {'precision':>10} {'recall':>8}")
+    for exercise, metrics in result['per_exercise'].items():
+        print(f"{exercise:<16} {metrics['support']:>9} {metrics['precision']:>10.4f} {metrics['recall']:>8.4f}")
+
+
+if __name__ == "__main__":
+    main()
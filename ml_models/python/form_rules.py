@@ -0,0 +1,152 @@
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from landmark_arrays import X, Y
+from pose_features import PoseFeatures, FEATURE_ANGLES, angle_index
+
+# Form rules per exercise, evaluated on pose features (see pose_features).
+# Each rule measures one quantity per frame and is violated when it falls
+# outside [min, max]:
+#   angle    - a named feature angle (FEATURE_ANGLES), in degrees
+#   distance - distance between the two `points` along `axis` (x, y or xy), in
+#              torso lengths, so it does not depend on resolution or camera distance
+# Rules with `min_visibility` only apply when all their points are that visible.
+# Severity is 'warning' (form is off) or 'info' (a cue worth giving).
+FORM_RULES = {
+    'pushup': (
+        {'name': 'shoulders_level', 'kind': 'distance', 'points': (11, 12), 'axis': 'y', 'max': 0.13,
+         'message': "Keep your shoulders level", 'severity': 'warning'},
+        {'name': 'body_alignment', 'kind': 'distance', 'points': (11, 23), 'axis': 'x', 'max': 0.2,
+         'message': "Keep your body in a straight line", 'severity': 'warning'},
+        {'name': 'hip_line', 'kind': 'angle', 'angle': 'left_body_line', 'min': 150.0, 'min_visibility': 0.5,
+         'message': "Keep your hips in line with your shoulders and ankles", 'severity': 'info'}
+    ),
+    'squat': (
+        {'name': 'knee_alignment', 'kind': 'distance', 'points': (25, 26), 'axis': 'x', 'max': 0.33,
+         'message': "Keep your knees aligned with your feet", 'severity': 'warning'},
+    ),
+    'plank': (
+        {'name': 'body_alignment', 'kind': 'distance', 'points': (11, 23), 'axis': 'y', 'max': 0.2,
+         'message': "Keep your body in a straight line from head to heels", 'severity': 'warning'},
+    )
+}
+RULE_KINDS = ('angle', 'distance')
+SEVERITIES = ('info', 'warning')
+
+# Left / right landmark pairs compared for symmetry (shoulders, elbows, wrists, hips, knees, ankles)
+SYMMETRY_PAIRS = np.array(((11, 12), (13, 14), (15, 16), (23, 24), (25, 26), (27, 28)), dtype=np.intp)
+# Vertical offset (torso lengths) at which a pair counts as fully asymmetric
+SYMMETRY_SCALE = 0.67
+VISIBLE = 0.5
+
+
+def rule_points(rule: Dict) -> Tuple[int, ...]:
+    """Pose landmarks a rule reads"""
+    return FEATURE_ANGLES[rule['angle']] if rule['kind'] == 'angle' else tuple(rule['points'])
+
+
+class CompiledRules:
+    """
+    A rule table turned into index arrays, so a batch is checked in one NumPy pass
+
+    Angle rules read their columns of the cached feature angles; distance rules
+    are gathered with one fancy-indexing operation. Values are scattered back
+    into rule order.
+    """
+
+    def __init__(self, rules: Tuple[Dict, ...]):
+        for rule in rules:
+            if rule['kind'] not in RULE_KINDS:
+                raise ValueError(f"Unknown form rule kind '{rule['kind']}'. Expected one of {RULE_KINDS}")
+            if rule['severity'] not in SEVERITIES:
+                raise ValueError(f"Unknown form rule severity '{rule['severity']}'. Expected one of {SEVERITIES}")
+
+        self.rules = rules
+        self.messages = [rule['message'] for rule in rules]
+        self.minimum = np.array([rule.get('min', -np.inf) for rule in rules], dtype=np.float64)
+        self.maximum = np.array([rule.get('max', np.inf) for rule in rules], dtype=np.float64)
+        self.visibility_rules = [
+            (i, list(rule_points(rule)), rule['min_visibility'])
+            for i, rule in enumerate(rules) if 'min_visibility' in rule
+        ]
+
+        self.angle_rules = np.array([i for i, rule in enumerate(rules) if rule['kind'] == 'angle'], dtype=np.intp)
+        self.angle_columns = np.array([angle_index(rules[i]['angle']) for i in self.angle_rules], dtype=np.intp)
+        self.distance_rules = np.array([i for i, rule in enumerate(rules) if rule['kind'] == 'distance'], dtype=np.intp)
+        self.distance_points = np.array([rules[i]['points'] for i in self.distance_rules], dtype=np.intp).reshape(-1, 2)
+        axes = [rules[i]['axis'] for i in self.distance_rules]
+        self.distance_axis = np.array([('x', 'y', 'xy').index(axis) for axis in axes], dtype=np.intp)
+
+    def evaluate(self, features: PoseFeatures) -> Tuple[np.ndarray, np.ndarray]:
+        """Measured values and violation flags, both (F, R), for a batch of pose features"""
+        frames = features.normalized.shape[0]
+        values = np.full((frames, len(self.rules)), np.nan)
+
+        if len(self.angle_rules):
+            values[:, self.angle_rules] = features.angles[:, self.angle_columns]
+        if len(self.distance_rules):
+            pairs = features.normalized[:, self.distance_points][..., [X, Y]]  # (F, R, 2, 2)
+            offsets = np.abs(pairs[:, :, 0] - pairs[:, :, 1])
+            candidates = np.concatenate([offsets, np.hypot(offsets[..., :1], offsets[..., 1:])], axis=-1)
+            values[:, self.distance_rules] = candidates[:, np.arange(len(self.distance_axis)), self.distance_axis]
+
+        violated = (values < self.minimum) | (values > self.maximum)
+        for i, points, min_visibility in self.visibility_rules:
+            violated[:, i] &= features.visibility[:, points].min(axis=1) >= min_visibility
+        return values, violated
+
+
+@lru_cache(maxsize=None)
+def compiled_rules(exercise_type: str) -> CompiledRules:
+    return CompiledRules(FORM_RULES.get(exercise_type.lower(), ()))
+
+
+def evaluate_form(features: PoseFeatures, exercise_type: str) -> Tuple[CompiledRules, np.ndarray, np.ndarray]:
+    """Evaluate an exercise's form rules over a batch of pose features"""
+    rules = compiled_rules(exercise_type)
+    values, violated = rules.evaluate(features)
+    return rules, values, violated
+
+
+def form_recommendations(features: PoseFeatures, exercise_type: str) -> List[List[str]]:
+    """Per frame, the messages of the violated rules (in table order)"""
+    rules, _, violated = evaluate_form(features, exercise_type)
+    return [[rules.messages[i] for i in np.flatnonzero(row)] for row in violated]
+
+
+def form_issues(features: PoseFeatures, exercise_type: str) -> List[Dict]:
+    """Violated rules of a single pose with their measured value and severity"""
+    rules, values, violated = evaluate_form(PoseFeatures.stack([features]), exercise_type)
+    return [
+        {
+            'rule': rules.rules[i]['name'],
+            'message': rules.messages[i],
+            'severity': rules.rules[i]['severity'],
+            'value': round(float(values[0, i]), 3)
+        }
+        for i in np.flatnonzero(violated[0])
+    ]
+
+
+def symmetry_scores(features: PoseFeatures) -> np.ndarray:
+    """
+    (F,) left / right symmetry in [0, 1] from the vertical offset of mirrored landmarks
+
+    Only pairs with both points visible count; frames without any score 0.
+    """
+    left = features.normalized[:, SYMMETRY_PAIRS[:, 0], Y]
+    right = features.normalized[:, SYMMETRY_PAIRS[:, 1], Y]
+    both_visible = ((features.visibility[:, SYMMETRY_PAIRS[:, 0]] > VISIBLE) &
+                    (features.visibility[:, SYMMETRY_PAIRS[:, 1]] > VISIBLE))
+    scores = 1.0 - np.minimum(np.abs(left - right) / SYMMETRY_SCALE, 1.0)
+    counts = both_visible.sum(axis=1)
+    totals = np.where(both_visible, scores, 0.0).sum(axis=1)
+    return np.divide(totals, counts, out=np.zeros(len(counts)), where=counts > 0)
+
+
+def form_scores(features: PoseFeatures) -> np.ndarray:
+    """(F,) form score: 70% share of visible landmarks, 30% symmetry, capped at 1"""
+    visible_share = (features.visibility > VISIBLE).mean(axis=1)
+    return np.minimum(visible_share * 0.7 + symmetry_scores(features) * 0.3, 1.0)
@@ -0,0 +1,107 @@
+import time
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from frame_scheduler import resolve_frame_skipping
+from human_detection_model import ANALYSIS_PROFILES
+from pose_features import PoseFeatures, classifier_input
+from quality_controller import resolve_quality_tier
+from result_cache import ResultCache
+from result_schema import apply_output_options
+from roi_tracking import resolve_roi_mode
+
+
+def analyze_frame(frame_detector, classifier, frame: np.ndarray, options: Dict, classify: bool = True,
+                  cache: Optional[ResultCache] = None, session_id: Optional[str] = None) -> Dict:
+    """
+    Run detection (and optionally exercise classification) on a decoded frame
+
+    Shared by the HTTP handlers, streaming sessions and inference worker processes.
+    The result is compacted according to the output options (mask encoding and
+    keypoints format, see result_schema) before it is returned.
+    """
+    return analyze_frames(frame_detector, classifier, [frame], options, classify, cache, session_id)[0]
+
+
+def analyze_frames(frame_detector, classifier, frames: Iterable[np.ndarray], options: Dict,
+                   classify: bool = True, cache: Optional[ResultCache] = None,
+                   session_id: Optional[str] = None) -> List[Dict]:
+    """
+    Analyze a sequence of frames with one detector and one classifier forward pass
+
+    Frames are consumed one at a time, so they may share a reusable decode
+    buffer. Every frame with a detected pose is then classified in a single
+    batched prediction. The `frame_skipping` option ('off' or 'adaptive')
+    lets the detector skip inference on near-static frames, `roi`
+    ('off' or 'bbox') crops each frame around the previous pose, and
+    `quality_tier` (see quality_controller) trades accuracy for speed.
+
+    With a `cache`, bit-identical copies of a frame the same client session
+    (`session_id`) recently sent with the same options are answered from it
+    without running inference; a retried frame is not counted twice.
+    """
+    exercise_type = options.get('exercise_type', 'general')
+    analysis_profile = options.get('analysis_profile', frame_detector.analysis_profile)
+    if analysis_profile not in ANALYSIS_PROFILES:
+        raise ValueError(f'Unknown analysis_profile. Expected one of {list(ANALYSIS_PROFILES)}')
+    adaptive = resolve_frame_skipping(options.get('frame_skipping'))
+    roi = resolve_roi_mode(options.get('roi'))
+    quality_tier = resolve_quality_tier(options.get('quality_tier'))['name']
+
+    if cache is not None and not cache.enabled:
+        cache = None
+
+    # Process frames (hashing each one before the next may reuse its buffer)
+    results: List[Dict] = []
+    analyzed = []
+    for frame in frames:
+        key = cache.key(frame, options, classify, session_id) if cache is not None else None
+        cached = cache.get(key) if cache is not None else None
+        if cached is not None:
+            results.append(cached)
+            continue
+        analyzed.append((len(results), key))
+        results.append(
+            frame_detector.process_video_frame(frame, exercise_type, analysis_profile, adaptive, roi, quality_tier)
+        )
+
+    # Add exercise classification where landmarks are available
+    if classify:
+        classify_results(classifier, [results[index] for index, _ in analyzed])
+
+    for index, key in analyzed:
+        results[index] = apply_output_options(results[index], options)
+        if cache is not None:
+            cache.put(key, results[index])
+    return results
+
+
+def classify_results(classifier, results: List[Dict]):
+    """
+    Classify every detected pose in `results` in one prediction call
+
+    The classifier input is built from the pose features the detector already
+    cached on each result, in the feature set the classifier was trained on.
+    """
+    detected = [result for result in results if result['pose_detection'].get('features') is not None]
+    if not detected:
+        return
+
+    start = time.perf_counter()
+    rows = classifier_input(
+        PoseFeatures.stack([result['pose_detection']['features'] for result in detected]),
+        np.stack([result['pose_detection']['keypoint_array'] for result in detected]),
+        classifier.feature_set
+    )
+    if len(detected) == 1:
+        # Single frames go through predict_features so a batcher can coalesce them across clients
+        classifications = [classifier.predict_features(rows[0])]
+    else:
+        classifications = classifier.predict_features_batch(rows)
+    # Amortized over the frames that shared the forward pass
+    elapsed_ms = round((time.perf_counter() - start) * 1000.0 / len(detected), 3)
+
+    for result, classification in zip(detected, classifications):
+        result['exercise_classification'] = classification
+        result['timings_ms']['classification'] = elapsed_ms
@@ -0,0 +1,270 @@
+import base64
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# Compressed images accepted as a raw request body or multipart file
+ENCODED_IMAGE_TYPES = ('image/jpeg', 'image/webp', 'image/png')
+
+# Uncompressed pixel layouts accepted as application/octet-stream.
+# Each entry maps to (buffer shape for a width x height frame, OpenCV conversion to BGR)
+RAW_FRAME_FORMATS = {
+    'rgba': (lambda w, h: (h, w, 4), cv2.COLOR_RGBA2BGR),
+    'i420': (lambda w, h: (h * 3 // 2, w), cv2.COLOR_YUV2BGR_I420),
+    'nv12': (lambda w, h: (h * 3 // 2, w), cv2.COLOR_YUV2BGR_NV12),
+    'nv21': (lambda w, h: (h * 3 // 2, w), cv2.COLOR_YUV2BGR_NV21),
+}
+
+# Headers describing a raw frame
+FRAME_FORMAT_HEADER = 'X-Frame-Format'
+FRAME_WIDTH_HEADER = 'X-Frame-Width'
+FRAME_HEIGHT_HEADER = 'X-Frame-Height'
+
+# Upper bound on a single uploaded frame (a 4K RGBA frame is ~33 MB)
+MAX_FRAME_BYTES = 40 * 1024 * 1024
+
+_READ_CHUNK_BYTES = 64 * 1024
+
+# Descriptor for compressed (JPEG/WebP/PNG) payloads
+ENCODED_PAYLOAD = {'kind': 'encoded'}
+
+
+class FrameDecodeError(ValueError):
+    """Raised when a request does not carry a decodable frame"""
+
+
+class FrameDecoder:
+    """
+    Decode video frames from HTTP requests into reusable NumPy buffers
+
+    Supports the legacy base64-in-JSON body as well as binary uploads
+    (multipart, raw image/jpeg|webp|png bodies and raw RGBA/YUV pixel
+    buffers described by X-Frame-Format/-Width/-Height headers). Binary
+    bodies are read straight from the request stream into a per-thread
+    buffer that is reused across requests.
+    """
+
+    def __init__(self, max_frame_bytes: int = MAX_FRAME_BYTES):
+        self.max_frame_bytes = max_frame_bytes
+        self._local = threading.local()
+
+    def decode_request(self, request) -> np.ndarray:
+        """
+        Decode the frame carried by a Flask request and return it as a BGR image
+
+        Raw pixel uploads are converted into a per-thread buffer, so the returned
+        frame is only valid until the same thread decodes the next request.
+        """
+        payload, descriptor = self.read_request(request)
+        return self.decode_payload(payload, descriptor)
+
+    def read_request(self, request) -> Tuple[memoryview, Dict]:
+        """
+        Read the still-encoded frame bytes of a request and describe their format
+
+        The payload is a view of the per-thread byte buffer (valid until the
+        thread reads the next request). The descriptor is either
+        ENCODED_PAYLOAD or a raw-frame descriptor with format, width and height.
+        """
+        mimetype = request.mimetype
+
+        if mimetype == 'application/json':
+            data = request.get_json(silent=True) or {}
+            if 'image' not in data:
+                raise FrameDecodeError('No image provided')
+            return self.base64_payload(data['image']), ENCODED_PAYLOAD
+
+        if mimetype == 'multipart/form-data':
+            upload = request.files.get('image')
+            if upload is None:
+                raise FrameDecodeError('No image provided')
+            if FRAME_FORMAT_HEADER in request.headers:
+                return self._read_stream(upload.stream, None), self.raw_descriptor(request.headers)
+            return self._read_stream(upload.stream, None), ENCODED_PAYLOAD
+
+        if mimetype in ENCODED_IMAGE_TYPES:
+            return self._read_stream(request.stream, request.content_length), ENCODED_PAYLOAD
+
+        if mimetype == 'application/octet-stream':
+            descriptor = self.raw_descriptor(request.headers)
+            return self._read_stream(request.stream, request.content_length), descriptor
+
+        raise FrameDecodeError(f'Unsupported content type: {mimetype or "none"}')
+
+    def is_batch_request(self, request) -> bool:
+        """Whether a request carries a list of frames ("images") instead of one"""
+        if request.mimetype == 'application/json':
+            return 'images' in (request.get_json(silent=True) or {})
+        if request.mimetype == 'multipart/form-data':
+            return 'images' in request.files
+        return False
+
+    def read_request_batch(self, request) -> List[Tuple[memoryview, Dict]]:
+        """
+        Read every frame of a batch request as (payload, descriptor) pairs
+
+        Frames come as a JSON "images" list of base64 strings, or as repeated
+        multipart "images" files (raw pixel buffers if the X-Frame-* headers
+        are set, which then describe every file). Unlike read_request, each
+        payload owns its bytes, so all frames stay valid together.
+        """
+        if request.mimetype == 'application/json':
+            images = (request.get_json(silent=True) or {}).get('images')
+            if not isinstance(images, list) or not images:
+                raise FrameDecodeError('"images" must be a non-empty list')
+            return [(self.base64_payload(image), ENCODED_PAYLOAD) for image in images]
+
+        if request.mimetype == 'multipart/form-data':
+            uploads = request.files.getlist('images')
+            if not uploads:
+                raise FrameDecodeError('No images provided')
+            if FRAME_FORMAT_HEADER in request.headers:
+                descriptor = self.raw_descriptor(request.headers)
+            else:
+                descriptor = ENCODED_PAYLOAD
+
+            frames = []
+            for upload in uploads:
+                payload = upload.read(self.max_frame_bytes + 1)
+                if len(payload) > self.max_frame_bytes:
+                    raise FrameDecodeError(f'Frame exceeds {self.max_frame_bytes} bytes')
+                frames.append((memoryview(payload), descriptor))
+            return frames
+
+        raise FrameDecodeError('Frame batches must be sent as JSON or multipart/form-data')
+
+    def decode_payload(self, payload, descriptor: Dict) -> np.ndarray:
+        """Decode a payload returned by read_request into a BGR image"""
+        if descriptor.get('kind') == 'raw':
+            return self._decode_raw(memoryview(payload), descriptor)
+        return self._decode_encoded(memoryview(payload))
+
+    def raw_descriptor(self, headers) -> Dict:
+        """Parse and validate the X-Frame-* headers describing a raw pixel buffer"""
+        frame_format = headers.get(FRAME_FORMAT_HEADER, '').lower()
+        if frame_format not in RAW_FRAME_FORMATS:
+            raise FrameDecodeError(
+                f'Unsupported {FRAME_FORMAT_HEADER} "{frame_format}". Expected one of {list(RAW_FRAME_FORMATS)}'
+            )
+
+        try:
+            width = int(headers.get(FRAME_WIDTH_HEADER, ''))
+            height = int(headers.get(FRAME_HEIGHT_HEADER, ''))
+        except ValueError:
+            raise FrameDecodeError(f'{FRAME_WIDTH_HEADER} and {FRAME_HEIGHT_HEADER} headers are required for raw frames')
+        if width <= 0 or height <= 0:
+            raise FrameDecodeError('Frame width and height must be positive')
+
+        return {'kind': 'raw', 'format': frame_format, 'width': width, 'height': height}
+
+    def request_options(self, request) -> Dict:
+        """
+        Return the per-frame options (exercise_type, analysis_profile, ...) of a request
+
+        JSON requests carry them in the body, multipart requests as form fields
+        and raw binary requests as query-string parameters.
+        """
+        if request.mimetype == 'application/json':
+            return request.get_json(silent=True) or {}
+        if request.mimetype == 'multipart/form-data':
+            return request.form.to_dict()
+        return request.args.to_dict()
+
+    def decode_base64(self, image_base64: str) -> np.ndarray:
+        """Decode a base64 (optionally data-URL prefixed) encoded image"""
+        return self._decode_encoded(self.base64_payload(image_base64))
+
+    def base64_payload(self, image_base64: str) -> memoryview:
+        """Decode base64 (optionally data-URL prefixed) text into encoded image bytes"""
+        if not isinstance(image_base64, str):
+            raise FrameDecodeError('Image must be a base64 string')
+        if image_base64.startswith('data:'):
+            image_base64 = image_base64.split(',', 1)[-1]
+        try:
+            return memoryview(base64.b64decode(image_base64))
+        except (ValueError, TypeError):
+            raise FrameDecodeError('Invalid base64 image data')
+
+    def decode_image_bytes(self, payload) -> np.ndarray:
+        """Decode a compressed (JPEG/WebP/PNG) image from a bytes-like object"""
+        return self._decode_encoded(memoryview(payload))
+
+    def _decode_encoded(self, payload: memoryview) -> np.ndarray:
+        """Decode a compressed (JPEG/WebP/PNG) image"""
+        if len(payload) == 0:
+            raise FrameDecodeError('No image provided')
+        frame = cv2.imdecode(np.frombuffer(payload, np.uint8), cv2.IMREAD_COLOR)
+        if frame is None:
+            raise FrameDecodeError('Invalid image format')
+        return frame
+
+    def _decode_raw(self, payload: memoryview, descriptor: Dict) -> np.ndarray:
+        """Convert a raw RGBA/YUV pixel buffer into the reusable BGR frame buffer"""
+        frame_format = descriptor['format']
+        width = descriptor['width']
+        height = descriptor['height']
+
+        shape_for, conversion = RAW_FRAME_FORMATS[frame_format]
+        shape = shape_for(width, height)
+        expected_bytes = int(np.prod(shape))
+        if len(payload) != expected_bytes:
+            raise FrameDecodeError(
+                f'Expected {expected_bytes} bytes for a {width}x{height} {frame_format} frame, got {len(payload)}'
+            )
+
+        pixels = np.frombuffer(payload, np.uint8).reshape(shape)
+        bgr = self._frame_buffer(height, width)
+        cv2.cvtColor(pixels, conversion, dst=bgr)
+        return bgr
+
+    def _read_stream(self, stream, content_length: Optional[int]) -> memoryview:
+        """
+        Read a request body into the per-thread byte buffer without intermediate copies
+        """
+        if content_length is not None and content_length > self.max_frame_bytes:
+            raise FrameDecodeError(f'Frame exceeds {self.max_frame_bytes} bytes')
+
+        buffer = self._byte_buffer(content_length or _READ_CHUNK_BYTES)
+        readinto = getattr(stream, 'readinto', None)
+        total = 0
+
+        while True:
+            if total == len(buffer):
+                if content_length is not None:
+                    break
+                if len(buffer) >= self.max_frame_bytes:
+                    raise FrameDecodeError(f'Frame exceeds {self.max_frame_bytes} bytes')
+                buffer = self._byte_buffer(min(len(buffer) * 2, self.max_frame_bytes), keep=total)
+
+            window = buffer[total:]
+            if readinto is not None:
+                n = readinto(window)
+            else:
+                chunk = stream.read(len(window))
+                n = len(chunk)
+                window[:n] = chunk
+            if not n:
+                break
+            total += n
+
+        return buffer[:total]
+
+    def _byte_buffer(self, size: int, keep: int = 0) -> memoryview:
+        """Return a `size`-byte view of the per-thread byte buffer, growing it if needed"""
+        buffer = getattr(self._local, 'bytes', None)
+        if buffer is None or len(buffer) < size:
+            grown = bytearray(size)
+            if buffer is not None and keep:
+                grown[:keep] = buffer[:keep]
+            self._local.bytes = buffer = grown
+        return memoryview(buffer)[:size]
+
+    def _frame_buffer(self, height: int, width: int) -> np.ndarray:
+        """Return the per-thread BGR frame buffer for the given resolution"""
+        frame = getattr(self._local, 'frame', None)
+        if frame is None or frame.shape[:2] != (height, width):
+            frame = np.empty((height, width, 3), dtype=np.uint8)
+            self._local.frame = frame
+        return frame
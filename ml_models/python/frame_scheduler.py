@@ -0,0 +1,182 @@
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# Frame skipping modes accepted by process_video_frame / the `frame_skipping` option
+#   off      - every frame runs the MediaPipe graph
+#   adaptive - near-static frames reuse the last keyframe's landmarks
+FRAME_SKIPPING_MODES = ('off', 'adaptive')
+
+DEFAULT_KEYFRAME_INTERVAL = 4
+# Mean absolute difference (0-255 grey levels) of the thumbnails that counts as motion
+DEFAULT_MOTION_THRESHOLD = 2.5
+# Largest landmark drift (fraction of the frame diagonal) extrapolation may cover
+DEFAULT_MAX_DRIFT = 0.01
+THUMBNAIL_WIDTH = 64
+
+
+def frame_thumbnail(frame: np.ndarray, width: int = THUMBNAIL_WIDTH) -> np.ndarray:
+    """Downscaled greyscale copy of a BGR frame used to measure inter-frame change"""
+    height = max(1, round(frame.shape[0] * width / frame.shape[1]))
+    # Nearest-neighbour down to 4x the target first: a full-resolution INTER_AREA
+    # resize costs milliseconds, while the 4x integer area reduction is cheap
+    if frame.shape[1] > width * 4:
+        frame = cv2.resize(frame, (width * 4, height * 4), interpolation=cv2.INTER_NEAREST)
+    small = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    return small
+
+
+def resolve_frame_skipping(mode: Optional[str]) -> bool:
+    """Validate a `frame_skipping` option and return whether adaptive skipping is on"""
+    mode = mode or 'off'
+    if mode not in FRAME_SKIPPING_MODES:
+        raise ValueError(f"Unknown frame_skipping mode '{mode}'. Expected one of {FRAME_SKIPPING_MODES}")
+    return mode == 'adaptive'
+
+
+def interpolate_keypoints(start: np.ndarray, end: np.ndarray, fractions: List[float]) -> List[np.ndarray]:
+    """Linearly interpolate (N, 4) keypoint arrays at the given fractions of the way from start to end"""
+    delta = end - start
+    return [start + delta * np.float32(fraction) for fraction in fractions]
+
+
+class AdaptiveFrameScheduler:
+    """
+    Decide per frame whether pose inference has to run
+
+    Each frame is reduced to a small greyscale thumbnail and compared with the
+    thumbnail of the last keyframe (the last frame that ran inference). The
+    frame is skipped when the scene has barely changed, the landmark velocity
+    measured between the last two keyframes predicts little drift, and fewer
+    than `keyframe_interval` frames have passed since the last keyframe.
+    Skipped frames get the keyframe landmarks extrapolated along that velocity.
+    """
+
+    def __init__(self, keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL,
+                 motion_threshold: float = DEFAULT_MOTION_THRESHOLD, max_drift: float = DEFAULT_MAX_DRIFT):
+        if keyframe_interval < 1:
+            raise ValueError("keyframe_interval must be at least 1")
+
+        self.keyframe_interval = keyframe_interval
+        self.motion_threshold = motion_threshold
+        self.max_drift = max_drift
+
+        self.keyframes = 0
+        self.skipped_frames = 0
+        self.reset()
+
+    def reset(self):
+        """Forget the last keyframe so the next frame runs inference"""
+        self._thumbnail: Optional[np.ndarray] = None
+        self._candidate: Optional[np.ndarray] = None
+        self._keypoints: Optional[np.ndarray] = None
+        self._velocity: Optional[np.ndarray] = None
+        self._since_keyframe = 0
+        self.last_motion = 0.0
+
+    def should_infer(self, frame: np.ndarray, force: bool = False) -> bool:
+        """
+        Measure the change since the last keyframe and decide whether to run inference
+
+        Returning True obliges the caller to report the outcome with `keyframe()`.
+        """
+        thumbnail = frame_thumbnail(frame)
+        self._candidate = thumbnail
+
+        if force or self._thumbnail is None or self._thumbnail.shape != thumbnail.shape:
+            self.last_motion = 0.0
+            return True
+
+        self.last_motion = float(cv2.absdiff(thumbnail, self._thumbnail).mean())
+        if self._since_keyframe + 1 >= self.keyframe_interval or self.last_motion > self.motion_threshold:
+            return True
+
+        if self._velocity is not None:
+            diagonal = float(np.hypot(frame.shape[0], frame.shape[1]))
+            speed = float(np.abs(self._velocity[:, :2]).max())
+            if speed * (self._since_keyframe + 1) > self.max_drift * diagonal:
+                return True
+
+        self._since_keyframe += 1
+        self.skipped_frames += 1
+        return False
+
+    def keyframe(self, keypoint_array: Optional[np.ndarray]):
+        """Record the landmarks (or None when nobody was detected) of a frame that ran inference"""
+        if keypoint_array is not None and self._keypoints is not None:
+            self._velocity = (keypoint_array - self._keypoints) / np.float32(self._since_keyframe + 1)
+            # Visibility is carried over rather than extrapolated
+            self._velocity[:, 3] = 0.0
+        else:
+            self._velocity = None
+
+        self._thumbnail = self._candidate
+        self._keypoints = None if keypoint_array is None else keypoint_array.copy()
+        self._since_keyframe = 0
+        self.keyframes += 1
+
+    def predict_keypoints(self) -> Optional[np.ndarray]:
+        """Keyframe landmarks extrapolated to the current skipped frame"""
+        if self._keypoints is None:
+            return None
+        if self._velocity is None:
+            return self._keypoints.copy()
+        return self._keypoints + self._velocity * np.float32(self._since_keyframe)
+
+    def info(self, skipped: bool) -> Dict:
+        """Per-frame scheduling details attached to results"""
+        return {
+            'skipped': skipped,
+            'motion': round(self.last_motion, 3),
+            'frames_since_keyframe': self._since_keyframe
+        }
+
+    def stats(self) -> Dict:
+        total = self.keyframes + self.skipped_frames
+        return {
+            'keyframes': self.keyframes,
+            'skipped_frames': self.skipped_frames,
+            'skip_rate': round(self.skipped_frames / total, 4) if total else 0.0
+        }
+
+
+class KeyframeInterpolator:
+    """
+    Replace extrapolated landmarks of skipped frames with interpolated ones
+
+    For offline analysis, skipped frames are held back (at most one keyframe
+    interval's worth) until the next keyframe arrives, then get landmarks
+    interpolated between the keyframes on either side of them.
+    """
+
+    def __init__(self):
+        self._previous: Optional[Tuple[int, Optional[np.ndarray]]] = None
+        self._held: List[Tuple[int, float, Optional[np.ndarray]]] = []
+
+    def add(self, index: int, timestamp: float, keypoints: Optional[np.ndarray],
+            skipped: bool) -> List[Tuple[int, float, Optional[np.ndarray]]]:
+        """Feed one frame in order; returns the frames that are now final"""
+        if skipped:
+            self._held.append((index, timestamp, keypoints))
+            return []
+
+        ready = self._held
+        self._held = []
+        if ready and self._previous is not None and self._previous[1] is not None and keypoints is not None:
+            start_index, start = self._previous
+            span = float(index - start_index)
+            interpolated = interpolate_keypoints(start, keypoints, [(i - start_index) / span for i, _, _ in ready])
+            ready = [(i, t, points) for (i, t, _), points in zip(ready, interpolated)]
+
+        self._previous = (index, keypoints)
+        ready.append((index, timestamp, keypoints))
+        return ready
+
+    def flush(self) -> List[Tuple[int, float, Optional[np.ndarray]]]:
+        """Frames still held after the last keyframe keep their extrapolated landmarks"""
+        ready = self._held
+        self._held = []
+        return ready
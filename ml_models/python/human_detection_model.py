@@ -1,39 +1,65 @@
-import tensorflow as tf
 import cv2
 import numpy as np
-import mediapipe as mp
-from typing import List, Tuple, Dict, Optional
-import json
+from typing import TYPE_CHECKING, List, Tuple, Dict, Optional
 import os
 
+from timing import StageTimer
+from landmark_arrays import landmark_array, landmark_arrays, to_pixels, as_landmark_array, visibility
+from frame_scheduler import AdaptiveFrameScheduler
+from roi_tracking import ROITracker, RegionOfInterest
+from quality_controller import resolve_quality_tier, downscale_frame, DEFAULT_QUALITY_TIER
+from rep_counting import RepCounter
+from form_rules import form_issues, form_recommendations, form_scores, symmetry_scores
+from pose_features import PoseFeatures, FeatureExtractor, compute_pose_features, POSE_LANDMARK_COUNT
+
+# MediaPipe is imported when the first detector is created and TensorFlow only
+# for the custom model helpers, so importing this module stays cheap
+if TYPE_CHECKING:
+    import tensorflow as tf
+
+# Analysis profiles: each one runs exactly one MediaPipe graph per frame
+#   pose_only  - Pose graph (33 body landmarks + segmentation)
+#   pose+hands - Holistic graph without iris refinement, face output dropped.
+#                Holistic still runs its 468-point face mesh internally, so this
+#                only saves the iris model, not the face landmark pass
+#   holistic   - Holistic graph with refined face landmarks (468 + 10 iris points)
+ANALYSIS_PROFILES = ('pose_only', 'pose+hands', 'holistic')
+DEFAULT_ANALYSIS_PROFILE = 'holistic'
+
+NOT_VISIBLE_RECOMMENDATION = "Ensure you are visible in the camera frame"
+
 class HumanDetectionModel:
     """
     Advanced Human Detection Model using MediaPipe and TensorFlow
     """
     
-    def __init__(self, model_path: str = None):
+    def __init__(self, model_path: str = None, analysis_profile: str = DEFAULT_ANALYSIS_PROFILE):
+        if analysis_profile not in ANALYSIS_PROFILES:
+            raise ValueError(f"Unknown analysis profile '{analysis_profile}'. Expected one of {ANALYSIS_PROFILES}")
+        
+        import mediapipe as mp
+        
         self.mp_pose = mp.solutions.pose
         self.mp_drawing = mp.solutions.drawing_utils
         self.mp_holistic = mp.solutions.holistic
         
-        # Initialize pose detection
-        self.pose = self.mp_pose.Pose(
-            static_image_mode=False,
-            model_complexity=1,
-            enable_segmentation=True,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        )
+        # MediaPipe graphs keyed by analysis profile and quality settings, built
+        # on first use (warm_up builds one ahead of the first frame)
+        self.analysis_profile = analysis_profile
+        self._graphs = {}
+        self._quality_tier = DEFAULT_QUALITY_TIER
         
-        # Initialize holistic detection (face, pose, hands)
-        self.holistic = self.mp_holistic.Holistic(
-            static_image_mode=False,
-            model_complexity=1,
-            enable_segmentation=True,
-            refine_face_landmarks=True,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        )
+        # Adaptive frame skipping state (used when process_video_frame is called with adaptive=True)
+        self.frame_scheduler = AdaptiveFrameScheduler()
+        self._keyframe = None
+        
+        # Crop window for the next frame (used when process_video_frame is called with roi=True)
+        self.roi_tracker = ROITracker()
+        
+        # Features shared by the classifier, form rules and rep counter, plus
+        # rep / phase tracking over the session's pose stream
+        self.feature_extractor = FeatureExtractor()
+        self.rep_counter = RepCounter()
         
         # Custom TensorFlow model for exercise classification
         self.exercise_model = None
@@ -42,6 +68,88 @@ class HumanDetectionModel:
         if model_path and os.path.exists(model_path):
             self.load_custom_model(model_path)
     
+    @property
+    def pose(self):
+        """MediaPipe Pose graph"""
+        return self._get_graph('pose_only')
+    
+    @property
+    def holistic(self):
+        """MediaPipe Holistic graph (face, pose, hands)"""
+        return self._get_graph('holistic')
+    
+    def warm_up(self, profile: Optional[str] = None):
+        """Build the graph of an analysis profile (default: the detector's) at the default quality tier"""
+        self._get_graph(profile or self.analysis_profile)
+    
+    def _get_graph(self, profile: str, quality: Optional[Dict] = None):
+        """
+        Return the MediaPipe graph backing an analysis profile, creating it if needed
+        
+        `quality` is a quality tier (see quality_controller); its segmentation
+        and model complexity settings select the graph variant.
+        """
+        if profile not in ANALYSIS_PROFILES:
+            raise ValueError(f"Unknown analysis profile '{profile}'. Expected one of {ANALYSIS_PROFILES}")
+        quality = quality or resolve_quality_tier(DEFAULT_QUALITY_TIER)
+        
+        key = (profile, quality['model_complexity'], quality['segmentation'])
+        graph = self._graphs.get(key)
+        if graph is not None:
+            return graph
+        
+        try:
+            graph = self._build_graph(profile, quality['model_complexity'], quality['segmentation'])
+        except Exception as e:
+            if quality['model_complexity'] == 1:
+                raise
+            # MediaPipe downloads the lite landmark model on first use; offline
+            # servers keep the full model for this tier instead of failing requests
+            print(f"Pose model complexity {quality['model_complexity']} unavailable ({e}); using complexity 1")
+            graph = self._get_graph(profile, dict(quality, model_complexity=1))
+        
+        self._graphs[key] = graph
+        return graph
+    
+    def _build_graph(self, profile: str, model_complexity: int, segmentation: bool):
+        """Create the MediaPipe Pose or Holistic graph for an analysis profile"""
+        if profile == 'pose_only':
+            return self.mp_pose.Pose(
+                static_image_mode=False,
+                model_complexity=model_complexity,
+                enable_segmentation=segmentation,
+                min_detection_confidence=0.5,
+                min_tracking_confidence=0.5
+            )
+        return self.mp_holistic.Holistic(
+            static_image_mode=False,
+            model_complexity=model_complexity,
+            enable_segmentation=segmentation,
+            # Only drops the iris model: Holistic always runs the face mesh
+            refine_face_landmarks=(profile == 'holistic'),
+            min_detection_confidence=0.5,
+            min_tracking_confidence=0.5
+        )
+    
+    def reset(self):
+        """
+        Clear temporal tracking state so the detector can serve a new athlete
+        """
+        for graph in self._graphs.values():
+            graph.reset()
+        self.frame_scheduler.reset()
+        self._keyframe = None
+        self.roi_tracker.reset()
+        self.feature_extractor.reset()
+        self.rep_counter.reset()
+    
+    def close(self):
+        """Release the MediaPipe graphs"""
+        # A quality tier may share another tier's graph
+        for graph in set(self._graphs.values()):
+            graph.close()
+        self._graphs = {}
+    
     def detect_human_pose(self, frame: np.ndarray) -> Dict:
         """
         Detect human pose and return keypoints, bounding box, and confidence
@@ -52,6 +160,32 @@ class HumanDetectionModel:
         # Process the frame
         results = self.pose.process(rgb_frame)
         
+        return self._build_pose_result(results, frame.shape)
+    
+    def _build_pose_result(self, results, frame_shape: Tuple[int, ...],
+                           region: Optional[RegionOfInterest] = None,
+                           input_shape: Optional[Tuple[int, ...]] = None) -> Dict:
+        """
+        Build the pose detection result from the output of a Pose or Holistic graph
+        
+        `region` is the crop window the graph ran on, if any; landmarks and the
+        segmentation mask are mapped back to the (possibly downscaled) input
+        frame of shape `input_shape`. Keypoints are in `frame_shape` pixels.
+        """
+        input_shape = input_shape or frame_shape
+        pose = landmark_array(results.pose_landmarks)
+        segmentation_mask = results.segmentation_mask
+        if region is not None:
+            pose = region.to_frame(pose, input_shape)
+            segmentation_mask = region.paste_mask(segmentation_mask, input_shape)
+        # (33, 4) float32 array of pixel x, y plus z and visibility
+        keypoint_array = to_pixels(pose, frame_shape) if pose is not None else None
+        return self._pose_result_from_keypoints(keypoint_array, segmentation_mask)
+    
+    def _pose_result_from_keypoints(self, keypoint_array: Optional[np.ndarray], segmentation_mask) -> Dict:
+        """
+        Build the pose detection result from a (33, 4) pixel keypoint array (None when nobody was detected)
+        """
         detection_result = {
             'is_human_detected': False,
             'keypoints': [],
@@ -61,47 +195,34 @@ class HumanDetectionModel:
             'segmentation_mask': None
         }
         
-        if results.pose_landmarks:
+        if keypoint_array is not None:
             detection_result['is_human_detected'] = True
             detection_result['confidence'] = 0.9  # MediaPipe doesn't provide confidence directly
             
-            # Extract keypoints
-            h, w, _ = frame.shape
-            keypoints = []
-            landmarks = []
-            
-            for landmark in results.pose_landmarks.landmark:
-                x = int(landmark.x * w)
-                y = int(landmark.y * h)
-                z = landmark.z
-                visibility = landmark.visibility
-                
-                keypoints.append({
-                    'x': x, 'y': y, 'z': z, 'visibility': visibility
-                })
-                landmarks.append([x, y, z])
+            # The keypoints, landmarks and bounding box are all derived from the array
+            detection_result['keypoint_array'] = keypoint_array
             
-            detection_result['keypoints'] = keypoints
-            detection_result['landmarks'] = landmarks
+            xy = keypoint_array[:, :2].astype(np.int32)
+            pixel_xy = xy.tolist()
+            zv = keypoint_array[:, 2:].tolist()
+            detection_result['keypoints'] = [
+                {'x': x, 'y': y, 'z': z, 'visibility': v} for (x, y), (z, v) in zip(pixel_xy, zv)
+            ]
+            detection_result['landmarks'] = [[x, y, z] for (x, y), (z, _) in zip(pixel_xy, zv)]
             
             # Calculate bounding box
-            if landmarks:
-                landmarks_array = np.array(landmarks)
-                x_min = int(np.min(landmarks_array[:, 0]))
-                y_min = int(np.min(landmarks_array[:, 1]))
-                x_max = int(np.max(landmarks_array[:, 0]))
-                y_max = int(np.max(landmarks_array[:, 1]))
-                
-                detection_result['bounding_box'] = {
-                    'x': x_min,
-                    'y': y_min,
-                    'width': x_max - x_min,
-                    'height': y_max - y_min
-                }
+            x_min, y_min = xy.min(axis=0).tolist()
+            x_max, y_max = xy.max(axis=0).tolist()
+            detection_result['bounding_box'] = {
+                'x': x_min,
+                'y': y_min,
+                'width': x_max - x_min,
+                'height': y_max - y_min
+            }
             
             # Get segmentation mask
-            if results.segmentation_mask is not None:
-                detection_result['segmentation_mask'] = results.segmentation_mask
+            if segmentation_mask is not None:
+                detection_result['segmentation_mask'] = segmentation_mask
         
         return detection_result
     
@@ -112,172 +233,115 @@ class HumanDetectionModel:
         rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
         results = self.holistic.process(rgb_frame)
         
+        return self._build_holistic_result(results, 'holistic')
+    
+    def _build_holistic_result(self, results, profile: str, region: Optional[RegionOfInterest] = None,
+                               frame_shape: Optional[Tuple[int, ...]] = None) -> Dict:
+        """
+        Build the holistic detection result for the given analysis profile
+        """
+        if profile == 'pose_only':
+            return {}
+        
+        # One (N, 4) float32 array (x, y, z, visibility) per body part
+        parts = ['pose', 'pose_world', 'left_hand', 'right_hand']
+        if profile == 'holistic':
+            parts.append('face')
+        arrays = landmark_arrays(results, parts)
+        if region is not None:
+            for part in parts:
+                # World landmarks are metric and do not depend on the crop
+                if part != 'pose_world':
+                    arrays[part] = region.to_frame(arrays[part], frame_shape)
+        
         holistic_result = {
-            'pose_landmarks': results.pose_landmarks,
-            'face_landmarks': results.face_landmarks,
-            'left_hand_landmarks': results.left_hand_landmarks,
-            'right_hand_landmarks': results.right_hand_landmarks,
-            'pose_world_landmarks': results.pose_world_landmarks,
-            'face_landmarks_world': results.face_landmarks_world
+            'pose_landmarks': arrays['pose'],
+            'face_landmarks': arrays.get('face'),
+            'left_hand_landmarks': arrays['left_hand'],
+            'right_hand_landmarks': arrays['right_hand'],
+            'pose_world_landmarks': arrays['pose_world'],
+            'face_landmarks_world': None
         }
         
         return holistic_result
     
-    def classify_exercise(self, landmarks: List[List[float]], exercise_type: str) -> Dict:
+    def classify_exercise(self, landmarks: List[List[float]], exercise_type: str,
+                          features: Optional[PoseFeatures] = None) -> Dict:
         """
         Classify the type of exercise being performed
+        
+        `features` are the pose's cached features (see pose_features); they are
+        computed from the landmarks when not given.
         """
         if not self.exercise_model:
             return {'exercise': 'unknown', 'confidence': 0.0, 'form_score': 0.0}
         
-        # Preprocess landmarks for the model
-        processed_landmarks = self.preprocess_landmarks(landmarks)
-        
-        # Make prediction
-        prediction = self.exercise_model.predict(processed_landmarks.reshape(1, -1))
+        features = features or self.pose_features(landmarks)
+        if features is None:
+            return {'exercise': 'unknown', 'confidence': 0.0, 'form_score': 0.0,
+                    'recommendations': [NOT_VISIBLE_RECOMMENDATION], 'form_issues': []}
         
-        # Calculate form score based on keypoint visibility and positioning
-        form_score = self.calculate_form_score(landmarks)
+        # Make prediction on the shared feature vector
+        prediction = self.exercise_model.predict(features.vector.reshape(1, -1))
         
         return {
             'exercise': exercise_type,
             'confidence': float(prediction[0][0]),
-            'form_score': form_score,
-            'recommendations': self.get_form_recommendations(landmarks, exercise_type)
+            'form_score': self.calculate_form_score(landmarks, features),
+            'recommendations': self.get_form_recommendations(landmarks, exercise_type, features),
+            'form_issues': form_issues(features, exercise_type)
         }
     
+    def pose_features(self, landmarks: List[List[float]]) -> Optional[PoseFeatures]:
+        """Features of a 33-point pose in normalized (0-1) coordinates (None for partial landmark lists)"""
+        landmarks = as_landmark_array(landmarks)
+        if len(landmarks) != POSE_LANDMARK_COUNT:
+            return None
+        return compute_pose_features(landmarks)
+    
     def preprocess_landmarks(self, landmarks: List[List[float]]) -> np.ndarray:
         """
-        Preprocess landmarks for model input
+        Preprocess landmarks for model input (the shared pose feature vector)
         """
-        # Flatten landmarks and normalize
-        flat_landmarks = np.array(landmarks).flatten()
-        
-        # Normalize to 0-1 range
-        if len(flat_landmarks) > 0:
-            flat_landmarks = (flat_landmarks - np.min(flat_landmarks)) / (np.max(flat_landmarks) - np.min(flat_landmarks))
-        
-        return flat_landmarks
+        features = self.pose_features(landmarks)
+        if features is None:
+            raise ValueError(f"Expected {POSE_LANDMARK_COUNT} pose landmarks")
+        return features.vector
     
-    def calculate_form_score(self, landmarks: List[List[float]]) -> float:
+    def calculate_form_score(self, landmarks: List[List[float]], features: Optional[PoseFeatures] = None) -> float:
         """
-        Calculate form score based on pose analysis
+        Calculate form score based on pose analysis (see form_rules.form_scores)
         """
-        if not landmarks or len(landmarks) < 10:
+        features = features or self.pose_features(landmarks)
+        if features is None:
             return 0.0
-        
-        # Simple form scoring based on keypoint visibility and symmetry
-        visible_points = sum(1 for landmark in landmarks if landmark[2] > 0.5)  # z > 0.5 indicates visibility
-        total_points = len(landmarks)
-        
-        visibility_score = visible_points / total_points if total_points > 0 else 0
-        
-        # Add symmetry analysis for certain exercises
-        symmetry_score = self.analyze_symmetry(landmarks)
-        
-        # Combine scores
-        form_score = (visibility_score * 0.7) + (symmetry_score * 0.3)
-        
-        return min(form_score, 1.0)
+        return float(form_scores(PoseFeatures.stack([features]))[0])
     
-    def analyze_symmetry(self, landmarks: List[List[float]]) -> float:
+    def analyze_symmetry(self, landmarks: List[List[float]], features: Optional[PoseFeatures] = None) -> float:
         """
         Analyze pose symmetry for form evaluation
         """
-        if len(landmarks) < 10:
+        features = features or self.pose_features(landmarks)
+        if features is None:
             return 0.0
-        
-        # Define left and right side keypoints (MediaPipe pose model)
-        left_side = [11, 13, 15, 23, 25, 27]  # Left arm and leg
-        right_side = [12, 14, 16, 24, 26, 28]  # Right arm and leg
-        
-        symmetry_scores = []
-        
-        for left_idx, right_idx in zip(left_side, right_side):
-            if left_idx < len(landmarks) and right_idx < len(landmarks):
-                left_point = landmarks[left_idx]
-                right_point = landmarks[right_idx]
-                
-                # Calculate horizontal symmetry
-                if left_point[2] > 0.5 and right_point[2] > 0.5:  # Both points visible
-                    y_diff = abs(left_point[1] - right_point[1])
-                    symmetry_scores.append(1.0 - min(y_diff / 100, 1.0))  # Normalize by 100 pixels
-        
-        return np.mean(symmetry_scores) if symmetry_scores else 0.0
+        return float(symmetry_scores(PoseFeatures.stack([features]))[0])
     
-    def get_form_recommendations(self, landmarks: List[List[float]], exercise_type: str) -> List[str]:
+    def get_form_recommendations(self, landmarks: List[List[float]], exercise_type: str,
+                                 features: Optional[PoseFeatures] = None) -> List[str]:
         """
-        Get form recommendations based on pose analysis
+        Get form recommendations from the exercise's rules in form_rules.FORM_RULES
         """
-        recommendations = []
-        
-        if not landmarks or len(landmarks) < 10:
-            return ["Ensure you are visible in the camera frame"]
-        
-        # Exercise-specific recommendations
-        if exercise_type.lower() == 'pushup':
-            recommendations.extend(self.analyze_pushup_form(landmarks))
-        elif exercise_type.lower() == 'squat':
-            recommendations.extend(self.analyze_squat_form(landmarks))
-        elif exercise_type.lower() == 'plank':
-            recommendations.extend(self.analyze_plank_form(landmarks))
-        
-        return recommendations
+        features = features or self.pose_features(landmarks)
+        if features is None:
+            return [NOT_VISIBLE_RECOMMENDATION]
+        return form_recommendations(PoseFeatures.stack([features]), exercise_type)[0]
     
-    def analyze_pushup_form(self, landmarks: List[List[float]]) -> List[str]:
-        """Analyze pushup form and provide recommendations"""
-        recommendations = []
-        
-        # Check shoulder alignment
-        if len(landmarks) > 11:
-            left_shoulder = landmarks[11]
-            right_shoulder = landmarks[12]
-            
-            if abs(left_shoulder[1] - right_shoulder[1]) > 20:
-                recommendations.append("Keep your shoulders level")
-        
-        # Check body alignment
-        if len(landmarks) > 11 and len(landmarks) > 23:
-            shoulder = landmarks[11]
-            hip = landmarks[23]
-            
-            if abs(shoulder[0] - hip[0]) > 30:
-                recommendations.append("Keep your body in a straight line")
-        
-        return recommendations
-    
-    def analyze_squat_form(self, landmarks: List[List[float]]) -> List[str]:
-        """Analyze squat form and provide recommendations"""
-        recommendations = []
-        
-        # Check knee alignment
-        if len(landmarks) > 25 and len(landmarks) > 26:
-            left_knee = landmarks[25]
-            right_knee = landmarks[26]
-            
-            if abs(left_knee[0] - right_knee[0]) > 50:
-                recommendations.append("Keep your knees aligned with your feet")
-        
-        return recommendations
-    
-    def analyze_plank_form(self, landmarks: List[List[float]]) -> List[str]:
-        """Analyze plank form and provide recommendations"""
-        recommendations = []
-        
-        # Check body alignment
-        if len(landmarks) > 11 and len(landmarks) > 23:
-            shoulder = landmarks[11]
-            hip = landmarks[23]
-            
-            if abs(shoulder[1] - hip[1]) > 30:
-                recommendations.append("Keep your body in a straight line from head to heels")
-        
-        return recommendations
-    
-    def create_custom_model(self, input_shape: int, num_classes: int) -> tf.keras.Model:
+    def create_custom_model(self, input_shape: int, num_classes: int) -> 'tf.keras.Model':
         """
         Create a custom TensorFlow model for exercise classification
         """
+        import tensorflow as tf
+        
         model = tf.keras.Sequential([
             tf.keras.layers.Dense(128, activation='relu', input_shape=(input_shape,)),
             tf.keras.layers.Dropout(0.3),
@@ -298,6 +362,8 @@ class HumanDetectionModel:
     def load_custom_model(self, model_path: str):
         """Load a pre-trained custom model"""
         try:
+            import tensorflow as tf
+            
             self.exercise_model = tf.keras.models.load_model(model_path)
             print(f"Custom model loaded from {model_path}")
         except Exception as e:
@@ -316,44 +382,202 @@ class HumanDetectionModel:
         annotated_frame = frame.copy()
         
         # Draw keypoints
-        for landmark in landmarks:
-            if landmark[2] > 0.5:  # Only draw visible points
-                cv2.circle(annotated_frame, (int(landmark[0]), int(landmark[1])), 5, (0, 255, 0), -1)
+        landmarks = as_landmark_array(landmarks)
+        for x, y in landmarks[visibility(landmarks) > 0.5, :2].astype(int).tolist():  # Only draw visible points
+            cv2.circle(annotated_frame, (x, y), 5, (0, 255, 0), -1)
         
         return annotated_frame
     
-    def process_video_frame(self, frame: np.ndarray, exercise_type: str = "general") -> Dict:
+    def process_video_frame(self, frame: np.ndarray, exercise_type: str = "general",
+                            analysis_profile: Optional[str] = None, adaptive: bool = False,
+                            roi: bool = False, quality_tier: Optional[str] = None) -> Dict:
         """
         Process a single video frame and return comprehensive analysis
-        """
-        # Detect pose
-        pose_result = self.detect_human_pose(frame)
         
-        # Detect holistic features
-        holistic_result = self.detect_holistic(frame)
-        
-        # Classify exercise if landmarks are available
-        exercise_result = {}
-        if pose_result['landmarks']:
-            exercise_result = self.classify_exercise(pose_result['landmarks'], exercise_type)
+        A single MediaPipe graph (selected by the analysis profile) runs once per
+        frame; keypoints, bounding box and form analysis are all derived from it.
+        With `adaptive`, the frame scheduler may skip the graph on near-static
+        frames, which then reuse the last keyframe's (extrapolated) landmarks.
+        With `roi`, the graph runs on a downscaled crop around the previous
+        frame's pose; if the pose is lost inside the crop the frame is retried whole.
+        `quality_tier` (see quality_controller) may downscale the frame and pick
+        a cheaper graph; keypoints are always in the received frame's pixels.
+        `reps` carries the session's rep count, phase and tempo (see rep_counting)
+        for exercises the rep engine knows, and is None for the others.
+        """
+        profile = analysis_profile or self.analysis_profile
+        quality = resolve_quality_tier(quality_tier)
+        graph = self._get_graph(profile, quality)
+        timer = StageTimer()
+        
+        if quality['name'] != self._quality_tier:
+            # A new input size or graph variant: restart tracking from scratch
+            for session_graph in self._graphs.values():
+                session_graph.reset()
+            self.roi_tracker.reset()
+            self._quality_tier = quality['name']
+        
+        if adaptive:
+            with timer.stage('schedule'):
+                keyframe_profile = self._keyframe['analysis_profile'] if self._keyframe else None
+                run_inference = self.frame_scheduler.should_infer(frame, force=keyframe_profile != profile)
+            if not run_inference:
+                result = self._skipped_frame_result(exercise_type, profile, frame.shape, timer)
+                result['quality_tier'] = quality['name']
+                return result
+        elif self._keyframe is not None:
+            # Frames processed without the scheduler invalidate its keyframe
+            self.frame_scheduler.reset()
+            self._keyframe = None
+        
+        if roi != self.roi_tracker.active:
+            # ROI mode feeds the graphs fixed-size images; their smoothing state
+            # cannot carry over a change of input size
+            for session_graph in self._graphs.values():
+                session_graph.reset()
+            self.roi_tracker.reset()
+            self.roi_tracker.active = roi
+        
+        # Everything up to the landmarks works on the (possibly downscaled) input
+        with timer.stage('preprocess'):
+            source = downscale_frame(frame, quality['max_side'])
+        
+        region = self.roi_tracker.region_for(source.shape) if roi else None
+        
+        results = self._run_graph(graph, source, region, timer)
+        if region is not None and not region.full_frame:
+            pose = landmark_array(results.pose_landmarks)
+            if pose is None:
+                # Tracking lost inside the crop window: fall back to the full frame
+                self.roi_tracker.tracking_lost()
+            elif region.clips(pose):
+                # The pose outgrew the window: retry with one fitted to the clipped pose
+                self.roi_tracker.outgrown(to_pixels(region.to_frame(pose, source.shape), source.shape), source.shape)
+            if pose is None or region.clips(pose):
+                region = self.roi_tracker.region_for(source.shape)
+                results = self._run_graph(graph, source, region, timer)
+        if roi:
+            self.roi_tracker.processed(region)
+        
+        with timer.stage('landmarks'):
+            pose_result = self._build_pose_result(results, frame.shape, region, source.shape)
+            holistic_result = self._build_holistic_result(results, profile, region, source.shape)
+        
+        if roi:
+            pose = landmark_array(results.pose_landmarks)
+            if pose is not None and region is not None:
+                pose = region.to_frame(pose, source.shape)
+            self.roi_tracker.update(to_pixels(pose, source.shape) if pose is not None else None, source.shape)
+        
+        # Classify exercise and count reps if landmarks are available
+        exercise_result, reps, timestamp = self._analyze_pose(pose_result, exercise_type, frame.shape, timer)
         
         # Combine results
         result = {
             'pose_detection': pose_result,
             'holistic_detection': holistic_result,
             'exercise_classification': exercise_result,
-            'timestamp': cv2.getTickCount() / cv2.getTickFrequency()
+            'reps': reps,
+            'analysis_profile': profile,
+            'quality_tier': quality['name'],
+            'timings_ms': timer.as_dict(),
+            'timestamp': timestamp
         }
         
+        if roi:
+            result['roi'] = region.as_dict()
+        
+        if adaptive:
+            self.frame_scheduler.keyframe(pose_result.get('keypoint_array'))
+            self._keyframe = {
+                'analysis_profile': profile,
+                'segmentation_mask': pose_result['segmentation_mask'],
+                'holistic_detection': holistic_result
+            }
+            result['frame_skipping'] = self.frame_scheduler.info(skipped=False)
+        
         return result
+    
+    def _run_graph(self, graph, frame: np.ndarray, region: Optional[RegionOfInterest], timer: StageTimer):
+        """Run a MediaPipe graph on the frame, or on its crop window when given one"""
+        if region is not None and region is not self.roi_tracker.last_region:
+            # The graph tracks landmarks in input-image coordinates, which a new
+            # window invalidates; re-detect instead of tracking from stale positions
+            graph.reset()
+        
+        with timer.stage('preprocess'):
+            source = region.crop(frame) if region is not None else frame
+            rgb_frame = cv2.cvtColor(source, cv2.COLOR_BGR2RGB)
+            # Lets MediaPipe take the frame by reference instead of copying it
+            rgb_frame.flags.writeable = False
+        
+        with timer.stage('inference'):
+            return graph.process(rgb_frame)
+    
+    def _analyze_pose(self, pose_result: Dict, exercise_type: str, frame_shape: Tuple[int, ...],
+                      timer: StageTimer) -> Tuple[Dict, Optional[Dict], float]:
+        """
+        Compute the pose's features once and run form analysis and rep counting on them
+        
+        The features are cached on the pose result (`features`) so later
+        consumers, such as the exercise classifier, reuse them. Returns the
+        form analysis, rep state and the frame's timestamp.
+        """
+        timestamp = cv2.getTickCount() / cv2.getTickFrequency()
+        with timer.stage('features'):
+            features = self.feature_extractor.extract(pose_result.get('keypoint_array'), timestamp, frame_shape)
+        
+        exercise_result = {}
+        if features is not None:
+            pose_result['features'] = features
+            with timer.stage('form_analysis'):
+                exercise_result = self.classify_exercise(pose_result['keypoint_array'], exercise_type, features)
+        
+        with timer.stage('reps'):
+            reps = self.rep_counter.update(features, exercise_type, timestamp)
+        return exercise_result, reps, timestamp
+    
+    def _skipped_frame_result(self, exercise_type: str, profile: str, frame_shape: Tuple[int, ...],
+                              timer: StageTimer) -> Dict:
+        """
+        Result for a frame the scheduler skipped: extrapolated keyframe landmarks
+        with the keyframe's segmentation mask and holistic features
+        """
+        with timer.stage('landmarks'):
+            pose_result = self._pose_result_from_keypoints(
+                self.frame_scheduler.predict_keypoints(), self._keyframe['segmentation_mask']
+            )
+        
+        exercise_result, reps, timestamp = self._analyze_pose(pose_result, exercise_type, frame_shape, timer)
+        
+        return {
+            'pose_detection': pose_result,
+            'holistic_detection': self._keyframe['holistic_detection'],
+            'exercise_classification': exercise_result,
+            'reps': reps,
+            'analysis_profile': profile,
+            'timings_ms': timer.as_dict(),
+            'timestamp': timestamp,
+            'frame_skipping': self.frame_scheduler.info(skipped=True)
+        }
 
 # Example usage and testing
 if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Run human detection on the webcam")
+    parser.add_argument('--profile', choices=ANALYSIS_PROFILES, default=DEFAULT_ANALYSIS_PROFILE,
+                        help="Analysis profile (which MediaPipe graph runs per frame)")
+    args = parser.parse_args()
+    
     # Initialize the model
-    detector = HumanDetectionModel()
+    detector = HumanDetectionModel(analysis_profile=args.profile)
+    detector.warm_up()
     
     # Test with webcam
     cap = cv2.VideoCapture(0)
+    stage_totals = {}
+    frame_count = 0
     
     while True:
         ret, frame = cap.read()
@@ -363,6 +587,14 @@ if __name__ == "__main__":
         # Process frame
         result = detector.process_video_frame(frame, "pushup")
         
+        # Report the mean per-stage timings every 30 frames
+        frame_count += 1
+        for stage, ms in result['timings_ms'].items():
+            stage_totals[stage] = stage_totals.get(stage, 0.0) + ms
+        if frame_count % 30 == 0:
+            summary = ", ".join(f"{stage}={total / frame_count:.1f}ms" for stage, total in stage_totals.items())
+            print(f"[{args.profile}] {summary}")
+        
         # Draw results
         if result['pose_detection']['landmarks']:
             frame = detector.draw_pose_landmarks(frame, result['pose_detection']['landmarks'])
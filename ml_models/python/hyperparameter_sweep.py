@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Hyperparameter sweep with k-fold cross-validation for the exercise classifier
+
+Every configuration of a parameter grid (layer widths, dropout, learning
+rate, batch size) is trained on each of k stratified folds. Trials run in
+parallel worker processes, each pinned to its own CPUs with TensorFlow
+limited to that many threads, so trials never compete for cores. The
+per-configuration results table is written as CSV, and the best
+configuration is retrained on the full data and saved through
+save_model_and_preprocessors.
+"""
+
+import itertools
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Grid searched by default: every combination is one configuration
+DEFAULT_SWEEP_GRID = {
+    'hidden_units': [[256, 128, 64, 32], [128, 64, 32], [512, 256, 128]],
+    'dropout': [0.2, 0.3],
+    'learning_rate': [0.001, 0.003],
+    'batch_size': [32, 128]
+}
+# Grid keys that are create_model arguments (the rest are fit settings)
+MODEL_PARAMETERS = ('hidden_units', 'dropout', 'learning_rate')
+
+DEFAULT_FOLDS = 5
+DEFAULT_SWEEP_EPOCHS = 30
+DEFAULT_THREADS_PER_WORKER = 1
+
+# Set once per worker process by _init_worker
+_worker_data: Optional[Dict] = None
+
+
+def expand_grid(grid: Dict[str, Sequence]) -> List[Dict]:
+    """Every combination of a parameter grid, in a stable order"""
+    unknown = set(grid) - set(MODEL_PARAMETERS) - {'batch_size'}
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters {sorted(unknown)}. "
+                         f"Expected {list(MODEL_PARAMETERS) + ['batch_size']}")
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def available_cpus() -> List[int]:
+    """CPUs this process may run on"""
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def cpu_slots(workers: int, threads_per_worker: int) -> List[List[int]]:
+    """CPU sets of `threads_per_worker` CPUs, one per worker; disjoint unless there are more workers than CPUs"""
+    cpus = available_cpus()
+    return [
+        [cpus[(worker * threads_per_worker + i) % len(cpus)] for i in range(threads_per_worker)]
+        for worker in range(workers)
+    ]
+
+
+def _init_worker(slots, threads: int, data_dir: str):
+    """
+    Pin this worker to the next free CPU set and cap TensorFlow's thread pools
+
+    Runs before TensorFlow is imported in the (spawned) worker, so the limits
+    apply to every op it runs.
+    """
+    global _worker_data
+    cpus = slots.get()
+    if hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cpus)
+    for variable in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+        os.environ[variable] = str(threads)
+    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '2')
+
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+    # Features, labels and fold assignment are memory-mapped, not copied per worker
+    _worker_data = {
+        name: np.load(os.path.join(data_dir, f'{name}.npy'), mmap_mode='r')
+        for name in ('features', 'labels', 'folds')
+    }
+    _worker_data['scratch_dir'] = tempfile.mkdtemp(prefix='sweep-worker-', dir=data_dir)
+    _worker_data['cpus'] = cpus
+
+
+def _run_trial(config_index: int, config: Dict, fold: int, epochs: int) -> Dict:
+    """Train one configuration on one fold; returns its validation metrics"""
+    from sklearn.preprocessing import StandardScaler
+    from train_exercise_classifier import ExerciseClassifierTrainer
+
+    features, labels, folds = _worker_data['features'], _worker_data['labels'], _worker_data['folds']
+    validation = folds == fold
+    # The scaler only sees the training folds
+    scaler = StandardScaler().fit(features[~validation])
+    X_train = scaler.transform(features[~validation]).astype(np.float32)
+    X_val = scaler.transform(features[validation]).astype(np.float32)
+
+    scratch = _worker_data['scratch_dir']
+    trainer = ExerciseClassifierTrainer(data_dir=scratch, model_dir=scratch)
+    started = time.perf_counter()
+    results = trainer.train_model(
+        X_train, labels[~validation], X_val, labels[validation],
+        epochs=epochs, batch_size=config.get('batch_size', 32),
+        model_params={name: config[name] for name in MODEL_PARAMETERS if name in config}, verbose=0
+    )
+    return {
+        'config': config_index,
+        'fold': fold,
+        'val_accuracy': float(results['test_accuracy']),
+        'val_loss': float(results['test_loss']),
+        'epochs_run': len(results['history'].get('loss', [])),
+        'train_s': round(time.perf_counter() - started, 3),
+        'cpus': list(_worker_data['cpus'])
+    }
+
+
+def fold_assignment(labels: np.ndarray, folds: int, seed: int = 42) -> np.ndarray:
+    """Stratified fold number of every row"""
+    from sklearn.model_selection import StratifiedKFold
+
+    assignment = np.empty(len(labels), dtype=np.int8)
+    splitter = StratifiedKFold(n_splits=folds, shuffle=True, random_state=seed)
+    for fold, (_, validation) in enumerate(splitter.split(np.zeros(len(labels)), labels)):
+        assignment[validation] = fold
+    return assignment
+
+
+def results_table(configs: List[Dict], trials: List[Dict]):
+    """One row per configuration: its parameters and mean / std of the fold metrics, best first"""
+    import pandas as pd
+
+    trials = pd.DataFrame(trials)
+    summary = trials.groupby('config').agg(
+        val_accuracy=('val_accuracy', 'mean'),
+        val_accuracy_std=('val_accuracy', 'std'),
+        val_loss=('val_loss', 'mean'),
+        epochs_run=('epochs_run', 'mean'),
+        train_s=('train_s', 'sum'),
+        folds=('fold', 'count')
+    )
+    parameters = pd.DataFrame(
+        [{name: json.dumps(value) if isinstance(value, (list, tuple)) else value for name, value in config.items()}
+         for config in configs]
+    )
+    table = parameters.join(summary, how='inner')
+    table.index.name = 'config'
+    # Highest mean accuracy wins; lower loss breaks ties
+    return table.sort_values(['val_accuracy', 'val_loss'], ascending=[False, True])
+
+
+def run_sweep(X: np.ndarray, y: np.ndarray, grid: Dict[str, Sequence] = DEFAULT_SWEEP_GRID,
+              folds: int = DEFAULT_FOLDS, epochs: int = DEFAULT_SWEEP_EPOCHS, workers: Optional[int] = None,
+              threads_per_worker: int = DEFAULT_THREADS_PER_WORKER, seed: int = 42) -> Tuple:
+    """
+    Cross-validate every grid configuration on landmark rows X and labels y
+
+    Returns (configs, trials, results table). `workers` defaults to one per
+    `threads_per_worker` CPUs available to this process.
+    """
+    from sklearn.preprocessing import LabelEncoder
+    from train_exercise_classifier import ExerciseClassifierTrainer
+
+    if folds < 2:
+        raise ValueError("folds must be >= 2")
+    configs = expand_grid(grid)
+    tasks = [(index, config, fold) for index, config in enumerate(configs) for fold in range(folds)]
+    if threads_per_worker < 1:
+        raise ValueError("threads_per_worker must be >= 1")
+    workers = max(1, min(len(tasks), workers or len(available_cpus()) // threads_per_worker))
+
+    data_dir = tempfile.mkdtemp(prefix='sweep-')
+    try:
+        # Model input features are computed once and shared with the workers through files
+        features = ExerciseClassifierTrainer(data_dir=data_dir, model_dir=data_dir).classifier_features(X)
+        labels = LabelEncoder().fit_transform(y).astype(np.int32)
+        np.save(os.path.join(data_dir, 'features.npy'), features)
+        np.save(os.path.join(data_dir, 'labels.npy'), labels)
+        np.save(os.path.join(data_dir, 'folds.npy'), fold_assignment(labels, folds, seed))
+
+        # Spawned workers start without the parent's TensorFlow thread pools
+        context = multiprocessing.get_context('spawn')
+        slots = context.Queue()
+        for cpus in cpu_slots(workers, threads_per_worker):
+            slots.put(cpus)
+
+        print(f"Sweeping {len(configs)} configurations x {folds} folds = {len(tasks)} trials "
+              f"on {workers} workers x {threads_per_worker} threads")
+        trials = []
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                                 initargs=(slots, threads_per_worker, data_dir)) as pool:
+            futures = [pool.submit(_run_trial, index, config, fold, epochs) for index, config, fold in tasks]
+            for future in as_completed(futures):
+                trial = future.result()
+                trials.append(trial)
+                print(f"[{len(trials)}/{len(tasks)}] config {trial['config']} fold {trial['fold']}: "
+                      f"val_accuracy {trial['val_accuracy']:.4f} ({trial['train_s']:.1f}s, cpus {trial['cpus']})")
+        print(f"Sweep finished in {time.perf_counter() - started:.1f}s")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    return configs, trials, results_table(configs, trials)
+
+
+def train_best(config: Dict, X: np.ndarray, y: np.ndarray, model_dir: str, epochs: int) -> Dict:
+    """Retrain a configuration on all rows (80/20 holdout, like train_model) and save it to `model_dir`"""
+    from train_exercise_classifier import ExerciseClassifierTrainer
+
+    trainer = ExerciseClassifierTrainer(model_dir=model_dir)
+    X_train, X_test, y_train, y_test = trainer.preprocess_data(X, y)
+    results = trainer.train_model(
+        X_train, y_train, X_test, y_test, epochs=epochs, batch_size=config.get('batch_size', 32),
+        model_params={name: config[name] for name in MODEL_PARAMETERS if name in config}, verbose=0
+    )
+    trainer.save_model_and_preprocessors()
+    return {'test_accuracy': float(results['test_accuracy']), 'test_loss': float(results['test_loss'])}
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Cross-validated hyperparameter sweep for the exercise classifier")
+    parser.add_argument('--data', help="Landmark CSV or landmark_store dataset (default: synthetic data)")
+    parser.add_argument('--samples', type=int, default=5000, help="Synthetic samples when --data is not given")
+    parser.add_argument('--grid', help="JSON grid (or a path to one) overriding DEFAULT_SWEEP_GRID")
+    parser.add_argument('--folds', type=int, default=DEFAULT_FOLDS)
+    parser.add_argument('--epochs', type=int, default=DEFAULT_SWEEP_EPOCHS)
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPUs / threads)")
+    parser.add_argument('--threads-per-worker', type=int, default=DEFAULT_THREADS_PER_WORKER)
+    parser.add_argument('--model-dir', default='trained_models', help="Where the best model is saved")
+    parser.add_argument('--results', default=None, help="Results table CSV (default: <model-dir>/sweep_results.csv)")
+    parser.add_argument('--no-save', action='store_true', help="Only write the results table")
+    args = parser.parse_args()
+
+    from train_exercise_classifier import ExerciseClassifierTrainer
+
+    grid = DEFAULT_SWEEP_GRID
+    if args.grid:
+        if os.path.isfile(args.grid):
+            with open(args.grid) as f:
+                grid = json.load(f)
+        else:
+            grid = json.loads(args.grid)
+
+    loader = ExerciseClassifierTrainer(model_dir=args.model_dir)
+    if args.data:
+        X, y = loader.load_real_data(args.data)
+    else:
+        X, y = loader.generate_synthetic_data(args.samples, seed=0)
+
+    configs, _, table = run_sweep(X, y, grid, args.folds, args.epochs, args.workers, args.threads_per_worker)
+    results_path = args.results or os.path.join(args.model_dir, 'sweep_results.csv')
+    table.to_csv(results_path)
+    print(table.head(10).to_string())
+    print(f"Results table written to {results_path}")
+
+    if not args.no_save:
+        best = configs[int(table.index[0])]
+        print(f"Best configuration {int(table.index[0])}: {best} (cv accuracy {table['val_accuracy'].iloc[0]:.4f})")
+        results = train_best(best, X, y, args.model_dir, args.epochs)
+        print(f"Saved best model to {args.model_dir} (test accuracy {results['test_accuracy']:.4f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,447 @@
+import hashlib
+import itertools
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional
+
+from detector_pool import PoolExhaustedError
+
+# A 1080p RGBA frame (the largest upload we expect) is ~8.3 MB
+DEFAULT_SLOT_BYTES = 8 * 1024 * 1024
+DEFAULT_SLOTS_PER_WORKER = 4
+
+DEFAULT_WORKER_CONFIG = {
+    'analysis_profile': 'holistic',
+    'max_detectors': 8,
+    'idle_timeout': 300.0,
+    'model_dir': 'trained_models',
+    'classifier_backend': 'numpy',
+    'threads_per_worker': 1
+}
+
+
+class WorkerUnavailableError(RuntimeError):
+    """Raised when a frame cannot be handed to, or answered by, an inference worker"""
+
+
+def _worker_main(worker_index: int, conn, slot_names: List[str], config: Dict):
+    """
+    Inference worker process: owns its own detectors and classifier
+
+    Frames arrive in shared-memory slots; only small control tuples
+    (slot index, lengths, format descriptors, options) go over the pipe.
+    A 'batch' message packs several frames back to back into one slot.
+    """
+    # The front process handles Ctrl+C and shuts workers down explicitly
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    # Pin math-library threads before TensorFlow / OpenCV are imported so
+    # N workers do not oversubscribe the cores
+    threads = str(config['threads_per_worker'])
+    for variable in ('OMP_NUM_THREADS', 'TF_NUM_INTRAOP_THREADS', 'TF_NUM_INTEROP_THREADS'):
+        os.environ[variable] = threads
+
+    import cv2
+    from human_detection_model import HumanDetectionModel
+    from train_exercise_classifier import ExerciseClassifierTrainer
+    from detector_pool import DetectorPool
+    from frame_decoding import FrameDecoder
+    from frame_analysis import analyze_frames
+
+    cv2.setNumThreads(int(threads))
+
+    slots = [shared_memory.SharedMemory(name=name) for name in slot_names]
+    detector_pool = DetectorPool(
+        lambda: HumanDetectionModel(analysis_profile=config['analysis_profile']),
+        max_instances=config['max_detectors'],
+        idle_timeout=config['idle_timeout']
+    )
+    def load_classifier():
+        classifier = ExerciseClassifierTrainer(model_dir=config['model_dir'], inference_backend=config['classifier_backend'])
+        try:
+            classifier.load_model_and_preprocessors()
+        except Exception:
+            print(f"[worker {worker_index}] No trained classifier found. Train one first.")
+        return classifier
+
+    classifier = load_classifier()
+    decoder = FrameDecoder()
+    # Build the default detector's graph before reporting ready
+    with detector_pool.acquire(None) as detector:
+        detector.warm_up()
+
+    conn.send(('ready', None, os.getpid()))
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+
+        kind, request_id, body = message
+        if kind == 'ping':
+            conn.send(('pong', request_id, None))
+            continue
+        if kind == 'release':
+            detector_pool.release(body)
+            continue
+        if kind == 'reload_classifier':
+            # Messages are handled one at a time, so no frame sees a half-loaded model
+            classifier = load_classifier()
+            continue
+
+        slot, lengths, descriptors, options, session_id, classify = body
+        try:
+            frames = _slot_frames(decoder, slots[slot].buf, lengths, descriptors)
+            with detector_pool.acquire(session_id) as detector:
+                results = analyze_frames(detector, classifier, frames, options, classify)
+            conn.send(('result', request_id, results if kind == 'batch' else results[0]))
+        except PoolExhaustedError as e:
+            conn.send(('busy', request_id, str(e)))
+        except ValueError as e:
+            conn.send(('invalid', request_id, str(e)))
+        except Exception as e:
+            conn.send(('failed', request_id, str(e)))
+
+    for slot in slots:
+        slot.close()
+
+
+def _slot_frames(decoder, buffer, lengths: List[int], descriptors: List[Dict]):
+    """Decode the frames packed back to back in a slot, one at a time"""
+    offset = 0
+    for length, descriptor in zip(lengths, descriptors):
+        yield decoder.decode_payload(buffer[offset:offset + length], descriptor)
+        offset += length
+
+
+class _WorkerHandle:
+    def __init__(self, index: int, segments: List[shared_memory.SharedMemory]):
+        self.index = index
+        self.segments = segments
+        self.process = None
+        self.conn = None
+        self.lock = threading.RLock()
+        self.pending: Dict[int, tuple] = {}
+        self.free_slots: queue.Queue = queue.Queue()
+        self.generation = 0
+        self.ready = threading.Event()
+        self.pid = None
+        self.last_seen = time.monotonic()
+        self.completed = 0
+        self.restarts = 0
+
+    def reset_slots(self):
+        """
+        Start a new process generation with every slot free; caller holds self.lock
+
+        Slots taken from an earlier generation's queue are never returned to
+        the new one, so a restart cannot hand the same slot out twice.
+        """
+        self.generation += 1
+        self.free_slots = queue.Queue()
+        for slot in range(len(self.segments)):
+            self.free_slots.put(slot)
+
+
+class InferenceWorkerPool:
+    """
+    Dispatch frames from the HTTP front process to N inference worker processes
+
+    Each worker holds its own HumanDetectionModel pool and ExerciseClassifierTrainer,
+    so decoding, MediaPipe and TensorFlow run outside the front process's GIL.
+    Frame bytes are copied once into a shared-memory slot owned by the target
+    worker instead of being pickled. Requests from the same client session
+    always go to the same worker so its tracking state stays in one place.
+    A monitor thread pings workers and restarts any that crash or hang.
+    """
+
+    def __init__(self, num_workers: int, worker_config: Optional[Dict] = None,
+                 slots_per_worker: int = DEFAULT_SLOTS_PER_WORKER,
+                 slot_bytes: int = DEFAULT_SLOT_BYTES, request_timeout: float = 10.0,
+                 health_interval: float = 2.0, heartbeat_timeout: float = 30.0):
+        if num_workers < 1:
+            raise ValueError("num_workers must be at least 1")
+
+        self.num_workers = num_workers
+        self.worker_config = {**DEFAULT_WORKER_CONFIG, **(worker_config or {})}
+        self.slots_per_worker = slots_per_worker
+        self.slot_bytes = slot_bytes
+        self.request_timeout = request_timeout
+        self.health_interval = health_interval
+        self.heartbeat_timeout = heartbeat_timeout
+
+        # Spawned (not forked) workers never inherit TensorFlow/MediaPipe state
+        self._context = multiprocessing.get_context('spawn')
+        self._request_ids = itertools.count()
+        self._round_robin = itertools.count()
+        self._workers: List[_WorkerHandle] = []
+        self._stopping = threading.Event()
+        self._monitor = None
+
+    def start(self):
+        """Create the shared-memory slots and start every worker"""
+        for index in range(self.num_workers):
+            segments = [
+                shared_memory.SharedMemory(create=True, size=self.slot_bytes)
+                for _ in range(self.slots_per_worker)
+            ]
+            worker = _WorkerHandle(index, segments)
+            self._workers.append(worker)
+            with worker.lock:
+                self._spawn(worker)
+
+        self._monitor = threading.Thread(target=self._monitor_loop, name='inference-monitor', daemon=True)
+        self._monitor.start()
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """Block until every worker has loaded its models"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for worker in self._workers:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not worker.ready.wait(remaining):
+                return False
+        return True
+
+    def submit(self, payload, descriptor: Dict, options: Dict,
+               session_id: Optional[str] = None, classify: bool = True) -> Future:
+        """
+        Hand an encoded frame to a worker and return a Future for its result
+        """
+        return self._submit('frame', [payload], [descriptor], options, session_id, classify)
+
+    def submit_batch(self, payloads: List, descriptors: List[Dict], options: Dict,
+                     session_id: Optional[str] = None, classify: bool = True) -> Future:
+        """
+        Hand several frames to one worker (one detector, one classifier pass);
+        the Future resolves to the list of per-frame results
+        """
+        return self._submit('batch', payloads, descriptors, options, session_id, classify)
+
+    def _submit(self, kind: str, payloads: List, descriptors: List[Dict], options: Dict,
+                session_id: Optional[str], classify: bool) -> Future:
+        lengths = [len(payload) for payload in payloads]
+        if sum(lengths) > self.slot_bytes:
+            raise ValueError(f'Frames exceed {self.slot_bytes} bytes' if kind == 'batch'
+                             else f'Frame exceeds {self.slot_bytes} bytes')
+
+        worker = self._route(session_id)
+        if not worker.ready.wait(self.request_timeout):
+            raise WorkerUnavailableError(f'Inference worker {worker.index} is not ready')
+        with worker.lock:
+            generation, free_slots = worker.generation, worker.free_slots
+        try:
+            slot = free_slots.get(timeout=self.request_timeout)
+        except queue.Empty:
+            raise PoolExhaustedError(f'Inference worker {worker.index} is saturated; try again later')
+
+        future = Future()
+        request_id = next(self._request_ids)
+        message = (kind, request_id, (slot, lengths, list(descriptors), dict(options), session_id, classify))
+        with worker.lock:
+            # The worker restarted while we waited: the slot belongs to the old
+            # process and the new generation may already have handed it out
+            if worker.generation != generation:
+                raise WorkerUnavailableError(f'Inference worker {worker.index} is restarting')
+
+            offset = 0
+            for payload, length in zip(payloads, lengths):
+                worker.segments[slot].buf[offset:offset + length] = payload
+                offset += length
+
+            worker.pending[request_id] = (future, slot)
+            try:
+                worker.conn.send(message)
+            except (OSError, ValueError):
+                worker.pending.pop(request_id, None)
+                worker.free_slots.put(slot)
+                raise WorkerUnavailableError(f'Inference worker {worker.index} is restarting')
+        return future
+
+    def analyze(self, payload, descriptor: Dict, options: Dict,
+                session_id: Optional[str] = None, classify: bool = True) -> Dict:
+        """Run a frame through a worker and wait for the analysis result"""
+        future = self.submit(payload, descriptor, options, session_id, classify)
+        try:
+            return future.result(self.request_timeout)
+        except FutureTimeoutError:
+            raise WorkerUnavailableError('Inference worker timed out')
+
+    def analyze_batch(self, payloads: List, descriptors: List[Dict], options: Dict,
+                      session_id: Optional[str] = None, classify: bool = True) -> List[Dict]:
+        """Run a batch of frames through one worker and wait for the per-frame results"""
+        future = self.submit_batch(payloads, descriptors, options, session_id, classify)
+        try:
+            return future.result(self.request_timeout * len(payloads))
+        except FutureTimeoutError:
+            raise WorkerUnavailableError('Inference worker timed out')
+
+    def release_session(self, session_id: str):
+        """Free the detector a worker holds for a finished session"""
+        worker = self._route(session_id)
+        with worker.lock:
+            try:
+                worker.conn.send(('release', None, session_id))
+            except (OSError, ValueError):
+                pass
+
+    def reload_classifier(self):
+        """Have every worker load the classifier saved in its model_dir, between two frames"""
+        for worker in self._workers:
+            with worker.lock:
+                try:
+                    worker.conn.send(('reload_classifier', None, None))
+                except (OSError, ValueError):
+                    # A restarting worker loads the new model on startup anyway
+                    pass
+
+    def _route(self, session_id: Optional[str]) -> _WorkerHandle:
+        if session_id:
+            digest = hashlib.blake2b(session_id.encode('utf-8'), digest_size=8).digest()
+            return self._workers[int.from_bytes(digest, 'little') % self.num_workers]
+        # Anonymous requests go to the worker with the most free slots
+        offset = next(self._round_robin)
+        candidates = self._workers[offset % self.num_workers:] + self._workers[:offset % self.num_workers]
+        return max(candidates, key=lambda worker: worker.free_slots.qsize())
+
+    def _spawn(self, worker: _WorkerHandle):
+        """Start (or restart) a worker process; caller holds worker.lock"""
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(worker.index, child_conn, [segment.name for segment in worker.segments], self.worker_config),
+            name=f'inference-worker-{worker.index}',
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+
+        worker.process = process
+        worker.conn = parent_conn
+        worker.ready.clear()
+        worker.reset_slots()
+        worker.last_seen = time.monotonic()
+
+        threading.Thread(
+            target=self._reader_loop, args=(worker, process, parent_conn),
+            name=f'inference-reader-{worker.index}', daemon=True
+        ).start()
+
+    def _reader_loop(self, worker: _WorkerHandle, process, conn):
+        """Resolve futures from one worker's responses until its pipe closes"""
+        while True:
+            try:
+                kind, request_id, body = conn.recv()
+            except (EOFError, OSError):
+                break
+
+            worker.last_seen = time.monotonic()
+            if kind == 'ready':
+                worker.pid = body
+                worker.ready.set()
+                continue
+            if kind == 'pong':
+                continue
+
+            with worker.lock:
+                entry = worker.pending.pop(request_id, None)
+                if entry is None:
+                    continue
+                future, slot = entry
+                worker.free_slots.put(slot)
+                worker.completed += 1
+
+            if kind == 'result':
+                future.set_result(body)
+            elif kind == 'busy':
+                future.set_exception(PoolExhaustedError(body))
+            elif kind == 'invalid':
+                future.set_exception(ValueError(body))
+            else:
+                future.set_exception(RuntimeError(body))
+
+        if not self._stopping.is_set():
+            self._restart(worker, process, 'pipe closed')
+
+    def _restart(self, worker: _WorkerHandle, process, reason: str):
+        with worker.lock:
+            # Another thread already replaced this process
+            if worker.process is not process or self._stopping.is_set():
+                return
+
+            print(f"Restarting inference worker {worker.index} ({reason})")
+            for future, _ in worker.pending.values():
+                future.set_exception(WorkerUnavailableError(f'Inference worker {worker.index} crashed'))
+            worker.pending.clear()
+
+            if process.is_alive():
+                process.terminate()
+            process.join(timeout=5)
+            worker.conn.close()
+            worker.restarts += 1
+            self._spawn(worker)
+
+    def _monitor_loop(self):
+        """Health check: restart dead or unresponsive workers and ping live ones"""
+        while not self._stopping.wait(self.health_interval):
+            for worker in self._workers:
+                process = worker.process
+                if not process.is_alive():
+                    self._restart(worker, process, f'exit code {process.exitcode}')
+                    continue
+                if not worker.ready.is_set():
+                    continue
+                if time.monotonic() - worker.last_seen > self.heartbeat_timeout:
+                    self._restart(worker, process, 'heartbeat timeout')
+                    continue
+                with worker.lock:
+                    try:
+                        worker.conn.send(('ping', None, None))
+                    except (OSError, ValueError):
+                        pass
+
+    def stats(self) -> Dict:
+        return {
+            'num_workers': self.num_workers,
+            'workers': [
+                {
+                    'index': worker.index,
+                    'pid': worker.pid,
+                    'alive': worker.process is not None and worker.process.is_alive(),
+                    'ready': worker.ready.is_set(),
+                    'pending': len(worker.pending),
+                    'completed': worker.completed,
+                    'restarts': worker.restarts
+                }
+                for worker in self._workers
+            ]
+        }
+
+    def shutdown(self, timeout: float = 5.0):
+        """Stop every worker and release the shared-memory slots"""
+        self._stopping.set()
+        for worker in self._workers:
+            with worker.lock:
+                try:
+                    worker.conn.send(None)
+                except (OSError, ValueError):
+                    pass
+        for worker in self._workers:
+            worker.process.join(timeout)
+            if worker.process.is_alive():
+                worker.process.terminate()
+            worker.conn.close()
+            for future, _ in worker.pending.values():
+                future.set_exception(WorkerUnavailableError('Inference workers are shutting down'))
+            worker.pending.clear()
+            for segment in worker.segments:
+                segment.close()
+                segment.unlink()
@@ -0,0 +1,90 @@
+from itertools import chain
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+# MediaPipe result attribute for each body part
+BODY_PARTS = {
+    'pose': 'pose_landmarks',
+    'pose_world': 'pose_world_landmarks',
+    'face': 'face_landmarks',
+    'left_hand': 'left_hand_landmarks',
+    'right_hand': 'right_hand_landmarks'
+}
+
+# Columns of every landmark array
+X, Y, Z, VISIBILITY = range(4)
+
+
+def landmark_array(landmark_list) -> Optional[np.ndarray]:
+    """
+    Convert a MediaPipe (Normalized)LandmarkList into an (N, 4) float32 array
+
+    Columns are x, y, z, visibility (visibility is 0 for parts that do not
+    report it, such as face and hands). The array is allocated once and
+    filled straight from the protobuf fields.
+    """
+    if landmark_list is None:
+        return None
+    landmarks = landmark_list.landmark
+    count = len(landmarks)
+    values = chain.from_iterable(
+        (landmark.x, landmark.y, landmark.z, landmark.visibility) for landmark in landmarks
+    )
+    return np.fromiter(values, dtype=np.float32, count=count * 4).reshape(count, 4)
+
+
+def landmark_arrays(results, parts: Iterable[str] = BODY_PARTS) -> Dict[str, Optional[np.ndarray]]:
+    """(N, 4) landmark arrays for the requested body parts of a MediaPipe result"""
+    return {part: landmark_array(getattr(results, BODY_PARTS[part], None)) for part in parts}
+
+
+def to_pixels(landmarks: np.ndarray, frame_shape) -> np.ndarray:
+    """Copy of a normalized landmark array with x and y scaled (and truncated) to pixels"""
+    h, w = frame_shape[:2]
+    pixels = landmarks.copy()
+    pixels[:, X] = np.trunc(landmarks[:, X] * w)
+    pixels[:, Y] = np.trunc(landmarks[:, Y] * h)
+    return pixels
+
+
+def to_normalized(keypoints: np.ndarray, frame_shape) -> np.ndarray:
+    """Copy of a pixel keypoint array with x and y divided by the frame width and height (inverse of to_pixels)"""
+    h, w = frame_shape[:2]
+    normalized = np.array(keypoints, dtype=np.float32)
+    normalized[..., X] /= w
+    normalized[..., Y] /= h
+    return normalized
+
+
+def joint_angles(landmarks: np.ndarray, triplets) -> np.ndarray:
+    """
+    Angles in degrees at the vertex of each (end, vertex, end) landmark triplet, from x and y
+
+    `landmarks` is one (N, C) array or a (F, N, C) batch; the result has shape
+    (R,) or (F, R) for R triplets.
+    """
+    points = landmarks[..., np.asarray(triplets), :][..., [X, Y]].astype(np.float64)
+    first = points[..., 0, :] - points[..., 1, :]
+    second = points[..., 2, :] - points[..., 1, :]
+    norms = np.linalg.norm(first, axis=-1) * np.linalg.norm(second, axis=-1)
+    cosine = (first * second).sum(axis=-1) / np.maximum(norms, 1e-9)
+    return np.degrees(np.arccos(np.clip(cosine, -1.0, 1.0)))
+
+
+def as_landmark_array(landmarks) -> np.ndarray:
+    """Accept landmark lists ([[x, y, z], ...]) or arrays and return a 2-D float array"""
+    array = np.asarray(landmarks, dtype=np.float32)
+    if array.ndim == 1:
+        array = array.reshape(-1, 3)
+    return array
+
+
+def visibility(landmarks: np.ndarray) -> np.ndarray:
+    """
+    Per-landmark visibility column of (N, C) landmarks or a (F, N, C) batch
+
+    Legacy (N, 3) landmark lists carry no visibility; the analyzers have always
+    read their third column instead, so that is kept for them.
+    """
+    return landmarks[..., VISIBILITY] if landmarks.shape[-1] > VISIBILITY else landmarks[..., Z]
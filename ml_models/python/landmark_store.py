@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+"""
+Columnar on-disk format for pose landmark datasets
+
+A dataset is a directory of shards plus a small JSON index:
+
+    index.json                   exercises, shard sizes and session segments
+    shard-00000.landmarks.npy    float32 (rows, 33, 3) normalized x, y, z
+    shard-00000.labels.npy       int16 (rows,) index into the exercise list
+    ...
+
+Every column is a plain .npy file, so readers memory-map it and slice rows
+without parsing or copying. The index lists one segment per contiguous run of
+rows of a session: session id, athlete id, exercise and the shard row range.
+Rows written without a session id (e.g. shuffled CSV exports) are not indexed.
+
+Converters build datasets from landmark CSVs (an `exercise` column plus the
+flattened landmarks, optionally `session_id` and `athlete_id`) and from
+/analyze_video results with a landmark track.
+"""
+
+import json
+import os
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from pose_features import POSE_LANDMARK_COUNT
+
+INDEX_FILE = 'index.json'
+FORMAT_NAME = 'pose_landmarks'
+FORMAT_VERSION = 1
+LANDMARKS_SUFFIX = '.landmarks.npy'
+LABELS_SUFFIX = '.labels.npy'
+
+# x, y, z per landmark, like the flattened rows the classifier was trained on
+LANDMARK_CHANNELS = 3
+DEFAULT_SHARD_ROWS = 65536
+DEFAULT_CONVERT_CHUNK_ROWS = 16384
+
+# CSV columns that are not landmark values
+LABEL_COLUMN = 'exercise'
+SESSION_COLUMN = 'session_id'
+ATHLETE_COLUMN = 'athlete_id'
+
+
+def is_landmark_dataset(path: str) -> bool:
+    return os.path.isfile(os.path.join(path, INDEX_FILE))
+
+
+class LandmarkDatasetWriter:
+    """
+    Append landmark rows to a new dataset directory, one shard of `shard_rows` rows at a time
+
+    Memory is bounded by one shard. The index is written by close() (or on
+    leaving a `with` block), so an interrupted conversion leaves no index and
+    is not mistaken for a complete dataset.
+    """
+
+    def __init__(self, path: str, shard_rows: int = DEFAULT_SHARD_ROWS):
+        if shard_rows < 1:
+            raise ValueError("shard_rows must be >= 1")
+        if is_landmark_dataset(path):
+            raise ValueError(f"{path} already holds a landmark dataset")
+        os.makedirs(path, exist_ok=True)
+
+        self.path = path
+        self.shard_rows = shard_rows
+        self.exercises: List[str] = []
+        self.shards: List[Dict] = []
+        self.segments: List[Dict] = []
+
+        self._exercise_codes: Dict[str, int] = {}
+        self._landmarks: List[np.ndarray] = []
+        self._labels: List[np.ndarray] = []
+        self._buffered = 0
+
+    def __enter__(self) -> 'LandmarkDatasetWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.close()
+
+    @property
+    def rows(self) -> int:
+        return sum(shard['rows'] for shard in self.shards) + self._buffered
+
+    def add(self, landmarks: np.ndarray, exercises, session_ids=None, athlete_ids=None):
+        """
+        Append poses: (N, 33, 3) or flattened (N, 99) landmarks
+
+        `exercises`, `session_ids` and `athlete_ids` are one value for all rows
+        or one per row; rows without a session id are stored but not indexed.
+        """
+        # Copied, since rows stay buffered until their shard is written
+        landmarks = np.array(landmarks, dtype=np.float32)
+        count = len(landmarks)
+        if landmarks.size != count * POSE_LANDMARK_COUNT * LANDMARK_CHANNELS:
+            raise ValueError(f"Expected {POSE_LANDMARK_COUNT} x {LANDMARK_CHANNELS} landmark values per pose, "
+                             f"got {landmarks.shape}")
+        landmarks = landmarks.reshape(count, POSE_LANDMARK_COUNT, LANDMARK_CHANNELS)
+
+        exercises = self._per_row(exercises, count)
+        if any(exercise is None for exercise in exercises):
+            raise ValueError("Every pose needs an exercise label")
+        sessions = self._per_row(session_ids, count)
+        athletes = self._per_row(athlete_ids, count)
+
+        names, inverse = np.unique(exercises.astype(str), return_inverse=True)
+        codes = np.array([self._exercise_code(name) for name in names], dtype=np.int16)[inverse]
+
+        start = 0
+        while start < count:
+            stop = min(count, start + self.shard_rows - self._buffered)
+            self._append(landmarks[start:stop], codes[start:stop], exercises[start:stop],
+                         sessions[start:stop], athletes[start:stop])
+            start = stop
+            if self._buffered >= self.shard_rows:
+                self._flush()
+
+    @staticmethod
+    def _per_row(values, count: int) -> np.ndarray:
+        if values is None or isinstance(values, str) or np.ndim(values) == 0:
+            return np.full(count, values, dtype=object)
+        values = np.asarray(values, dtype=object)
+        if len(values) != count:
+            raise ValueError(f"Expected {count} per-row values, got {len(values)}")
+        return values
+
+    def _exercise_code(self, exercise: str) -> int:
+        if exercise not in self._exercise_codes:
+            self._exercise_codes[exercise] = len(self.exercises)
+            self.exercises.append(exercise)
+        return self._exercise_codes[exercise]
+
+    def _append(self, landmarks: np.ndarray, codes: np.ndarray, exercises: np.ndarray,
+                sessions: np.ndarray, athletes: np.ndarray):
+        """Buffer rows of the current shard and index their session runs"""
+        offset = self._buffered
+        self._landmarks.append(landmarks)
+        self._labels.append(codes)
+        self._buffered += len(landmarks)
+
+        indexed = np.array([session is not None for session in sessions], dtype=bool)
+        if not indexed.any():
+            return
+        # Runs of rows sharing session, athlete and exercise (label changes only
+        # matter for indexed rows, so unindexed rows form long runs)
+        run_exercises = np.where(indexed, exercises, None)
+        changes = np.flatnonzero(
+            (sessions[1:] != sessions[:-1]) | (athletes[1:] != athletes[:-1]) | (run_exercises[1:] != run_exercises[:-1])
+        ) + 1
+        for start, stop in zip(np.r_[0, changes], np.r_[changes, len(sessions)]):
+            if not indexed[start]:
+                continue
+            segment = {
+                'session_id': str(sessions[start]),
+                'athlete_id': None if athletes[start] is None else str(athletes[start]),
+                'exercise': str(exercises[start]),
+                'shard': len(self.shards),
+                'start': offset + int(start),
+                'stop': offset + int(stop)
+            }
+            last = self.segments[-1] if self.segments else None
+            if (last is not None and last['shard'] == segment['shard'] and last['stop'] == segment['start']
+                    and all(last[key] == segment[key] for key in ('session_id', 'athlete_id', 'exercise'))):
+                # Same run continued across add() calls
+                last['stop'] = segment['stop']
+            else:
+                self.segments.append(segment)
+
+    def _flush(self):
+        if not self._buffered:
+            return
+        name = f'shard-{len(self.shards):05d}'
+        np.save(os.path.join(self.path, name + LANDMARKS_SUFFIX), np.concatenate(self._landmarks))
+        np.save(os.path.join(self.path, name + LABELS_SUFFIX), np.concatenate(self._labels))
+        self.shards.append({'name': name, 'rows': self._buffered})
+        self._landmarks, self._labels, self._buffered = [], [], 0
+
+    def close(self) -> Dict:
+        """Write the last shard and the index; returns the index"""
+        self._flush()
+        index = {
+            'format': FORMAT_NAME,
+            'version': FORMAT_VERSION,
+            'landmark_shape': [POSE_LANDMARK_COUNT, LANDMARK_CHANNELS],
+            'exercises': self.exercises,
+            'shards': self.shards,
+            'segments': self.segments
+        }
+        temp_path = os.path.join(self.path, INDEX_FILE + '.tmp')
+        with open(temp_path, 'w') as f:
+            json.dump(index, f)
+        os.replace(temp_path, os.path.join(self.path, INDEX_FILE))
+        return index
+
+
+class LandmarkDataset:
+    """
+    Read-only, memory-mapped view of a landmark dataset directory
+
+    Shard columns are opened with np.load(mmap_mode='r') on first use, so
+    opening a dataset only reads the index, and slices of rows or sessions are
+    views into the page cache rather than copies.
+    """
+
+    def __init__(self, path: str):
+        index_path = os.path.join(path, INDEX_FILE)
+        if not os.path.isfile(index_path):
+            raise ValueError(f"{path} is not a landmark dataset (no {INDEX_FILE})")
+        with open(index_path) as f:
+            index = json.load(f)
+        if index.get('format') != FORMAT_NAME or index.get('version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported landmark dataset format in {path}: "
+                             f"{index.get('format')} v{index.get('version')}")
+
+        self.path = path
+        self.exercises: List[str] = index['exercises']
+        self.shards: List[Dict] = index['shards']
+        self.segments: List[Dict] = index['segments']
+        self.landmark_shape = tuple(index['landmark_shape'])
+
+        self._columns: Dict[Tuple[int, str], np.ndarray] = {}
+        # Per shard: positions in `segments` and row ranges of its segments, ordered by row
+        self._shard_segments: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        shard_of = np.array([segment['shard'] for segment in self.segments], dtype=np.int64)
+        starts = np.array([segment['start'] for segment in self.segments], dtype=np.int64)
+        stops = np.array([segment['stop'] for segment in self.segments], dtype=np.int64)
+        for shard in range(len(self.shards)):
+            positions = np.flatnonzero(shard_of == shard)
+            positions = positions[np.argsort(starts[positions], kind='stable')]
+            self._shard_segments.append((positions, starts[positions], stops[positions]))
+
+    def __len__(self) -> int:
+        return sum(shard['rows'] for shard in self.shards)
+
+    def shard_index(self, name: str) -> int:
+        """Shard number from a shard name or one of its column file names"""
+        name = os.path.basename(name).split('.')[0]
+        for i, shard in enumerate(self.shards):
+            if shard['name'] == name:
+                return i
+        raise ValueError(f"Unknown shard '{name}' in {self.path}")
+
+    def _column(self, shard: int, suffix: str) -> np.ndarray:
+        key = (shard, suffix)
+        if key not in self._columns:
+            path = os.path.join(self.path, self.shards[shard]['name'] + suffix)
+            self._columns[key] = np.load(path, mmap_mode='r')
+        return self._columns[key]
+
+    def landmarks(self, shard: int) -> np.ndarray:
+        """Memory-mapped (rows, 33, 3) landmarks of a shard"""
+        return self._column(shard, LANDMARKS_SUFFIX)
+
+    def labels(self, shard: int) -> np.ndarray:
+        """Memory-mapped exercise codes (index into `exercises`) of a shard"""
+        return self._column(shard, LABELS_SUFFIX)
+
+    def session(self, segment: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        """(landmarks, exercise codes) of one index segment, as views"""
+        rows = slice(segment['start'], segment['stop'])
+        return self.landmarks(segment['shard'])[rows], self.labels(segment['shard'])[rows]
+
+    def select(self, exercise: Optional[str] = None, athlete_id: Optional[str] = None,
+               session_id: Optional[str] = None) -> List[Dict]:
+        """Index segments matching every given filter"""
+        return [
+            segment for segment in self.segments
+            if (exercise is None or segment['exercise'] == exercise)
+            and (athlete_id is None or segment['athlete_id'] == athlete_id)
+            and (session_id is None or segment['session_id'] == session_id)
+        ]
+
+    def segment_rows(self, shard: int, start: int, stop: int) -> np.ndarray:
+        """Position in `segments` of each row in [start, stop) of a shard, or -1 for unindexed rows"""
+        positions, starts, stops = self._shard_segments[shard]
+        rows = np.arange(start, stop)
+        if not len(positions):
+            return np.full(len(rows), -1, dtype=np.int64)
+        candidate = np.maximum(np.searchsorted(starts, rows, side='right') - 1, 0)
+        inside = (starts[candidate] <= rows) & (rows < stops[candidate])
+        return np.where(inside, positions[candidate], -1)
+
+    def iter_chunks(self, chunk_rows: int, segments: Optional[Sequence[Dict]] = None
+                    ) -> Iterator[Tuple[int, int, np.ndarray, np.ndarray]]:
+        """
+        Yield (shard, first row, landmarks, exercise codes) views of at most `chunk_rows` rows
+
+        Covers every shard in order, or only the rows of the given index segments.
+        """
+        if segments is None:
+            ranges = [(shard, 0, info['rows']) for shard, info in enumerate(self.shards)]
+        else:
+            ranges = [(segment['shard'], segment['start'], segment['stop']) for segment in segments]
+        for shard, start, stop in ranges:
+            for first in range(start, stop, chunk_rows):
+                last = min(stop, first + chunk_rows)
+                yield shard, first, self.landmarks(shard)[first:last], self.labels(shard)[first:last]
+
+    def to_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        All rows as flattened (N, 99) landmarks and exercise names
+
+        A single-shard dataset is returned as a memory-mapped view; larger
+        ones are concatenated into memory.
+        """
+        landmarks = [self.landmarks(shard).reshape(shard_info['rows'], -1) for shard, shard_info in enumerate(self.shards)]
+        codes = [self.labels(shard) for shard in range(len(self.shards))]
+        names = np.array(self.exercises, dtype=object)
+        if len(landmarks) == 1:
+            return landmarks[0], names[codes[0]]
+        return np.concatenate(landmarks), names[np.concatenate(codes)]
+
+    def summary(self) -> Dict:
+        athletes = {segment['athlete_id'] for segment in self.segments if segment['athlete_id'] is not None}
+        return {
+            'rows': len(self),
+            'shards': len(self.shards),
+            'sessions': len({segment['session_id'] for segment in self.segments}),
+            'athletes': len(athletes),
+            'exercises': self.exercises,
+            'indexed_rows': sum(segment['stop'] - segment['start'] for segment in self.segments)
+        }
+
+
+def convert_csv(csv_paths: Sequence[str], output: str, shard_rows: int = DEFAULT_SHARD_ROWS,
+                chunk_rows: int = DEFAULT_CONVERT_CHUNK_ROWS) -> Dict:
+    """
+    Convert landmark CSVs (the load_real_data layout) into a dataset; returns its index
+
+    CSVs are read in chunks, so memory is bounded by one chunk and one shard.
+    """
+    import pandas as pd
+
+    with LandmarkDatasetWriter(output, shard_rows) as writer:
+        for csv_path in csv_paths:
+            for frame in pd.read_csv(csv_path, chunksize=chunk_rows):
+                exercises = frame.pop(LABEL_COLUMN).astype(str).to_numpy(dtype=object)
+                ids = {}
+                for column in (SESSION_COLUMN, ATHLETE_COLUMN):
+                    if column in frame:
+                        values = frame.pop(column)
+                        ids[column] = np.where(values.isna(), None, values.astype(str)).astype(object)
+                writer.add(frame.to_numpy(dtype=np.float32), exercises,
+                           ids.get(SESSION_COLUMN), ids.get(ATHLETE_COLUMN))
+        print(f"Converted {writer.rows} rows from {len(csv_paths)} CSV file(s)")
+    return LandmarkDataset(output).summary()
+
+
+def analysis_landmarks(analysis: Dict) -> np.ndarray:
+    """
+    Normalized (F, 33, 3) landmarks of the frames with a person in an /analyze_video result
+
+    The track holds pixel keypoints; x and y are divided by the video size
+    (z is already relative), matching the normalized training landmarks.
+    """
+    track = analysis.get('track')
+    if not track:
+        raise ValueError("Analysis has no landmark track (analyze with include_track)")
+    video = analysis.get('video') or {}
+    width, height = video.get('width'), video.get('height')
+    if not width or not height:
+        raise ValueError("Analysis has no video width/height to normalize keypoints")
+
+    poses = [np.asarray(keypoints, dtype=np.float32) for keypoints in track['keypoints'] if keypoints is not None]
+    if not poses:
+        return np.zeros((0, POSE_LANDMARK_COUNT, LANDMARK_CHANNELS), dtype=np.float32)
+    landmarks = np.stack(poses)[:, :, :LANDMARK_CHANNELS].copy()
+    landmarks[:, :, 0] /= width
+    landmarks[:, :, 1] /= height
+    return landmarks
+
+
+def convert_analyses(analysis_paths: Sequence[str], output: str, exercise: Optional[str] = None,
+                     athlete_id: Optional[str] = None, shard_rows: int = DEFAULT_SHARD_ROWS) -> Dict:
+    """
+    Convert saved /analyze_video results (JSON, with a track) into a dataset; returns its index
+
+    Each file becomes one session named after the file. The label is
+    `exercise` or, if not given, the analysis' exercise_type.
+    """
+    with LandmarkDatasetWriter(output, shard_rows) as writer:
+        for analysis_path in analysis_paths:
+            with open(analysis_path, 'rb') as f:
+                analysis = json.load(f)
+            label = exercise or analysis.get('exercise_type')
+            if not label or label == 'general':
+                raise ValueError(f"{analysis_path}: no exercise label; pass one explicitly")
+
+            landmarks = analysis_landmarks(analysis)
+            session_id = os.path.splitext(os.path.basename(analysis_path))[0]
+            writer.add(landmarks, label, session_id, athlete_id)
+            print(f"{analysis_path}: {len(landmarks)} poses ({label})")
+    return LandmarkDataset(output).summary()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build and inspect columnar landmark datasets")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    from_csv = commands.add_parser('from-csv', help="Convert landmark CSV files")
+    from_csv.add_argument('csv', nargs='+')
+    from_csv.add_argument('--output', required=True, help="New dataset directory")
+    from_csv.add_argument('--shard-rows', type=int, default=DEFAULT_SHARD_ROWS)
+
+    from_analysis = commands.add_parser('from-analysis', help="Convert saved /analyze_video results with a track")
+    from_analysis.add_argument('analysis', nargs='+', help="JSON written by video_analysis.py --output")
+    from_analysis.add_argument('--output', required=True, help="New dataset directory")
+    from_analysis.add_argument('--exercise', help="Label for every pose (default: each analysis' exercise_type)")
+    from_analysis.add_argument('--athlete', help="Athlete id recorded in the index")
+    from_analysis.add_argument('--shard-rows', type=int, default=DEFAULT_SHARD_ROWS)
+
+    info = commands.add_parser('info', help="Summarize a dataset")
+    info.add_argument('dataset')
+    args = parser.parse_args()
+
+    if args.command == 'from-csv':
+        summary = convert_csv(args.csv, args.output, args.shard_rows)
+    elif args.command == 'from-analysis':
+        summary = convert_analyses(args.analysis, args.output, args.exercise, args.athlete, args.shard_rows)
+    else:
+        summary = LandmarkDataset(args.dataset).summary()
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+import glob
+import hashlib
+import os
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import tensorflow as tf
+
+from landmark_store import ATHLETE_COLUMN, LABEL_COLUMN, LANDMARKS_SUFFIX, SESSION_COLUMN, LandmarkDataset
+
+# Shards are landmark CSVs (one row per pose, an `exercise` label column,
+# optional `session_id` / `athlete_id` columns and the flattened landmark
+# values in the rest) or the landmark columns of a landmark_store dataset
+
+DEFAULT_TEST_FRACTION = 0.2
+DEFAULT_CHUNK_ROWS = 8192
+DEFAULT_SHUFFLE_BUFFER = 16384
+DEFAULT_PARALLEL_READS = 4
+
+# Resolution of the hash split: rows land in one of SPLIT_BUCKETS buckets
+SPLIT_BUCKETS = 10000
+
+
+def session_keys(session_ids) -> np.ndarray:
+    """Split keys of session ids; every pose of a session lands in the same split"""
+    return pd.util.hash_array(np.asarray(session_ids, dtype=object).astype(str))
+
+
+def row_keys(shard_name: str, start: int, count: int) -> np.ndarray:
+    """Split keys of rows without a session, from their shard name and position"""
+    salt = np.uint64(int.from_bytes(hashlib.blake2b(shard_name.encode(), digest_size=8).digest(), 'little'))
+    return pd.util.hash_array(np.arange(start, start + count, dtype=np.uint64) ^ salt)
+
+
+def landmark_split_keys(dataset: LandmarkDataset, shard: int, start: int, stop: int,
+                        segment_keys: np.ndarray) -> np.ndarray:
+    """Split keys of rows [start, stop) of a landmark dataset shard (`segment_keys`: session_keys of its segments)"""
+    keys = row_keys(dataset.shards[shard]['name'], start, stop - start)
+    positions = dataset.segment_rows(shard, start, stop)
+    indexed = positions >= 0
+    keys[indexed] = segment_keys[positions[indexed]]
+    return keys
+
+
+def _read_csv_chunks(path: str, chunk_rows: int) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """(landmark rows, labels, split keys) per chunk of a CSV shard"""
+    start = 0
+    for frame in pd.read_csv(path, chunksize=chunk_rows):
+        labels = frame.pop(LABEL_COLUMN).astype(str).to_numpy()
+        if ATHLETE_COLUMN in frame:
+            del frame[ATHLETE_COLUMN]
+        if SESSION_COLUMN in frame:
+            # Near-identical neighbouring frames of a session never end up on both sides
+            keys = session_keys(frame.pop(SESSION_COLUMN).to_numpy(dtype=object))
+        else:
+            keys = row_keys(os.path.basename(path), start, len(frame))
+        start += len(frame)
+        yield frame.to_numpy(dtype=np.float32), labels, keys
+
+
+def _read_landmark_shard_chunks(path: str, chunk_rows: int) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """(landmark rows, labels, split keys) per chunk of a landmark dataset shard; rows are memory-mapped views"""
+    dataset = LandmarkDataset(os.path.dirname(path))
+    shard = dataset.shard_index(path)
+    names = np.array(dataset.exercises, dtype=object)
+    segment_keys = session_keys([segment['session_id'] for segment in dataset.segments])
+    landmarks, codes = dataset.landmarks(shard), dataset.labels(shard)
+    for start in range(0, len(landmarks), chunk_rows):
+        stop = min(len(landmarks), start + chunk_rows)
+        yield (landmarks[start:stop].reshape(stop - start, -1), names[codes[start:stop]],
+               landmark_split_keys(dataset, shard, start, stop, segment_keys))
+
+
+# Shard readers by file name suffix
+SHARD_READERS: Dict[str, Callable[[str, int], Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]]] = {
+    '.csv': _read_csv_chunks,
+    LANDMARKS_SUFFIX: _read_landmark_shard_chunks
+}
+
+
+def shard_reader(path: str) -> Callable[[str, int], Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]]:
+    for suffix, reader in SHARD_READERS.items():
+        if path.lower().endswith(suffix):
+            return reader
+    raise ValueError(f"Unsupported landmark shard '{path}'. Supported formats: {sorted(SHARD_READERS)}")
+
+
+def find_shards(source: Union[str, Sequence[str]]) -> List[str]:
+    """
+    Landmark shard files for a directory, a glob pattern, a single file or a list of those
+    """
+    if not isinstance(source, str):
+        return [shard for item in source for shard in find_shards(item)]
+    if os.path.isdir(source):
+        paths = [os.path.join(source, name) for name in os.listdir(source)]
+    elif os.path.isfile(source):
+        paths = [source]
+    else:
+        paths = glob.glob(source)
+
+    shards = sorted(path for path in paths if any(path.lower().endswith(suffix) for suffix in SHARD_READERS))
+    if not shards:
+        raise ValueError(f"No landmark shards found for '{source}'. Supported formats: {sorted(SHARD_READERS)}")
+    return shards
+
+
+def test_mask(keys: np.ndarray, test_fraction: float) -> np.ndarray:
+    """Rows whose split key hashes into the test share; stable across runs, machines and shard order"""
+    return (keys % SPLIT_BUCKETS) < int(round(test_fraction * SPLIT_BUCKETS))
+
+
+class StreamingPoseDataset:
+    """
+    tf.data training pipeline over sharded landmark files that never holds the whole dataset
+
+    Shards are parsed in parallel, `chunk_rows` rows at a time, and turned
+    into model input rows by `features_fn` (see
+    ExerciseClassifierTrainer.classifier_features). Rows are assigned to the
+    train or test split by a hash of their session id (or shard name and row
+    position), so the split is the same every run without a shuffled index.
+
+    `fit_preprocessors` makes one streaming pass that fits the scaler on
+    the training rows (`partial_fit`) and the label encoder on all labels.
+    `training` and `validation` then stream scaled, encoded batches through a
+    shuffle buffer and prefetch; memory is bounded by the buffer and chunk
+    sizes, not by the dataset.
+    """
+
+    def __init__(self, source: Union[str, Sequence[str]], features_fn: Callable[[np.ndarray], np.ndarray],
+                 test_fraction: float = DEFAULT_TEST_FRACTION, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                 parallel_reads: int = DEFAULT_PARALLEL_READS):
+        if not 0.0 < test_fraction < 1.0:
+            raise ValueError("test_fraction must be between 0 and 1")
+        if chunk_rows < 1 or parallel_reads < 1:
+            raise ValueError("chunk_rows and parallel_reads must be >= 1")
+
+        self.shards = find_shards(source)
+        if not self.shards:
+            raise ValueError(f"No landmark shards found for '{source}'")
+        self.features_fn = features_fn
+        self.test_fraction = test_fraction
+        self.chunk_rows = chunk_rows
+        self.parallel_reads = parallel_reads
+
+        # Set by fit_preprocessors
+        self.scaler = None
+        self.label_encoder = None
+        self.feature_size = None
+        self.counts = {'train': 0, 'test': 0}
+
+    def _chunks(self, path) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """(model input rows, labels, test mask) per chunk of one shard"""
+        path = path.decode() if isinstance(path, bytes) else str(path)
+        for landmarks, labels, keys in shard_reader(path)(path, self.chunk_rows):
+            if len(landmarks):
+                yield self.features_fn(landmarks), labels, test_mask(keys, self.test_fraction)
+
+    def _interleave(self, generator: Callable, output_signature, shuffle_shards: bool) -> tf.data.Dataset:
+        """Run `generator(shard path)` over every shard, `parallel_reads` shards at a time"""
+        shards = tf.data.Dataset.from_tensor_slices(self.shards)
+        if shuffle_shards:
+            shards = shards.shuffle(len(self.shards))
+        return shards.interleave(
+            lambda path: tf.data.Dataset.from_generator(generator, args=(path,), output_signature=output_signature),
+            cycle_length=min(self.parallel_reads, len(self.shards)),
+            num_parallel_calls=tf.data.AUTOTUNE,
+            deterministic=False
+        )
+
+    def fit_preprocessors(self, scaler, label_encoder) -> Dict:
+        """
+        One streaming pass: fit `scaler` on the training rows and `label_encoder` on every label
+        """
+        signature = (
+            tf.TensorSpec((None, None), tf.float32),
+            tf.TensorSpec((None,), tf.string),
+            tf.TensorSpec((None,), tf.bool)
+        )
+        chunks = self._interleave(self._chunks, signature, shuffle_shards=False).prefetch(tf.data.AUTOTUNE)
+
+        labels = set()
+        counts = {'train': 0, 'test': 0}
+        feature_size = None
+        for features, chunk_labels, is_test in chunks.as_numpy_iterator():
+            if feature_size is None:
+                feature_size = features.shape[1]
+            elif features.shape[1] != feature_size:
+                raise ValueError(f"Shards disagree on row size: {features.shape[1]} vs {feature_size} features")
+            labels.update(np.unique(chunk_labels).tolist())
+            train_rows = features[~is_test]
+            if len(train_rows):
+                scaler.partial_fit(train_rows)
+            counts['test'] += int(is_test.sum())
+            counts['train'] += len(train_rows)
+
+        if not counts['train'] or not counts['test']:
+            raise ValueError(f"Both splits need rows, got {counts['train']} training and {counts['test']} test rows")
+
+        label_encoder.fit(sorted(label.decode() for label in labels))
+        self.scaler = scaler
+        self.label_encoder = label_encoder
+        self.feature_size = feature_size
+        self.counts = counts
+        return {'feature_size': feature_size, 'classes': label_encoder.classes_.tolist(), **counts}
+
+    def _split(self, split: str, batch_size: int, shuffle_buffer: int) -> tf.data.Dataset:
+        if self.scaler is None:
+            raise RuntimeError("Call fit_preprocessors before building the training pipeline")
+        test = split == 'test'
+
+        def generator(path):
+            for features, labels, is_test in self._chunks(path):
+                rows = is_test if test else ~is_test
+                if rows.any():
+                    yield (self.scaler.transform(features[rows]).astype(np.float32),
+                           self.label_encoder.transform(labels[rows]).astype(np.int32))
+
+        signature = (
+            tf.TensorSpec((None, self.feature_size), tf.float32),
+            tf.TensorSpec((None,), tf.int32)
+        )
+        dataset = self._interleave(generator, signature, shuffle_shards=not test).unbatch()
+        if shuffle_buffer > 1:
+            dataset = dataset.shuffle(shuffle_buffer, reshuffle_each_iteration=True)
+        return dataset.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+
+    def training(self, batch_size: int = 32, shuffle_buffer: int = DEFAULT_SHUFFLE_BUFFER) -> tf.data.Dataset:
+        """Shuffled (features, label) batches of the training split; re-read every epoch"""
+        return self._split('train', batch_size, shuffle_buffer)
+
+    def validation(self, batch_size: int = 256) -> tf.data.Dataset:
+        """(features, label) batches of the test split, unshuffled"""
+        return self._split('test', batch_size, 0)
@@ -0,0 +1,166 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from landmark_arrays import joint_angles, to_normalized, visibility
+
+POSE_LANDMARK_COUNT = 33
+LEFT_SHOULDER, RIGHT_SHOULDER, LEFT_HIP, RIGHT_HIP = 11, 12, 23, 24
+
+# Joint angles every PoseFeatures carries, as (end, vertex, end) pose landmark triplets
+FEATURE_ANGLES = {
+    'left_elbow': (11, 13, 15),
+    'right_elbow': (12, 14, 16),
+    'left_shoulder': (23, 11, 13),
+    'right_shoulder': (24, 12, 14),
+    'left_hip': (11, 23, 25),
+    'right_hip': (12, 24, 26),
+    'left_knee': (23, 25, 27),
+    'right_knee': (24, 26, 28),
+    'left_body_line': (11, 23, 27),
+    'right_body_line': (12, 24, 28)
+}
+ANGLE_NAMES = tuple(FEATURE_ANGLES)
+_ANGLE_TRIPLETS = np.array(list(FEATURE_ANGLES.values()), dtype=np.intp)
+
+# Classifier input spaces
+#   pose_features_v1 - body-centred, torso-scaled x and y of the 33 landmarks, then every feature angle / 180
+#   landmarks        - raw flattened x, y, z (models trained before feature sets were recorded)
+FEATURE_SET = 'pose_features_v1'
+LEGACY_FEATURE_SET = 'landmarks'
+FEATURE_VECTOR_SIZE = POSE_LANDMARK_COUNT * 2 + len(FEATURE_ANGLES)
+
+
+def angle_index(name: str) -> int:
+    """Column of a named angle in PoseFeatures.angles"""
+    if name not in FEATURE_ANGLES:
+        raise ValueError(f"Unknown feature angle '{name}'. Expected one of {ANGLE_NAMES}")
+    return ANGLE_NAMES.index(name)
+
+
+class PoseFeatures:
+    """
+    Scale-invariant features of one pose, or of a batch of poses (leading frame axis)
+
+    `normalized` holds x, y, z relative to the mid-hip point in torso lengths
+    (mid-hip to mid-shoulder), so thresholds on it do not depend on frame
+    resolution or distance to the camera. `angles` are in FEATURE_ANGLES
+    order. Velocities are only set on single poses from a FeatureExtractor.
+    """
+
+    def __init__(self, normalized: np.ndarray, visibility: np.ndarray, angles: np.ndarray,
+                 center: np.ndarray, scale: np.ndarray, velocity: Optional[np.ndarray] = None,
+                 angular_velocity: Optional[np.ndarray] = None):
+        self.normalized = normalized
+        self.visibility = visibility
+        self.angles = angles
+        self.center = center
+        self.scale = scale
+        # Torso lengths / degrees per second since the session's previous pose
+        self.velocity = velocity
+        self.angular_velocity = angular_velocity
+
+    def angle(self, name: str) -> np.ndarray:
+        return self.angles[..., angle_index(name)]
+
+    @property
+    def vector(self) -> np.ndarray:
+        """Classifier input (FEATURE_SET): (FEATURE_VECTOR_SIZE,) or (F, FEATURE_VECTOR_SIZE)"""
+        xy = self.normalized[..., :2]
+        flat = xy.reshape(xy.shape[:-2] + (-1,))
+        return np.concatenate([flat, self.angles / 180.0], axis=-1).astype(np.float32)
+
+    @staticmethod
+    def stack(poses: List['PoseFeatures']) -> 'PoseFeatures':
+        """Batch single-pose features along a new frame axis (velocities are dropped)"""
+        return PoseFeatures(
+            np.stack([pose.normalized for pose in poses]),
+            np.stack([pose.visibility for pose in poses]),
+            np.stack([pose.angles for pose in poses]),
+            np.stack([pose.center for pose in poses]),
+            np.stack([pose.scale for pose in poses])
+        )
+
+
+def compute_pose_features(landmarks: np.ndarray) -> PoseFeatures:
+    """
+    Features of (33, C) landmarks, or a (F, 33, C) batch, in one vectorized step
+
+    Expects normalized (0-1) landmarks, as MediaPipe reports them and the
+    classifier is trained on. Pixel keypoints scale x and y by different
+    factors, which changes the torso-scaled coordinates and the angles, so
+    they must be normalized first (see landmark_arrays.to_normalized).
+    Legacy 3-column landmarks read visibility from their third column (see
+    landmark_arrays.visibility).
+    """
+    landmarks = np.asarray(landmarks, dtype=np.float32)
+    if landmarks.ndim not in (2, 3) or landmarks.shape[-2] != POSE_LANDMARK_COUNT:
+        raise ValueError(f"Pose features need ({POSE_LANDMARK_COUNT}, C) landmarks, got {landmarks.shape}")
+
+    xyz = landmarks[..., :3].astype(np.float64)
+
+    center = (xyz[..., LEFT_HIP, :] + xyz[..., RIGHT_HIP, :]) / 2.0
+    shoulders = (xyz[..., LEFT_SHOULDER, :] + xyz[..., RIGHT_SHOULDER, :]) / 2.0
+    torso = np.linalg.norm((shoulders - center)[..., :2], axis=-1)
+    # Degenerate torsos (occluded or collapsed landmarks) fall back to a share of the pose's extent
+    extent = np.linalg.norm(xyz[..., :2].max(axis=-2) - xyz[..., :2].min(axis=-2), axis=-1)
+    scale = np.maximum(np.maximum(torso, extent * 0.1), 1e-6)
+
+    normalized = (xyz - center[..., None, :]) / scale[..., None, None]
+    angles = joint_angles(normalized, _ANGLE_TRIPLETS)
+    return PoseFeatures(normalized, visibility(landmarks).astype(np.float64), angles, center, scale)
+
+
+class FeatureExtractor:
+    """
+    Per-session feature extraction that adds velocities relative to the previous pose
+
+    Velocities are body-centred (global movement of the athlete cancels out)
+    and are left unset when there is no previous pose to compare with.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self._previous: Optional[PoseFeatures] = None
+        self._previous_timestamp = 0.0
+
+    def extract(self, keypoint_array: Optional[np.ndarray], timestamp: float,
+                frame_shape: Optional[Tuple[int, ...]] = None) -> Optional[PoseFeatures]:
+        """
+        Features of one frame's (33, 4) keypoints, or None when nobody was detected
+
+        Pixel keypoints pass the shape of the frame they are in, so features are
+        computed on normalized landmarks like at training time.
+        """
+        if keypoint_array is None:
+            self._previous = None
+            return None
+
+        if frame_shape is not None:
+            keypoint_array = to_normalized(keypoint_array, frame_shape)
+        features = compute_pose_features(keypoint_array)
+        previous = self._previous
+        elapsed = timestamp - self._previous_timestamp
+        if previous is not None and elapsed > 0:
+            features.velocity = (features.normalized[:, :2] - previous.normalized[:, :2]) / elapsed
+            features.angular_velocity = (features.angles - previous.angles) / elapsed
+
+        self._previous = features
+        self._previous_timestamp = timestamp
+        return features
+
+
+def classifier_input(features: Optional[PoseFeatures], keypoints: np.ndarray, feature_set: str) -> np.ndarray:
+    """
+    (F, D) input rows for a classifier trained on `feature_set`
+
+    `features` is a batch and `keypoints` the matching (F, 33, C) landmarks,
+    which only legacy models read (they may pass None for `features`).
+    """
+    if feature_set == LEGACY_FEATURE_SET:
+        return keypoints[..., :3].reshape(len(keypoints), -1)
+    if feature_set != FEATURE_SET:
+        raise ValueError(f"Unknown classifier feature set '{feature_set}'")
+    return features.vector
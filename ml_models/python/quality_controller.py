@@ -0,0 +1,153 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+import cv2
+import numpy as np
+
+# Quality tiers, from best to cheapest. Each step down trades accuracy for
+# throughput: first the input is downscaled, then segmentation is switched
+# off, then the lighter pose landmark model is used.
+#   max_side         - longest input side fed to MediaPipe (None: as received)
+#   segmentation     - run the segmentation branch (masks are null without it)
+#   model_complexity - MediaPipe pose landmark model (1: full, 0: lite)
+QUALITY_TIERS = (
+    {'name': 'full', 'max_side': None, 'segmentation': True, 'model_complexity': 1},
+    {'name': 'reduced', 'max_side': 640, 'segmentation': True, 'model_complexity': 1},
+    {'name': 'low', 'max_side': 640, 'segmentation': False, 'model_complexity': 1},
+    {'name': 'minimal', 'max_side': 480, 'segmentation': False, 'model_complexity': 0}
+)
+QUALITY_TIER_NAMES = tuple(tier['name'] for tier in QUALITY_TIERS)
+DEFAULT_QUALITY_TIER = 'full'
+
+DEFAULT_TARGET_P95_MS = 250.0
+DEFAULT_LATENCY_WINDOW = 100
+# Fewest latency samples (since the last tier change) a decision is based on
+MIN_LATENCY_SAMPLES = 10
+
+
+def resolve_quality_tier(name: Optional[str]) -> Dict:
+    """Validate a `quality_tier` option and return the tier's settings"""
+    name = name or DEFAULT_QUALITY_TIER
+    if name not in QUALITY_TIER_NAMES:
+        raise ValueError(f"Unknown quality_tier '{name}'. Expected one of {QUALITY_TIER_NAMES}")
+    return QUALITY_TIERS[QUALITY_TIER_NAMES.index(name)]
+
+
+def downscale_frame(frame: np.ndarray, max_side: Optional[int]) -> np.ndarray:
+    """Shrink a frame so its longest side is at most `max_side` (no-op when None or already small)"""
+    if max_side is None:
+        return frame
+    height, width = frame.shape[:2]
+    scale = max_side / float(max(height, width))
+    if scale >= 1.0:
+        return frame
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return cv2.resize(frame, size, interpolation=cv2.INTER_LINEAR)
+
+
+class QualityController:
+    """
+    Pick the quality tier frames are analyzed at from the current load
+
+    Every live frame runs inside `track()`, which counts it as in flight (queued
+    or running) and records its latency. The controller steps one tier down
+    when the p95 latency of recent requests exceeds `target_p95_ms` or more
+    than `max_queue` requests are in flight, and one tier back up once p95 is
+    below half the target with the queue at most half full. Stepping down
+    waits `step_down_interval` seconds after the last change and stepping up
+    `step_up_interval`, so a spike degrades quickly and recovery is gradual.
+    """
+
+    def __init__(self, target_p95_ms: float = DEFAULT_TARGET_P95_MS, max_queue: int = 8,
+                 window: int = DEFAULT_LATENCY_WINDOW, step_down_interval: float = 2.0,
+                 step_up_interval: float = 10.0, enabled: bool = True):
+        self.target_p95_ms = target_p95_ms
+        self.max_queue = max_queue
+        self.step_down_interval = step_down_interval
+        self.step_up_interval = step_up_interval
+        self.enabled = enabled
+
+        self.level = 0
+        self.in_flight = 0
+        self.tier_changes = 0
+        self._latencies_ms = deque(maxlen=window)
+        self._last_change = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def tier(self) -> str:
+        return QUALITY_TIER_NAMES[self.level]
+
+    def tier_for(self, requested: Optional[str] = None) -> str:
+        """
+        Tier to analyze a request at: the controller's tier, or the client's
+        requested one when that is cheaper
+        """
+        resolve_quality_tier(requested)
+        level = QUALITY_TIER_NAMES.index(requested) if requested else 0
+        return QUALITY_TIER_NAMES[max(level, self.level)]
+
+    @contextmanager
+    def track(self):
+        """Count the enclosed analysis as in flight and record its latency"""
+        with self._lock:
+            self.in_flight += 1
+            self._adjust()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000.0
+            with self._lock:
+                self.in_flight -= 1
+                self._latencies_ms.append(elapsed_ms)
+                self._adjust()
+
+    def _p95(self) -> Optional[float]:
+        if len(self._latencies_ms) < MIN_LATENCY_SAMPLES:
+            return None
+        return float(np.percentile(self._latencies_ms, 95))
+
+    def _adjust(self):
+        """Step the tier if the load calls for it (caller holds the lock)"""
+        if not self.enabled:
+            return
+
+        now = time.monotonic()
+        since_change = now - self._last_change
+        p95 = self._p95()
+
+        overloaded = self.in_flight > self.max_queue or (p95 is not None and p95 > self.target_p95_ms)
+        if overloaded:
+            if self.level < len(QUALITY_TIERS) - 1 and since_change >= self.step_down_interval:
+                self._set_level(self.level + 1, now)
+            return
+
+        idle = self.in_flight <= self.max_queue // 2 and p95 is not None and p95 < self.target_p95_ms / 2.0
+        if idle and self.level > 0 and since_change >= self.step_up_interval:
+            self._set_level(self.level - 1, now)
+
+    def _set_level(self, level: int, now: float):
+        print(f"Quality tier {self.tier} -> {QUALITY_TIER_NAMES[level]} "
+              f"(in flight: {self.in_flight}, p95: {self._p95()} ms)")
+        self.level = level
+        self.tier_changes += 1
+        self._last_change = now
+        # Latencies measured at the previous tier say little about the new one
+        self._latencies_ms.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            p95 = self._p95()
+            return {
+                'enabled': self.enabled,
+                'tier': self.tier,
+                'in_flight': self.in_flight,
+                'max_queue': self.max_queue,
+                'target_p95_ms': self.target_p95_ms,
+                'p95_ms': round(p95, 3) if p95 is not None else None,
+                'tier_changes': self.tier_changes
+            }
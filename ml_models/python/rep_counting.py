@@ -0,0 +1,265 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from landmark_arrays import X, Y
+from pose_features import PoseFeatures, FEATURE_ANGLES, angle_index
+
+# Feature angles (see pose_features.FEATURE_ANGLES) for the left and right side
+ELBOW_ANGLES = ('left_elbow', 'right_elbow')                # shoulder - elbow - wrist
+KNEE_ANGLES = ('left_knee', 'right_knee')                   # hip - knee - ankle
+SHOULDER_ANGLES = ('left_shoulder', 'right_shoulder')       # hip - shoulder - elbow (arm abduction)
+BODY_LINE_ANGLES = ('left_body_line', 'right_body_line')    # shoulder - hip - ankle
+
+# How the engine follows each exercise
+#   joints      - feature angles for the left and right side
+#   combine     - visible: the more visible side (side-on camera), min / mean: both sides
+#   rest_angle  - joint angle at the start / end of a rep
+#   depth_angle - joint angle at the bottom of a full rep
+#   hold_angle  - (hold exercises) smallest angle that counts as holding the position
+EXERCISE_SPECS = {
+    'pushup': {'joints': ELBOW_ANGLES, 'combine': 'visible', 'rest_angle': 155.0, 'depth_angle': 95.0},
+    'squat': {'joints': KNEE_ANGLES, 'combine': 'visible', 'rest_angle': 165.0, 'depth_angle': 100.0},
+    'lunge': {'joints': KNEE_ANGLES, 'combine': 'min', 'rest_angle': 165.0, 'depth_angle': 105.0},
+    'jumping_jack': {'joints': SHOULDER_ANGLES, 'combine': 'mean', 'rest_angle': 35.0, 'depth_angle': 140.0},
+    'plank': {'joints': BODY_LINE_ANGLES, 'combine': 'visible', 'hold_angle': 160.0}
+}
+REP_EXERCISES = tuple(EXERCISE_SPECS)
+
+# Rep progress (0 at rest_angle, 1 at depth_angle) that moves the phase machine
+LEAVE_REST_PROGRESS = 0.25
+REACH_DEPTH_PROGRESS = 0.8
+LEAVE_DEPTH_PROGRESS = 0.7
+RETURN_REST_PROGRESS = 0.2
+
+MIN_JOINT_VISIBILITY = 0.5
+DEFAULT_BUFFER_SIZE = 64
+DEFAULT_SMOOTHING_FRAMES = 3
+DEFAULT_VELOCITY_FRAMES = 5
+# Without a usable pose for this long, an unfinished rep is abandoned
+MAX_GAP_S = 2.0
+
+
+class LandmarkRingBuffer:
+    """
+    Fixed-capacity ring buffer of recent normalized (N, 3) landmark arrays, timestamps and angles
+
+    Storage is allocated once; pushing overwrites the oldest entry. A running
+    sum over the newest `smoothing` angles gives the moving average in O(1).
+    """
+
+    def __init__(self, capacity: int = DEFAULT_BUFFER_SIZE, landmark_count: int = 33,
+                 smoothing: int = DEFAULT_SMOOTHING_FRAMES):
+        if not 1 <= smoothing <= capacity:
+            raise ValueError("smoothing must be between 1 and the buffer capacity")
+
+        self.capacity = capacity
+        self.smoothing = smoothing
+        self.landmarks = np.zeros((capacity, landmark_count, 3), dtype=np.float32)
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.angles = np.zeros(capacity, dtype=np.float64)
+        self.clear()
+
+    def clear(self):
+        self.count = 0
+        self._next = 0
+        self._angle_sum = 0.0
+
+    def push(self, landmarks: np.ndarray, timestamp: float, angle: float):
+        if self.count >= self.smoothing:
+            self._angle_sum -= self.angles[(self._next - self.smoothing) % self.capacity]
+        self.landmarks[self._next] = landmarks
+        self.timestamps[self._next] = timestamp
+        self.angles[self._next] = angle
+        self._angle_sum += angle
+        self._next = (self._next + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def _slot(self, age: int) -> int:
+        """Slot of the entry pushed `age` pushes ago (0: newest)"""
+        return (self._next - 1 - age) % self.capacity
+
+    def smoothed_angle(self) -> float:
+        return self._angle_sum / min(self.count, self.smoothing)
+
+    def angular_velocity(self, frames: int = DEFAULT_VELOCITY_FRAMES) -> float:
+        """Degrees per second over (at most) the last `frames` entries"""
+        age = min(frames, self.count - 1)
+        if age <= 0:
+            return 0.0
+        newest, oldest = self._slot(0), self._slot(age)
+        elapsed = self.timestamps[newest] - self.timestamps[oldest]
+        return float((self.angles[newest] - self.angles[oldest]) / elapsed) if elapsed > 0 else 0.0
+
+
+class RepCounter:
+    """
+    Per-session temporal engine that turns a landmark stream into reps and phases
+
+    Each frame's pose features (see pose_features) give one joint angle for the
+    current exercise (see EXERCISE_SPECS), smoothed over the ring buffer. Counting starts once
+    the athlete is seen in the start position (the phase is 'setup' until
+    then). Rep exercises move
+    through rest -> eccentric -> bottom -> concentric -> rest; returning to
+    rest completes a rep and reports its tempo, while turning back before the
+    bottom counts a partial rep. Hold exercises (plank) alternate between
+    rest and hold and accumulate hold time. Every update costs O(1).
+    """
+
+    def __init__(self, buffer_size: int = DEFAULT_BUFFER_SIZE, smoothing: int = DEFAULT_SMOOTHING_FRAMES,
+                 velocity_frames: int = DEFAULT_VELOCITY_FRAMES):
+        self.buffer = LandmarkRingBuffer(buffer_size, smoothing=smoothing)
+        self.velocity_frames = velocity_frames
+        self.exercise: Optional[str] = None
+        self.reset()
+
+    def reset(self, exercise: Optional[str] = None):
+        """Start counting from zero, optionally for a different exercise"""
+        self.exercise = exercise
+        self.buffer.clear()
+        self.reps = 0
+        self.partial_reps = 0
+        self.hold_s = 0.0
+        self.phase = 'setup'
+        self.last_rep: Optional[Dict] = None
+        self._phase_start: Optional[float] = None
+        self._last_seen: Optional[float] = None
+        self._rep_marks: Dict[str, float] = {}
+
+    def update(self, features: Optional[PoseFeatures], exercise_type: str, timestamp: float) -> Optional[Dict]:
+        """
+        Feed one frame's pose features (None when nobody was detected)
+
+        Returns the engine state and this frame's events, or None for exercises
+        without a rep / hold definition.
+        """
+        exercise = exercise_type.lower()
+        spec = EXERCISE_SPECS.get(exercise)
+        if spec is None:
+            return None
+        if exercise != self.exercise:
+            self.reset(exercise)
+
+        events: List[Dict] = []
+        if self._last_seen is not None and timestamp - self._last_seen > MAX_GAP_S:
+            self._abandon(timestamp, events)
+
+        angle = self._angle(features, spec) if features is not None else None
+        if angle is None:
+            return self._state(None, timestamp, events)
+
+        self._last_seen = timestamp
+        self.buffer.push(features.normalized, timestamp, angle)
+        smoothed = self.buffer.smoothed_angle()
+        if self._phase_start is None:
+            self._phase_start = timestamp
+
+        if 'hold_angle' in spec:
+            self._step_hold(spec, smoothed, timestamp, events)
+        else:
+            self._step_rep(spec, smoothed, timestamp, events)
+        return self._state(smoothed, timestamp, events)
+
+    def _angle(self, features: PoseFeatures, spec: Dict) -> Optional[float]:
+        """The exercise's joint angle, or None when its joints are not visible"""
+        triplets = np.array([FEATURE_ANGLES[name] for name in spec['joints']])
+        side_visibility = features.visibility[triplets].min(axis=1)
+        visible = side_visibility >= MIN_JOINT_VISIBILITY
+        if not visible.any():
+            return None
+
+        angles = features.angles[[angle_index(name) for name in spec['joints']]]
+        if spec['combine'] == 'visible' or not visible.all():
+            angle = angles[int(np.argmax(side_visibility))]
+        elif spec['combine'] == 'min':
+            angle = angles.min()
+        else:
+            angle = angles.mean()
+
+        if 'hold_angle' in spec:
+            # Holding also requires the body to be roughly horizontal
+            side = triplets[int(np.argmax(side_visibility))]
+            dx, dy = np.abs(features.normalized[side[0], [X, Y]] - features.normalized[side[2], [X, Y]])
+            if dy > dx:
+                angle = 0.0
+        return float(angle)
+
+    def _abandon(self, timestamp: float, events: List[Dict]):
+        """The pose was gone too long: drop the unfinished rep (a hold ends when last seen)"""
+        if self.phase == 'hold':
+            self.hold_s += self._last_seen - self._phase_start
+        if self.phase != 'setup':
+            self._enter('setup', timestamp, events)
+        self.buffer.clear()
+        self._last_seen = None
+
+    def _enter(self, phase: str, timestamp: float, events: List[Dict]):
+        self.phase = phase
+        self._phase_start = timestamp
+        events.append({'type': 'phase', 'phase': phase, 'timestamp': timestamp})
+
+    def _step_rep(self, spec: Dict, angle: float, timestamp: float, events: List[Dict]):
+        progress = (spec['rest_angle'] - angle) / (spec['rest_angle'] - spec['depth_angle'])
+        marks = self._rep_marks
+
+        if self.phase == 'setup':
+            if progress <= RETURN_REST_PROGRESS:
+                self._enter('rest', timestamp, events)
+        elif self.phase == 'rest':
+            if progress > LEAVE_REST_PROGRESS:
+                marks.clear()
+                marks['start'] = timestamp
+                self._enter('eccentric', timestamp, events)
+        elif self.phase == 'eccentric':
+            if progress >= REACH_DEPTH_PROGRESS:
+                marks['bottom'] = timestamp
+                self._enter('bottom', timestamp, events)
+            elif progress <= RETURN_REST_PROGRESS:
+                self.partial_reps += 1
+                events.append({'type': 'partial_rep', 'count': self.partial_reps, 'timestamp': timestamp})
+                self._enter('rest', timestamp, events)
+        elif self.phase == 'bottom':
+            if progress < LEAVE_DEPTH_PROGRESS:
+                marks['concentric'] = timestamp
+                self._enter('concentric', timestamp, events)
+        elif self.phase == 'concentric':
+            if progress >= REACH_DEPTH_PROGRESS:
+                # Went back down without standing up: still the same rep
+                self._enter('bottom', timestamp, events)
+            elif progress <= RETURN_REST_PROGRESS:
+                self.reps += 1
+                self.last_rep = {
+                    'eccentric_s': round(marks['bottom'] - marks['start'], 3),
+                    'bottom_s': round(marks['concentric'] - marks['bottom'], 3),
+                    'concentric_s': round(timestamp - marks['concentric'], 3),
+                    'duration_s': round(timestamp - marks['start'], 3)
+                }
+                events.append({'type': 'rep', 'count': self.reps, 'tempo': self.last_rep, 'timestamp': timestamp})
+                self._enter('rest', timestamp, events)
+
+    def _step_hold(self, spec: Dict, angle: float, timestamp: float, events: List[Dict]):
+        holding = angle >= spec['hold_angle']
+        if holding and self.phase != 'hold':
+            self._enter('hold', timestamp, events)
+        elif not holding and self.phase == 'hold':
+            duration = timestamp - self._phase_start
+            self.hold_s += duration
+            events.append({'type': 'hold', 'duration_s': round(duration, 3), 'timestamp': timestamp})
+            self._enter('rest', timestamp, events)
+
+    def _state(self, angle: Optional[float], timestamp: float, events: List[Dict]) -> Dict:
+        phase_s = timestamp - self._phase_start if self._phase_start is not None else 0.0
+        hold_s = self.hold_s + (phase_s if self.phase == 'hold' else 0.0)
+        tracking = angle is not None
+        return {
+            'exercise': self.exercise,
+            'reps': self.reps,
+            'partial_reps': self.partial_reps,
+            'phase': self.phase,
+            'phase_duration_s': round(phase_s, 3),
+            'hold_s': round(hold_s, 3),
+            'angle': round(angle, 2) if tracking else None,
+            'angular_velocity': round(self.buffer.angular_velocity(self.velocity_frames), 2) if tracking else None,
+            'last_rep': self.last_rep,
+            'events': events
+        }
@@ -0,0 +1,132 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+# Request options that change a frame's result (image payloads do not)
+KEY_OPTIONS = ('exercise_type', 'analysis_profile', 'quality_tier', 'frame_skipping', 'roi',
+               'mask', 'mask_size', 'keypoints_format')
+
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+DEFAULT_CACHE_TTL_S = 30.0
+
+
+def frame_hash(frame: np.ndarray) -> bytes:
+    """
+    Bit-exact hash of a decoded frame (shape, dtype and pixels)
+
+    Only retried and resubmitted copies of the same frame match; a frame that
+    differs in a single pixel is analyzed again, so a held pose (a plank, the
+    bottom of a squat) still advances the session's rep and hold state.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((frame.shape, frame.dtype.str)).encode())
+    digest.update(np.ascontiguousarray(frame).data)
+    return digest.digest()
+
+
+def result_nbytes(value) -> int:
+    """Approximate memory held by a result (arrays, bytes and strings dominate)"""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value)
+    if isinstance(value, dict):
+        return 64 + sum(result_nbytes(key) + result_nbytes(item) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return 16 + sum(result_nbytes(item) for item in value)
+    return 32
+
+
+class ResultCache:
+    """
+    Bounded LRU cache of finished frame results, keyed by session, frame hash and options
+
+    Results are stored after output options are applied, exactly as they are
+    returned, and must not be modified afterwards; hits return a shallow copy
+    marked `cached: true`. Entries expire `ttl_s` seconds after they are stored,
+    and the least recently used ones are evicted to keep the approximate size
+    of all results under `max_bytes` (0 disables the cache). Results carry
+    per-session state (reps, timestamps, frame skipping), so the client
+    session is part of the key and sessions never see each other's results.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES, ttl_s: float = DEFAULT_CACHE_TTL_S):
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+
+        self._entries: 'OrderedDict[Hashable, Tuple[Dict, int, float]]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @staticmethod
+    def key(frame: np.ndarray, options: Dict, classify: bool, session_id: Optional[str] = None) -> Tuple:
+        return (session_id, frame_hash(frame), classify) + tuple(str(options.get(name)) for name in KEY_OPTIONS)
+
+    def get(self, key: Hashable) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry[0], cached=True)
+
+    def put(self, key: Hashable, result: Dict):
+        size = result_nbytes(result)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (result, size, time.monotonic() + self.ttl_s)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key: Hashable):
+        """Drop an entry (caller holds the lock)"""
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        """Drop every entry, e.g. after the classifier changed"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'ttl_s': self.ttl_s,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
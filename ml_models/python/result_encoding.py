@@ -0,0 +1,118 @@
+import base64
+import json
+from typing import List, Optional
+
+import numpy as np
+
+# Optional fast/compact encoders; the stdlib JSON encoder is the fallback
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
+
+JSON_MIMETYPE = 'application/json'
+MSGPACK_MIMETYPE = 'application/msgpack'
+CBOR_MIMETYPE = 'application/cbor'
+
+# Accept-header aliases and `format` option values for each encoding
+_MIMETYPE_ALIASES = {
+    'json': JSON_MIMETYPE,
+    'msgpack': MSGPACK_MIMETYPE,
+    'application/x-msgpack': MSGPACK_MIMETYPE,
+    'application/vnd.msgpack': MSGPACK_MIMETYPE,
+    'cbor': CBOR_MIMETYPE
+}
+
+
+def available_mimetypes() -> List[str]:
+    """Response encodings this server can produce, in order of preference for */*"""
+    mimetypes = [JSON_MIMETYPE]
+    if msgpack is not None:
+        mimetypes.append(MSGPACK_MIMETYPE)
+    if cbor2 is not None:
+        mimetypes.append(CBOR_MIMETYPE)
+    return mimetypes
+
+
+def resolve_mimetype(name: Optional[str]) -> str:
+    """Map a `format` option or mimetype to a supported encoding, defaulting to JSON"""
+    if not name:
+        return JSON_MIMETYPE
+    mimetype = _MIMETYPE_ALIASES.get(name.lower(), name.lower())
+    if mimetype not in available_mimetypes():
+        raise ValueError(f'Unsupported result format. Expected one of {available_mimetypes()}')
+    return mimetype
+
+
+def negotiate_mimetype(accept_mimetypes, format_option: Optional[str] = None) -> str:
+    """
+    Pick the response encoding from an explicit `format` option or the Accept header
+    """
+    if format_option:
+        return resolve_mimetype(format_option)
+
+    offered = available_mimetypes()
+    # Clients may ask for msgpack by one of its unregistered aliases
+    offered += [alias for alias, mimetype in _MIMETYPE_ALIASES.items() if '/' in alias and mimetype in offered]
+    best = accept_mimetypes.best_match(offered, default=JSON_MIMETYPE)
+    return _MIMETYPE_ALIASES.get(best, best)
+
+
+def encode_result(result, mimetype: str = JSON_MIMETYPE) -> bytes:
+    """
+    Serialize a detection result in a single pass
+
+    NumPy arrays and scalars are written directly, MediaPipe landmark lists are
+    converted to lists of {x, y, z[, visibility]} dicts, and binary fields are
+    raw bytes in MessagePack/CBOR and base64 strings in JSON.
+    """
+    if mimetype == MSGPACK_MIMETYPE:
+        return msgpack.packb(result, default=_binary_default, use_bin_type=True)
+    if mimetype == CBOR_MIMETYPE:
+        return cbor2.dumps(result, default=lambda encoder, value: encoder.encode(_binary_default(value)))
+    if orjson is not None:
+        return orjson.dumps(result, default=_json_default,
+                            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(result, default=_json_default).encode('utf-8')
+
+
+def landmark_list_to_dicts(landmark_list) -> List[dict]:
+    """Convert a MediaPipe (Normalized)LandmarkList protobuf to plain dicts"""
+    return [_landmark_dict(landmark) for landmark in landmark_list.landmark]
+
+
+def _landmark_dict(landmark) -> dict:
+    point = {'x': landmark.x, 'y': landmark.y, 'z': landmark.z}
+    if landmark.HasField('visibility'):
+        point['visibility'] = landmark.visibility
+    return point
+
+
+def _binary_default(obj):
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (bytearray, memoryview)):
+        return bytes(obj)
+    if hasattr(obj, 'landmark'):
+        return landmark_list_to_dicts(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f'Object of type {type(obj).__name__} is not serializable')
+
+
+def _json_default(obj):
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        return base64.b64encode(obj).decode('ascii')
+    return _binary_default(obj)
@@ -0,0 +1,144 @@
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+# Per-request output options
+#   mask:             none (default) | downsampled | rle | png | polygon
+#   mask_size:        longest side, in pixels, of raster mask encodings
+#   keypoints_format: dicts (default, one dict per landmark) | flat | binary
+MASK_ENCODINGS = ('none', 'downsampled', 'rle', 'png', 'polygon')
+KEYPOINT_FORMATS = ('dicts', 'flat', 'binary')
+
+DEFAULT_DOWNSAMPLED_MASK_SIZE = 96
+MASK_THRESHOLD = 0.5
+
+
+def apply_output_options(result: Dict, options: Dict) -> Dict:
+    """
+    Shrink a process_video_frame result according to the request's output options
+
+    The full-resolution segmentation mask is dropped unless the client asks for
+    one of the compact mask encodings, and keypoints can be returned as a flat
+    float32 array (x, y, z, visibility per landmark) instead of per-landmark dicts.
+    """
+    mask_encoding = str(options.get('mask', 'none')).lower()
+    if mask_encoding not in MASK_ENCODINGS:
+        raise ValueError(f'Unknown mask encoding. Expected one of {list(MASK_ENCODINGS)}')
+
+    keypoints_format = str(options.get('keypoints_format', 'dicts')).lower()
+    if keypoints_format not in KEYPOINT_FORMATS:
+        raise ValueError(f'Unknown keypoints_format. Expected one of {list(KEYPOINT_FORMATS)}')
+
+    mask_size = options.get('mask_size')
+    try:
+        mask_size = int(mask_size) if mask_size is not None else None
+    except (TypeError, ValueError):
+        raise ValueError('mask_size must be an integer')
+
+    pose_result = result.get('pose_detection')
+    if not pose_result:
+        return result
+
+    mask = pose_result.get('segmentation_mask')
+    if mask is not None and mask_encoding != 'none':
+        pose_result['segmentation_mask'] = encode_mask(mask, mask_encoding, mask_size)
+    else:
+        pose_result['segmentation_mask'] = None
+
+    # Cached pose features are an in-process intermediate, never sent
+    pose_result.pop('features', None)
+
+    # The (N, 4) array is the source of both formats, never sent as-is
+    keypoint_array = pose_result.pop('keypoint_array', None)
+    if keypoints_format != 'dicts':
+        if keypoint_array is not None:
+            keypoints = keypoint_array.ravel()
+        else:
+            keypoints = pack_keypoints(pose_result.get('keypoints', []))
+        pose_result['keypoints'] = keypoints.tobytes() if keypoints_format == 'binary' else keypoints
+        pose_result['keypoints_format'] = keypoints_format
+        pose_result['keypoints_shape'] = [len(keypoints) // 4, 4]
+        # Landmarks duplicate the first three keypoint columns
+        pose_result.pop('landmarks', None)
+
+    return result
+
+
+def pack_keypoints(keypoints: List[Dict]) -> np.ndarray:
+    """Pack per-landmark dicts into a flat float32 (x, y, z, visibility) array"""
+    if not keypoints:
+        return np.zeros(0, dtype=np.float32)
+    return np.array(
+        [(kp['x'], kp['y'], kp['z'], kp['visibility']) for kp in keypoints],
+        dtype=np.float32
+    ).ravel()
+
+
+def encode_mask(mask: np.ndarray, encoding: str, max_size: Optional[int] = None) -> Dict:
+    """
+    Encode a float segmentation mask (H x W, values in [0, 1]) compactly
+
+    downsampled: 8-bit soft mask resized to `max_size` (raw bytes, row-major)
+    rle:         run lengths of the thresholded mask (row-major, starting with a background run)
+    png:         thresholded mask as a 1-channel PNG
+    polygon:     outline of the largest foreground region in frame pixel coordinates
+    """
+    height, width = mask.shape[:2]
+
+    if encoding == 'polygon':
+        return {'encoding': 'polygon', 'width': width, 'height': height, 'points': mask_polygon(mask)}
+
+    if encoding == 'downsampled' and max_size is None:
+        max_size = DEFAULT_DOWNSAMPLED_MASK_SIZE
+    if max_size is not None and max(height, width) > max_size:
+        scale = max_size / float(max(height, width))
+        size = (max(1, int(round(width * scale))), max(1, int(round(height * scale))))
+        mask = cv2.resize(mask, size, interpolation=cv2.INTER_AREA)
+    out_height, out_width = mask.shape[:2]
+
+    encoded = {
+        'encoding': encoding,
+        'width': out_width,
+        'height': out_height,
+        'frame_width': width,
+        'frame_height': height
+    }
+
+    if encoding == 'downsampled':
+        encoded['data'] = np.clip(mask * 255.0, 0, 255).astype(np.uint8).tobytes()
+    elif encoding == 'rle':
+        encoded['counts'] = mask_rle(mask > MASK_THRESHOLD)
+    elif encoding == 'png':
+        binary = (mask > MASK_THRESHOLD).astype(np.uint8) * 255
+        ok, png = cv2.imencode('.png', binary)
+        if not ok:
+            raise ValueError('Could not encode segmentation mask as PNG')
+        encoded['data'] = png.tobytes()
+    else:
+        raise ValueError(f'Unknown mask encoding. Expected one of {list(MASK_ENCODINGS)}')
+
+    return encoded
+
+
+def mask_rle(binary_mask: np.ndarray) -> List[int]:
+    """Row-major run-length encoding; the first count is always a background run"""
+    flat = binary_mask.ravel().astype(np.int8)
+    if flat.size == 0:
+        return []
+    boundaries = np.concatenate(([0], np.flatnonzero(np.diff(flat)) + 1, [flat.size]))
+    counts = np.diff(boundaries).tolist()
+    if flat[0]:
+        counts.insert(0, 0)
+    return counts
+
+
+def mask_polygon(mask: np.ndarray, epsilon_ratio: float = 0.005) -> List[List[int]]:
+    """Simplified outline of the largest foreground region"""
+    binary = (mask > MASK_THRESHOLD).astype(np.uint8)
+    contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return []
+    contour = max(contours, key=cv2.contourArea)
+    epsilon = epsilon_ratio * cv2.arcLength(contour, True)
+    return cv2.approxPolyDP(contour, epsilon, True).reshape(-1, 2).tolist()
@@ -0,0 +1,238 @@
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from landmark_arrays import X, Y, Z
+
+# Region-of-interest modes accepted by process_video_frame / the `roi` option
+#   off  - every frame is processed at full resolution
+#   bbox - frames are cropped to the padded bounding box of the previous pose
+ROI_MODES = ('off', 'bbox')
+
+# Padding added on each side, as a fraction of the bounding box width / height.
+# Vertical padding is larger: standing up from a squat or push-up roughly
+# doubles the pose's height within a few frames.
+DEFAULT_ROI_PADDING = 0.3
+DEFAULT_ROI_VERTICAL_PADDING = 0.5
+# Longest side of the image the graph receives in ROI mode; windows larger
+# than this are downscaled to it, smaller ones are never enlarged
+DEFAULT_ROI_INPUT_SIDE = 768
+# Windows spanning more of the frame's width than this are not worth it; use the full frame
+MAX_ROI_WIDTH_FRACTION = 0.8
+
+
+def resolve_roi_mode(mode: Optional[str]) -> bool:
+    """Validate a `roi` option and return whether bounding-box cropping is on"""
+    mode = mode or 'off'
+    if mode not in ROI_MODES:
+        raise ValueError(f"Unknown roi mode '{mode}'. Expected one of {ROI_MODES}")
+    return mode == 'bbox'
+
+
+class RegionOfInterest:
+    """
+    A crop window of a frame (in frame pixels) and the size it is resized to for the graph
+
+    Windows share the frame's aspect ratio, so the resize scales x and y
+    equally; it only ever shrinks the window. Landmarks the graph returns are normalized to the window; they
+    are mapped back to normalized full-frame coordinates with `to_frame`.
+    """
+
+    def __init__(self, x: int, y: int, width: int, height: int, input_size: Tuple[int, int],
+                 full_frame: bool = False):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.input_size = input_size
+        self.full_frame = full_frame
+
+    def crop(self, frame: np.ndarray) -> np.ndarray:
+        """The window of a frame resized to the input size"""
+        view = frame[self.y:self.y + self.height, self.x:self.x + self.width]
+        if (self.width, self.height) == self.input_size:
+            return view
+        return cv2.resize(view, self.input_size, interpolation=cv2.INTER_LINEAR)
+
+    def to_frame(self, landmarks: Optional[np.ndarray], frame_shape: Tuple[int, ...]) -> Optional[np.ndarray]:
+        """Map window-normalized (N, 4) landmarks to full-frame normalized coordinates"""
+        if landmarks is None or self.full_frame:
+            return landmarks
+        frame_height, frame_width = frame_shape[:2]
+        mapped = landmarks.copy()
+        mapped[:, X] = (landmarks[:, X] * self.width + self.x) / frame_width
+        mapped[:, Y] = (landmarks[:, Y] * self.height + self.y) / frame_height
+        # z uses the same scale as x, which is relative to the image width
+        mapped[:, Z] = landmarks[:, Z] * (self.width / frame_width)
+        return mapped
+
+    def paste_mask(self, mask: Optional[np.ndarray], frame_shape: Tuple[int, ...]) -> Optional[np.ndarray]:
+        """Resize an input-sized segmentation mask back to the window and place it in a full-frame mask"""
+        if mask is None:
+            return None
+        window = cv2.resize(mask, (self.width, self.height), interpolation=cv2.INTER_LINEAR)
+        if self.full_frame:
+            return window
+        full = np.zeros(frame_shape[:2], dtype=np.float32)
+        full[self.y:self.y + self.height, self.x:self.x + self.width] = window
+        return full
+
+    def clips(self, landmarks: np.ndarray, border: float = 0.05) -> bool:
+        """
+        Whether window-normalized landmarks come close to the window border
+
+        A pose cut off by the crop tends to be squeezed inside it rather than
+        reported at the edge, so nearing the border already counts as outgrowing it.
+        """
+        xy = landmarks[:, :2]
+        return bool((xy < border).any() or (xy > 1.0 - border).any())
+
+    def contains(self, box: Tuple[float, float, float, float]) -> bool:
+        x_min, y_min, x_max, y_max = box
+        return (x_min >= self.x and y_min >= self.y and
+                x_max <= self.x + self.width and y_max <= self.y + self.height)
+
+    def as_dict(self) -> Dict:
+        return {
+            'x': self.x,
+            'y': self.y,
+            'width': self.width,
+            'height': self.height,
+            'full_frame': self.full_frame
+        }
+
+
+class ROITracker:
+    """
+    Choose the crop window for the next frame from the current frame's pose
+
+    The window is the keypoint bounding box padded by `padding` (horizontally)
+    and `vertical_padding` on each side, widened to the frame's aspect ratio
+    and kept inside the frame. It is kept
+    while the pose stays inside it (with a margin) and is not much smaller
+    than the window, so the graph sees a stable crop and its own landmark
+    tracking keeps working. Without a pose the whole frame is used.
+
+    Windows, including the whole frame, are downscaled to at most
+    `input_side` pixels on their longest side and never enlarged, so a crop
+    costs fewer pixels than the frame it came from. The input size therefore
+    changes with the window; MediaPipe's segmentation smoothing needs a
+    constant image size, which holds because the detector resets the graph
+    whenever the window changes.
+    """
+
+    def __init__(self, padding: float = DEFAULT_ROI_PADDING,
+                 vertical_padding: float = DEFAULT_ROI_VERTICAL_PADDING,
+                 input_side: int = DEFAULT_ROI_INPUT_SIDE, max_width_fraction: float = MAX_ROI_WIDTH_FRACTION):
+        self.padding = padding
+        self.vertical_padding = vertical_padding
+        self.input_side = input_side
+        self.max_width_fraction = max_width_fraction
+
+        self.active = False
+        self.cropped_frames = 0
+        self.full_frames = 0
+        self.lost = 0
+        self.outgrown_windows = 0
+        self.region: Optional[RegionOfInterest] = None
+        self.last_region: Optional[RegionOfInterest] = None
+        # (height, width) of the frames the current window was fitted to
+        self._frame_size: Optional[Tuple[int, int]] = None
+
+    def reset(self):
+        """Drop the crop window so the next frame is processed whole"""
+        self.region = None
+        self.last_region = None
+
+    def input_size(self, width: int, height: int) -> Tuple[int, int]:
+        """Graph input size of a window: downscaled to `input_side`, never enlarged"""
+        scale = min(1.0, self.input_side / float(max(width, height)))
+        return max(1, round(width * scale)), max(1, round(height * scale))
+
+    def full_frame(self, frame_shape: Tuple[int, ...]) -> RegionOfInterest:
+        frame_height, frame_width = frame_shape[:2]
+        return RegionOfInterest(0, 0, frame_width, frame_height, self.input_size(frame_width, frame_height),
+                                full_frame=True)
+
+    def region_for(self, frame_shape: Tuple[int, ...]) -> RegionOfInterest:
+        """The window to process the next frame with"""
+        region = self.region
+        if region is None or self._frame_size != tuple(frame_shape[:2]):
+            if (self.last_region is not None and self.last_region.full_frame and
+                    (self.last_region.height, self.last_region.width) == tuple(frame_shape[:2])):
+                # Same whole-frame window as before, so the graph keeps tracking
+                return self.last_region
+            return self.full_frame(frame_shape)
+        return region
+
+    def processed(self, region: RegionOfInterest):
+        """Record the window a frame was finally processed with"""
+        self.last_region = region
+        if region.full_frame:
+            self.full_frames += 1
+        else:
+            self.cropped_frames += 1
+
+    def tracking_lost(self):
+        """The pose was not found inside the crop window"""
+        self.lost += 1
+        self.region = None
+
+    def outgrown(self, keypoint_array: np.ndarray, frame_shape: Tuple[int, ...]):
+        """The pose reached the border of the crop window; fit a new window to it"""
+        self.outgrown_windows += 1
+        self.region = None
+        self.update(keypoint_array, frame_shape)
+
+    def update(self, keypoint_array: Optional[np.ndarray], frame_shape: Tuple[int, ...]):
+        """Pick the crop window for the next frame from this frame's (33, 4) pixel keypoints"""
+        if keypoint_array is None:
+            self.region = None
+            return
+
+        frame_height, frame_width = frame_shape[:2]
+        x_min, y_min = keypoint_array[:, :2].min(axis=0).tolist()
+        x_max, y_max = keypoint_array[:, :2].max(axis=0).tolist()
+        box_width = max(x_max - x_min, 1.0)
+        box_height = max(y_max - y_min, 1.0)
+
+        # Padded box widened to the frame's aspect ratio
+        aspect = frame_width / float(frame_height)
+        width = box_width * (1.0 + 2.0 * self.padding)
+        height = box_height * (1.0 + 2.0 * self.vertical_padding)
+        if width / height < aspect:
+            width = height * aspect
+        else:
+            height = width / aspect
+
+        # Keep the current window while it still fits the pose comfortably
+        margin_x = box_width * self.padding / 3.0
+        margin_y = box_height * self.vertical_padding / 3.0
+        if self.region is not None and self.region.contains(
+                (x_min - margin_x, y_min - margin_y, x_max + margin_x, y_max + margin_y)):
+            if self.region.width <= 2.0 * width:
+                return
+
+        width = int(round(width))
+        height = int(round(height))
+        if width > self.max_width_fraction * frame_width:
+            self.region = None
+            return
+
+        center_x = (x_min + x_max) / 2.0
+        center_y = (y_min + y_max) / 2.0
+        left = int(min(max(center_x - width / 2.0, 0.0), frame_width - width))
+        top = int(min(max(center_y - height / 2.0, 0.0), frame_height - height))
+        self.region = RegionOfInterest(left, top, width, height, self.input_size(width, height))
+        self._frame_size = (frame_height, frame_width)
+
+    def stats(self) -> Dict:
+        total = self.cropped_frames + self.full_frames
+        return {
+            'cropped_frames': self.cropped_frames,
+            'full_frames': self.full_frames,
+            'tracking_lost': self.lost,
+            'outgrown_windows': self.outgrown_windows,
+            'crop_rate': round(self.cropped_frames / total, 4) if total else 0.0
+        }
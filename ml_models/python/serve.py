@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Production entry point for the ML API server
+
+Runs the Flask app as a threaded front process (debug off) that only parses
+requests, and dispatches frame analysis to N inference worker processes.
+Keep module-level code minimal: spawned workers re-import this file.
+"""
+
+import argparse
+import os
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the ML API with multi-process inference workers")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('ML_WORKERS', os.cpu_count() or 1)),
+                        help="Number of inference worker processes (default: one per core)")
+    parser.add_argument('--slots-per-worker', type=int, default=4,
+                        help="Shared-memory frame slots per worker (max in-flight frames per worker)")
+    parser.add_argument('--threads-per-worker', type=int, default=1,
+                        help="Math-library threads per worker")
+    args = parser.parse_args()
+
+    # Frames are analyzed in the workers, so the front process builds no detector
+    os.environ.setdefault('ML_WARM_DETECTOR', '0')
+
+    from inference_workers import InferenceWorkerPool
+    import api_server
+
+    pool = InferenceWorkerPool(
+        args.workers,
+        worker_config={
+            'analysis_profile': api_server.default_analysis_profile,
+            'max_detectors': api_server.detector_pool.max_instances,
+            'idle_timeout': api_server.detector_pool.idle_timeout,
+            'model_dir': api_server.classifier_trainer.model_dir,
+            'classifier_backend': api_server.classifier_trainer.inference_backend,
+            'threads_per_worker': args.threads_per_worker
+        },
+        slots_per_worker=args.slots_per_worker
+    )
+    pool.start()
+    api_server.use_inference_workers(pool)
+
+    print(f"Starting ML API server with {args.workers} inference workers on http://{args.host}:{args.port}")
+    try:
+        api_server.app.run(host=args.host, port=args.port, threaded=True, debug=False)
+    finally:
+        pool.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+# Server startup modes (ML_STARTUP_MODE)
+#   background - the server answers as soon as its modules are imported and
+#                loads the classifier / builds the default MediaPipe graph in
+#                a warm-up thread; /health reports ready once that is done
+#   eager      - warm up before the module finishes importing (ready on start)
+STARTUP_MODES = ('background', 'eager')
+DEFAULT_STARTUP_MODE = 'background'
+
+# Modules whose import dominates cold start; the report lists the ones loaded
+HEAVY_MODULES = ('tensorflow', 'mediapipe', 'sklearn', 'pandas', 'matplotlib', 'seaborn', 'cv2')
+
+
+def resolve_startup_mode(mode: Optional[str]) -> str:
+    """Validate a startup mode name (None means the default)"""
+    mode = mode or DEFAULT_STARTUP_MODE
+    if mode not in STARTUP_MODES:
+        raise ValueError(f"Unknown startup mode '{mode}'. Expected one of {STARTUP_MODES}")
+    return mode
+
+
+class StartupReport:
+    """
+    Readiness and per-stage wall-clock cost (ms) of a server's startup
+
+    Stages cover the server's own module imports and each warm-up step
+    (framework imports, model loads, graph builds), so the report shows where
+    cold-start time goes. `ready` is set when warm-up has finished, also if a
+    step failed (the error is reported).
+    """
+
+    def __init__(self, mode: str = DEFAULT_STARTUP_MODE, started: Optional[float] = None):
+        self.mode = resolve_startup_mode(mode)
+        self.stages: Dict[str, float] = {}
+        self.error: Optional[str] = None
+        self._started = time.perf_counter() if started is None else started
+        self._ready_at: Optional[float] = None
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float):
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds * 1000.0
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the enclosed block as a startup stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def run(self, warm_up: Callable[['StartupReport'], None]):
+        """Run `warm_up(report)` in this thread (eager) or a daemon thread (background)"""
+        if self.mode == 'eager':
+            self._warm_up(warm_up)
+            return
+        threading.Thread(target=self._warm_up, args=(warm_up,), name='server-warm-up', daemon=True).start()
+
+    def _warm_up(self, warm_up: Callable[['StartupReport'], None]):
+        try:
+            warm_up(self)
+        except Exception as e:
+            self.error = str(e)
+            print(f"Server warm-up failed: {e}")
+        finally:
+            self._ready_at = time.perf_counter()
+            self._ready.set()
+            print(f"Server ready in {(self._ready_at - self._started) * 1000.0:.0f} ms ({self.summary()})")
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def summary(self) -> str:
+        with self._lock:
+            return ', '.join(f"{name} {ms:.0f} ms" for name, ms in self.stages.items())
+
+    def as_dict(self) -> Dict:
+        end = self._ready_at if self._ready_at is not None else time.perf_counter()
+        with self._lock:
+            stages = {name: round(ms, 1) for name, ms in self.stages.items()}
+        return {
+            'mode': self.mode,
+            'ready': self.ready,
+            'error': self.error,
+            'stages_ms': stages,
+            # Time since the server module started importing (until ready, once ready)
+            'elapsed_ms': round((end - self._started) * 1000.0, 1),
+            'modules_loaded': [name for name in HEAVY_MODULES if name in sys.modules]
+        }
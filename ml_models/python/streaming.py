@@ -0,0 +1,150 @@
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Union
+
+
+class LatestFrameSlot:
+    """
+    Single-slot mailbox that only ever holds the newest frame
+
+    Putting a frame while another is still waiting replaces it, so a slow
+    consumer always processes the most recent frame instead of a backlog.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._item = None
+        self._closed = False
+
+    def put(self, item) -> bool:
+        """Store an item, returning True if a stale item was dropped"""
+        with self._condition:
+            dropped = self._item is not None
+            self._item = item
+            self._condition.notify()
+            return dropped
+
+    def get(self, timeout: Optional[float] = None):
+        """Take the newest item, or None on timeout or once closed"""
+        with self._condition:
+            if self._item is None and not self._closed:
+                self._condition.wait(timeout)
+            item, self._item = self._item, None
+            return item
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+
+class StreamSession:
+    """
+    One athlete's live analysis session over a WebSocket
+
+    Binary messages are encoded frames (JPEG/WebP/PNG). Text messages are JSON
+    control messages:
+        {"type": "config", "exercise_type": "squat", "analysis_profile": "pose_only"}
+        {"type": "frame", "image": "<base64>"}
+        {"type": "close"}
+    A receiver thread keeps only the newest unprocessed frame; the session
+    thread hands it to `analyze(payload, options)` (which runs it through the
+    session's own detector, so MediaPipe tracking state is never shared) and
+    sends back one result per processed frame, encoded by `encode` (JSON text,
+    or a binary MessagePack/CBOR message when the client negotiated one).
+    """
+
+    def __init__(self, session_id: str, analyze: Callable[[Union[bytes, str], Dict], Dict],
+                 encode: Callable[[Dict], Union[str, bytes]], options: Optional[Dict] = None):
+        self.session_id = session_id
+        self.analyze = analyze
+        self.encode = encode
+        self.options = dict(options or {})
+
+        self.frames_received = 0
+        self.frames_processed = 0
+        self.frames_dropped = 0
+        self._slot = LatestFrameSlot()
+        self._options_lock = threading.Lock()
+
+    def run(self, ws):
+        """Serve the session until the client disconnects"""
+        receiver = threading.Thread(target=self._receive_loop, args=(ws,), daemon=True)
+        receiver.start()
+
+        ws.send(json.dumps({'type': 'ready', 'session_id': self.session_id, 'options': self.options}))
+
+        while True:
+            item = self._slot.get(timeout=1.0)
+            if item is None:
+                if self._slot.closed:
+                    break
+                continue
+
+            frame_id, payload, received_at = item
+            with self._options_lock:
+                options = dict(self.options)
+
+            try:
+                result = self.analyze(payload, options)
+                result['type'] = 'result'
+                result['session_id'] = self.session_id
+                result['frame_id'] = frame_id
+                result['dropped_frames'] = self.frames_dropped
+                result['latency_ms'] = round((time.perf_counter() - received_at) * 1000.0, 3)
+                message = self.encode(result)
+            except Exception as e:
+                message = json.dumps({'type': 'error', 'frame_id': frame_id, 'error': str(e)})
+
+            self.frames_processed += 1
+            try:
+                ws.send(message)
+            except Exception:
+                break
+
+        self._slot.close()
+
+    def _receive_loop(self, ws):
+        """Read client messages, keeping only the newest frame"""
+        try:
+            while True:
+                message = ws.receive()
+                if message is None:
+                    break
+
+                if isinstance(message, (bytes, bytearray)):
+                    self._enqueue(message)
+                    continue
+
+                control = json.loads(message)
+                message_type = control.get('type')
+                if message_type == 'frame' and 'image' in control:
+                    self._enqueue(control['image'])
+                elif message_type == 'config':
+                    with self._options_lock:
+                        self.options.update({k: v for k, v in control.items() if k != 'type'})
+                elif message_type == 'close':
+                    break
+        except Exception:
+            # Connection closed or malformed control message: end the session
+            pass
+        finally:
+            self._slot.close()
+
+    def _enqueue(self, payload):
+        self.frames_received += 1
+        if self._slot.put((self.frames_received, payload, time.perf_counter())):
+            self.frames_dropped += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'session_id': self.session_id,
+            'frames_received': self.frames_received,
+            'frames_processed': self.frames_processed,
+            'frames_dropped': self.frames_dropped
+        }
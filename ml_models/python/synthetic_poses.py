@@ -0,0 +1,169 @@
+from typing import Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+from pose_features import POSE_LANDMARK_COUNT
+
+# Normalized (x, y, z) template of each exercise's key landmarks; landmarks not
+# listed stay at the origin (before noise), like undetected ones
+POSE_TEMPLATES = {
+    # Body horizontal
+    'pushup': {
+        11: (0.3, 0.2, 0), 12: (0.7, 0.2, 0),   # shoulders
+        13: (0.2, 0.4, 0), 14: (0.8, 0.4, 0),   # elbows
+        15: (0.1, 0.6, 0), 16: (0.9, 0.6, 0),   # wrists
+        23: (0.4, 0.5, 0), 24: (0.6, 0.5, 0),   # hips
+        25: (0.3, 0.7, 0), 26: (0.7, 0.7, 0),   # knees
+        27: (0.2, 0.9, 0), 28: (0.8, 0.9, 0)    # ankles
+    },
+    # Knees bent
+    'squat': {
+        11: (0.3, 0.3, 0), 12: (0.7, 0.3, 0),
+        23: (0.4, 0.4, 0), 24: (0.6, 0.4, 0),
+        25: (0.3, 0.6, 0), 26: (0.7, 0.6, 0),
+        27: (0.2, 0.8, 0), 28: (0.8, 0.8, 0)
+    },
+    # Straight line
+    'plank': {
+        11: (0.3, 0.2, 0), 12: (0.7, 0.2, 0),
+        13: (0.2, 0.3, 0), 14: (0.8, 0.3, 0),
+        15: (0.1, 0.4, 0), 16: (0.9, 0.4, 0),
+        23: (0.4, 0.5, 0), 24: (0.6, 0.5, 0),
+        25: (0.3, 0.6, 0), 26: (0.7, 0.6, 0),
+        27: (0.2, 0.7, 0), 28: (0.8, 0.7, 0)
+    },
+    # Arms up
+    'jumping_jack': {
+        11: (0.2, 0.1, 0), 12: (0.8, 0.1, 0),
+        13: (0.1, 0.2, 0), 14: (0.9, 0.2, 0),
+        15: (0.0, 0.3, 0), 16: (1.0, 0.3, 0),
+        23: (0.4, 0.4, 0), 24: (0.6, 0.4, 0),
+        25: (0.3, 0.6, 0), 26: (0.7, 0.6, 0),
+        27: (0.2, 0.8, 0), 28: (0.8, 0.8, 0)
+    },
+    # One leg forward (left), one back
+    'lunge': {
+        11: (0.3, 0.3, 0), 12: (0.7, 0.3, 0),
+        23: (0.4, 0.4, 0), 24: (0.6, 0.4, 0),
+        25: (0.2, 0.6, 0), 26: (0.7, 0.7, 0),
+        27: (0.1, 0.8, 0), 28: (0.8, 0.9, 0)
+    }
+}
+EXERCISES = tuple(POSE_TEMPLATES)
+
+# Limbs as (parent, child) landmarks, parents before children, for limb-length jitter
+LIMBS = ((11, 13), (13, 15), (12, 14), (14, 16), (23, 25), (25, 27), (24, 26), (26, 28))
+LEFT_HIP, RIGHT_HIP = 23, 24
+
+DEFAULT_NOISE = 0.02
+DEFAULT_CHUNK_SIZE = 65536
+
+# Bulk pose augmentations (all off by default)
+#   rotation_deg - std of an in-plane rotation about the mid-hip point, in degrees
+#   scale        - half-width of a uniform body scale factor around 1, about the mid-hip point
+#   limb_jitter  - std of a per-limb length factor around 1 (children follow their parents)
+DEFAULT_AUGMENTATION = {'rotation_deg': 10.0, 'scale': 0.15, 'limb_jitter': 0.08}
+
+
+def _template_arrays() -> Tuple[np.ndarray, np.ndarray]:
+    templates = np.zeros((len(EXERCISES), POSE_LANDMARK_COUNT, 3), dtype=np.float32)
+    defined = np.zeros((len(EXERCISES), POSE_LANDMARK_COUNT), dtype=bool)
+    for i, exercise in enumerate(EXERCISES):
+        for index, point in POSE_TEMPLATES[exercise].items():
+            templates[i, index] = point
+            defined[i, index] = True
+    return templates, defined
+
+
+TEMPLATES, TEMPLATE_DEFINED = _template_arrays()
+# Landmarks any template defines. Poses are built and augmented as compact
+# (N, len(BODY_LANDMARKS), 3) body blocks; all other landmarks are zero.
+BODY_LANDMARKS = np.flatnonzero(TEMPLATE_DEFINED.any(axis=0))
+BODY_TEMPLATES = TEMPLATES[:, BODY_LANDMARKS]
+BODY_DEFINED = TEMPLATE_DEFINED[:, BODY_LANDMARKS]
+_BODY_COLUMN = {int(index): column for column, index in enumerate(BODY_LANDMARKS)}
+# Contiguous runs of body landmarks as (first landmark, first body column, length);
+# slice copies are much cheaper than fancy-index scatters on large blocks
+_BODY_RUNS = [
+    (int(run[0]), _BODY_COLUMN[int(run[0])], len(run))
+    for run in np.split(BODY_LANDMARKS, np.flatnonzero(np.diff(BODY_LANDMARKS) > 1) + 1)
+]
+
+
+def augment_poses(body: np.ndarray, labels: np.ndarray, rng: np.random.Generator,
+                  augmentation: Dict) -> np.ndarray:
+    """
+    Apply limb-length jitter, then scale and rotation about the mid-hip, to body blocks in place
+
+    `body` is (N, len(BODY_LANDMARKS), 3) and `labels` the poses' exercise
+    indices; only landmarks their templates define move, the rest stay at
+    the origin.
+    """
+    count = len(body)
+    defined = BODY_DEFINED[labels]
+
+    limb_jitter = augmentation.get('limb_jitter', 0.0)
+    if limb_jitter:
+        original = body.copy()
+        factors = rng.normal(1.0, limb_jitter, (count, len(LIMBS))).astype(np.float32)
+        for limb, (parent, child) in enumerate(LIMBS):
+            parent, child = _BODY_COLUMN[parent], _BODY_COLUMN[child]
+            # Absent limbs keep a factor of 1, so their (origin) child stays put
+            factor = np.where(defined[:, child], factors[:, limb], 1.0)[:, None]
+            body[:, child] = body[:, parent] + (original[:, child] - original[:, parent]) * factor
+
+    scale = augmentation.get('scale', 0.0)
+    rotation_deg = augmentation.get('rotation_deg', 0.0)
+    if scale or rotation_deg:
+        hips = [_BODY_COLUMN[LEFT_HIP], _BODY_COLUMN[RIGHT_HIP]]
+        center = body[:, hips, :2].mean(axis=1)[:, None]                        # (N, 1, 2)
+        factor = rng.uniform(1.0 - scale, 1.0 + scale, count).astype(np.float32)
+        theta = np.radians(rng.normal(0.0, rotation_deg, count)).astype(np.float32)
+        cos, sin = (np.cos(theta) * factor)[:, None], (np.sin(theta) * factor)[:, None]
+        dx, dy = body[:, :, 0] - center[..., 0], body[:, :, 1] - center[..., 1]
+        body[:, :, 0] = np.where(defined, center[..., 0] + cos * dx - sin * dy, 0.0)
+        body[:, :, 1] = np.where(defined, center[..., 1] + sin * dx + cos * dy, 0.0)
+
+    return body
+
+
+def generate_poses(num_samples: int, rng: np.random.Generator, noise: float = DEFAULT_NOISE,
+                   augmentation: Optional[Dict] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    One block of synthetic poses: (N, 33, 3) float32 landmarks and (N,) exercise indices into EXERCISES
+
+    Exercises are drawn uniformly, their templates gathered in one indexing
+    step, optionally augmented, then noise is added and everything is
+    clipped to [0, 1] in bulk.
+    """
+    labels = rng.integers(0, len(EXERCISES), num_samples)
+    body = BODY_TEMPLATES[labels]
+    if augmentation:
+        augment_poses(body, labels, rng, augmentation)
+
+    poses = np.zeros((num_samples, POSE_LANDMARK_COUNT, 3), dtype=np.float32)
+    for first, column, length in _BODY_RUNS:
+        poses[:, first:first + length] = body[:, column:column + length]
+    noise_draw = rng.standard_normal(poses.shape, dtype=np.float32)
+    noise_draw *= np.float32(noise)
+    poses += noise_draw
+    np.clip(poses, 0.0, 1.0, out=poses)
+    return poses, labels
+
+
+def iter_synthetic_poses(num_samples: int, seed: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                         noise: float = DEFAULT_NOISE,
+                         augmentation: Optional[Dict] = None) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Yield `num_samples` synthetic poses in blocks of at most `chunk_size`
+
+    Memory stays bounded by one chunk, so millions of samples can be streamed
+    to disk or a training pipeline. The same seed gives the same samples for
+    the same chunk size.
+    """
+    if num_samples < 0 or chunk_size < 1:
+        raise ValueError("num_samples must be >= 0 and chunk_size >= 1")
+
+    rng = np.random.default_rng(seed)
+    for start in range(0, num_samples, chunk_size):
+        yield generate_poses(min(chunk_size, num_samples - start), rng, noise, augmentation)
@@ -0,0 +1,96 @@
+import threading
+
+import numpy as np
+import pytest
+
+from classification_batcher import ClassificationBatcher
+
+
+class FakeClassifier:
+    """Predicts the row sum; records the size of every forward pass"""
+
+    feature_set = 'test'
+
+    def __init__(self, fail_size=None):
+        self.calls = []
+        self.fail_size = fail_size
+
+    def predict_features_batch(self, features):
+        if features.shape[1] == self.fail_size:
+            raise ValueError('bad row size')
+        self.calls.append(len(features))
+        return [{'exercise': 'x', 'sum': float(row.sum())} for row in features]
+
+
+def submit_concurrently(batcher, rows):
+    futures = [None] * len(rows)
+    start = threading.Barrier(len(rows))
+
+    def worker(i):
+        start.wait()
+        futures[i] = batcher.submit(rows[i])
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(rows))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return [future.result(timeout=5) for future in futures]
+
+
+def test_concurrent_requests_share_a_forward_pass():
+    classifier = FakeClassifier()
+    batcher = ClassificationBatcher(classifier, max_batch_size=64, max_wait_ms=200)
+    rows = [np.full(4, i, dtype=np.float32) for i in range(8)]
+
+    results = submit_concurrently(batcher, rows)
+    batcher.close()
+
+    # Every request gets its own row's prediction
+    assert [result['sum'] for result in results] == [4.0 * i for i in range(8)]
+    assert sum(classifier.calls) == 8
+    assert len(classifier.calls) < 8
+    assert batcher.stats()['batches'] == len(classifier.calls)
+
+
+def test_batches_are_capped_at_max_batch_size():
+    classifier = FakeClassifier()
+    batcher = ClassificationBatcher(classifier, max_batch_size=3, max_wait_ms=200)
+    submit_concurrently(batcher, [np.ones(2, dtype=np.float32)] * 7)
+    batcher.close()
+    assert max(classifier.calls) <= 3
+    assert sum(classifier.calls) == 7
+
+
+def test_a_bad_row_size_only_fails_its_own_group():
+    classifier = FakeClassifier(fail_size=5)
+    batcher = ClassificationBatcher(classifier, max_batch_size=8, max_wait_ms=200)
+    good = batcher.submit(np.ones(4, dtype=np.float32))
+    bad = batcher.submit(np.ones(5, dtype=np.float32))
+
+    assert good.result(timeout=5)['sum'] == 4.0
+    with pytest.raises(ValueError):
+        bad.result(timeout=5)
+    batcher.close()
+    assert batcher.failures == 1
+
+
+def test_swapped_classifier_serves_later_requests():
+    batcher = ClassificationBatcher(FakeClassifier(), max_wait_ms=0)
+    replacement = FakeClassifier()
+    batcher.swap_classifier(replacement)
+    batcher.predict_features(np.ones(3, dtype=np.float32))
+    batcher.close()
+    assert replacement.calls == [1]
+
+
+def test_closed_batcher_rejects_requests():
+    batcher = ClassificationBatcher(FakeClassifier())
+    batcher.close()
+    with pytest.raises(RuntimeError):
+        batcher.submit(np.ones(3, dtype=np.float32))
+
+
+def test_max_batch_size_must_be_positive():
+    with pytest.raises(ValueError):
+        ClassificationBatcher(FakeClassifier(), max_batch_size=0)
@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+
+from form_rules import (CompiledRules, form_issues, form_recommendations, form_scores, symmetry_scores,
+                        FORM_RULES)
+from pose_features import ANGLE_NAMES, PoseFeatures
+
+
+def pose(points=None, body_line=170.0, visible=1.0):
+    """Single-pose features: symmetric upright landmarks, with `points` {index: (x, y)} overridden"""
+    normalized = np.zeros((33, 3))
+    for left, right, y in ((11, 12, -1.0), (13, 14, -0.6), (15, 16, -0.2), (23, 24, 0.0),
+                           (25, 26, 0.5), (27, 28, 1.0)):
+        normalized[left, :2] = (-0.15, y)
+        normalized[right, :2] = (0.15, y)
+    for index, (x, y) in (points or {}).items():
+        normalized[index, :2] = (x, y)
+    angles = np.full(len(ANGLE_NAMES), 170.0)
+    angles[ANGLE_NAMES.index('left_body_line')] = body_line
+    visibility = np.full(33, visible) if np.isscalar(visible) else np.asarray(visible, dtype=np.float64)
+    return PoseFeatures(normalized, visibility, angles, np.zeros(3), np.ones(()))
+
+
+def rule(**overrides):
+    base = {'name': 'r', 'kind': 'distance', 'points': (11, 12), 'axis': 'y', 'max': 0.1,
+            'message': 'm', 'severity': 'warning'}
+    return dict(base, **overrides)
+
+
+def test_good_squat_has_no_issues():
+    assert form_issues(pose(), 'squat') == []
+
+
+def test_distance_rule_violation_reports_value_and_severity():
+    # Knees 0.3 + 0.15 apart horizontally: beyond the 0.33 torso-length limit
+    issues = form_issues(pose({25: (-0.3, 0.5), 26: (0.15, 0.5)}), 'squat')
+    assert [issue['rule'] for issue in issues] == ['knee_alignment']
+    assert issues[0]['severity'] == 'warning'
+    assert issues[0]['value'] == pytest.approx(0.45)
+
+
+def test_threshold_is_inclusive():
+    rules = CompiledRules((rule(max=0.2),))
+    at_limit = PoseFeatures.stack([pose({11: (-0.15, -1.0), 12: (0.15, -0.8)})])
+    values, violated = rules.evaluate(at_limit)
+    assert values[0, 0] == pytest.approx(0.2)
+    assert not violated[0, 0]
+
+
+def test_xy_distance_is_euclidean():
+    rules = CompiledRules((rule(axis='xy', max=10.0),))
+    values, _ = rules.evaluate(PoseFeatures.stack([pose({11: (0.0, 0.0), 12: (0.3, 0.4)})]))
+    assert values[0, 0] == pytest.approx(0.5)
+
+
+def test_angle_rule_only_applies_to_visible_joints():
+    sagging = pose(body_line=120.0)
+    assert [issue['rule'] for issue in form_issues(sagging, 'pushup')] == ['hip_line']
+
+    hidden = np.ones(33)
+    hidden[[11, 23, 27]] = 0.2
+    assert form_issues(pose(body_line=120.0, visible=hidden), 'pushup') == []
+
+
+def test_batch_matches_single_poses():
+    poses = [pose(), pose({12: (0.15, -0.7)}), pose(body_line=120.0), pose({23: (0.5, 0.0)})]
+    batch = form_recommendations(PoseFeatures.stack(poses), 'pushup')
+    assert batch == [[issue['message'] for issue in form_issues(single, 'pushup')] for single in poses]
+    assert batch[0] == []
+    assert batch[1] == ["Keep your shoulders level"]
+
+
+def test_recommendations_follow_table_order():
+    everything_off = pose({12: (0.15, -0.7), 23: (0.5, 0.0)}, body_line=120.0)
+    messages = form_recommendations(PoseFeatures.stack([everything_off]), 'pushup')[0]
+    assert messages == [rule['message'] for rule in FORM_RULES['pushup']]
+
+
+def test_exercises_without_rules_and_case_insensitive_names():
+    assert form_issues(pose({25: (-0.5, 0.5)}), 'general') == []
+    assert form_issues(pose({25: (-0.5, 0.5)}), 'SQUAT')[0]['rule'] == 'knee_alignment'
+
+
+def test_invalid_rules_are_rejected():
+    with pytest.raises(ValueError):
+        CompiledRules((rule(kind='speed'),))
+    with pytest.raises(ValueError):
+        CompiledRules((rule(severity='fatal'),))
+
+
+def test_symmetry_and_form_scores():
+    level = PoseFeatures.stack([pose()])
+    assert symmetry_scores(level)[0] == pytest.approx(1.0)
+    assert form_scores(level)[0] == pytest.approx(1.0)
+
+    # One wrist 0.67 torso lengths lower: that pair scores 0, the other five 1
+    tilted = PoseFeatures.stack([pose({16: (0.15, 0.47)})])
+    assert symmetry_scores(tilted)[0] == pytest.approx(5.0 / 6.0)
+
+    hidden = PoseFeatures.stack([pose(visible=0.0)])
+    assert symmetry_scores(hidden)[0] == 0.0
+    assert form_scores(hidden)[0] == 0.0
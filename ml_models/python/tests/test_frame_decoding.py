@@ -0,0 +1,118 @@
+import base64
+import io
+
+import cv2
+import numpy as np
+import pytest
+from werkzeug.datastructures import Headers
+
+from frame_decoding import FrameDecodeError, FrameDecoder
+
+
+def bgr_frame(height=32, width=48):
+    """Smooth test image (chroma subsampling keeps it close to the original)"""
+    y, x = np.mgrid[0:height, 0:width]
+    frame = np.stack([x * 255 // width, y * 255 // height, (x + y) * 255 // (width + height)], axis=-1)
+    return frame.astype(np.uint8)
+
+
+def yuv_payload(frame, frame_format):
+    """Encode a BGR frame as an I420 / NV12 / NV21 buffer"""
+    i420 = cv2.cvtColor(frame, cv2.COLOR_BGR2YUV_I420)
+    if frame_format == 'i420':
+        return i420.tobytes()
+    h, w = frame.shape[:2]
+    luma = i420[:h].reshape(-1)
+    chroma = i420[h:].reshape(-1)
+    u, v = chroma[:len(chroma) // 2], chroma[len(chroma) // 2:]
+    interleaved = np.empty(len(chroma), dtype=np.uint8)
+    interleaved[0::2], interleaved[1::2] = (u, v) if frame_format == 'nv12' else (v, u)
+    return np.concatenate([luma, interleaved]).tobytes()
+
+
+def descriptor(frame_format, width=48, height=32):
+    return {'kind': 'raw', 'format': frame_format, 'width': width, 'height': height}
+
+
+@pytest.mark.parametrize('frame_format', ['i420', 'nv12', 'nv21'])
+def test_yuv_frames_decode_to_bgr(frame_format):
+    frame = bgr_frame()
+    decoded = FrameDecoder().decode_payload(memoryview(yuv_payload(frame, frame_format)), descriptor(frame_format))
+    assert decoded.shape == frame.shape
+    # YUV 4:2:0 round trips are lossy, but only by a few levels on a smooth image
+    assert np.abs(decoded.astype(int) - frame.astype(int)).mean() < 4.0
+
+
+def test_swapped_chroma_order_changes_the_colours():
+    frame = bgr_frame()
+    decoder = FrameDecoder()
+    payload = memoryview(yuv_payload(frame, 'nv12'))
+    as_nv12 = decoder.decode_payload(payload, descriptor('nv12')).copy()
+    as_nv21 = decoder.decode_payload(payload, descriptor('nv21'))
+    assert np.abs(as_nv12.astype(int) - as_nv21.astype(int)).mean() > 4.0
+
+
+def test_rgba_frames_decode_exactly():
+    frame = bgr_frame()
+    rgba = cv2.cvtColor(frame, cv2.COLOR_BGR2RGBA)
+    decoded = FrameDecoder().decode_payload(memoryview(rgba.tobytes()), descriptor('rgba'))
+    np.testing.assert_array_equal(decoded, frame)
+
+
+def test_raw_frames_reuse_the_thread_buffer():
+    decoder = FrameDecoder()
+    payload = memoryview(cv2.cvtColor(bgr_frame(), cv2.COLOR_BGR2RGBA).tobytes())
+    first = decoder.decode_payload(payload, descriptor('rgba'))
+    second = decoder.decode_payload(payload, descriptor('rgba'))
+    assert first is second
+
+
+def test_raw_frame_size_must_match_the_headers():
+    with pytest.raises(FrameDecodeError, match='Expected 6144 bytes'):
+        FrameDecoder().decode_payload(memoryview(bytes(100)), descriptor('rgba'))
+
+
+@pytest.mark.parametrize('headers, message', [
+    ({'X-Frame-Format': 'bgr24', 'X-Frame-Width': '4', 'X-Frame-Height': '4'}, 'Unsupported'),
+    ({'X-Frame-Format': 'nv12'}, 'headers are required'),
+    ({'X-Frame-Format': 'nv12', 'X-Frame-Width': '0', 'X-Frame-Height': '4'}, 'must be positive'),
+])
+def test_raw_descriptor_validation(headers, message):
+    with pytest.raises(FrameDecodeError, match=message):
+        FrameDecoder().raw_descriptor(Headers(headers))
+
+
+def test_raw_descriptor_is_case_insensitive():
+    headers = Headers({'X-Frame-Format': 'NV21', 'X-Frame-Width': '640', 'X-Frame-Height': '480'})
+    assert FrameDecoder().raw_descriptor(headers) == descriptor('nv21', 640, 480)
+
+
+def test_base64_images_with_and_without_data_url_prefix():
+    frame = bgr_frame()
+    encoded = base64.b64encode(cv2.imencode('.png', frame)[1].tobytes()).decode()
+    decoder = FrameDecoder()
+    np.testing.assert_array_equal(decoder.decode_base64(encoded), frame)
+    np.testing.assert_array_equal(decoder.decode_base64('data:image/png;base64,' + encoded), frame)
+
+
+@pytest.mark.parametrize('image', ['not base64!', base64.b64encode(b'not an image').decode(), ''])
+def test_bad_base64_images_are_decode_errors(image):
+    with pytest.raises(FrameDecodeError):
+        FrameDecoder().decode_base64(image)
+
+
+@pytest.mark.parametrize('image', [None, 42, ['aGk='], {'data': 'aGk='}])
+def test_non_string_images_are_decode_errors(image):
+    with pytest.raises(FrameDecodeError, match='base64 string'):
+        FrameDecoder().base64_payload(image)
+
+
+def test_stream_reads_grow_the_buffer_and_enforce_the_limit():
+    decoder = FrameDecoder(max_frame_bytes=300 * 1024)
+    body = bytes(range(256)) * 1000
+    assert bytes(decoder._read_stream(io.BytesIO(body), None)) == body
+
+    with pytest.raises(FrameDecodeError, match='exceeds'):
+        decoder._read_stream(io.BytesIO(bytes(400 * 1024)), None)
+    with pytest.raises(FrameDecodeError, match='exceeds'):
+        decoder._read_stream(io.BytesIO(b''), 400 * 1024)
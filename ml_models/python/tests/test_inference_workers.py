@@ -0,0 +1,80 @@
+import queue
+from multiprocessing import shared_memory
+
+import pytest
+
+from detector_pool import PoolExhaustedError
+from inference_workers import InferenceWorkerPool, WorkerUnavailableError, _WorkerHandle
+
+
+class FakeConn:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, message):
+        self.sent.append(message)
+
+
+class RestartingQueue(queue.Queue):
+    """Hands out a slot, then simulates the worker restarting before it is used"""
+
+    def __init__(self, worker, slots):
+        super().__init__()
+        self.worker = worker
+        for slot in range(slots):
+            self.put(slot)
+
+    def get(self, *args, **kwargs):
+        slot = super().get(*args, **kwargs)
+        with self.worker.lock:
+            self.worker.reset_slots()
+        return slot
+
+
+@pytest.fixture
+def pool():
+    pool = InferenceWorkerPool(1, slots_per_worker=2, slot_bytes=64, request_timeout=1.0)
+    segments = [shared_memory.SharedMemory(create=True, size=64) for _ in range(2)]
+    worker = _WorkerHandle(0, segments)
+    worker.conn = FakeConn()
+    worker.reset_slots()
+    worker.ready.set()
+    pool._workers.append(worker)
+    yield pool
+    for segment in segments:
+        segment.close()
+        segment.unlink()
+
+
+def test_submit_writes_the_frame_into_a_free_slot(pool):
+    worker = pool._workers[0]
+    pool.submit(b'frame', {'kind': 'encoded'}, {})
+    _, request_id, (slot, lengths, *_) = worker.conn.sent[0]
+    assert bytes(worker.segments[slot].buf[:5]) == b'frame'
+    assert lengths == [5]
+    assert worker.pending[request_id][1] == slot
+    assert worker.free_slots.qsize() == 1
+
+
+def test_slots_from_before_a_restart_are_not_reused(pool):
+    worker = pool._workers[0]
+    worker.free_slots = RestartingQueue(worker, 2)
+
+    with pytest.raises(WorkerUnavailableError, match='restarting'):
+        pool.submit(b'frame', {'kind': 'encoded'}, {})
+
+    # Nothing was written, sent or returned into the new generation
+    assert worker.conn.sent == []
+    assert worker.pending == {}
+    assert sorted(worker.free_slots.queue) == [0, 1]
+    assert bytes(worker.segments[0].buf[:5]) == bytes(5)
+
+
+def test_saturated_worker_is_pool_exhausted(pool):
+    worker = pool._workers[0]
+    pool.request_timeout = 0.01
+    for _ in range(2):
+        pool.submit(b'x', {'kind': 'encoded'}, {})
+    with pytest.raises(PoolExhaustedError):
+        pool.submit(b'x', {'kind': 'encoded'}, {})
+    assert len(worker.pending) == 2
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from landmark_arrays import to_normalized
+from pose_features import FEATURE_VECTOR_SIZE, FeatureExtractor, compute_pose_features
+from synthetic_poses import TEMPLATES
+
+
+def pixel_pose(frame_shape, seed=0):
+    """(33, 4) pixel keypoints (whole pixels, as served) of a template pose"""
+    h, w = frame_shape[:2]
+    template = TEMPLATES[0, :, :2]
+    rng = np.random.default_rng(seed)
+    xy = np.clip(template + rng.normal(0, 0.01, template.shape), 0.0, 1.0)
+    keypoints = np.zeros((33, 4), dtype=np.float32)
+    keypoints[:, 0] = np.trunc(xy[:, 0] * w)
+    keypoints[:, 1] = np.trunc(xy[:, 1] * h)
+    keypoints[:, 2] = rng.normal(0, 0.05, 33)
+    keypoints[:, 3] = 1.0
+    return keypoints
+
+
+@pytest.mark.parametrize('frame_shape', [(480, 640), (720, 1280), (1280, 720)])
+def test_pixel_keypoints_give_training_features(frame_shape):
+    keypoints = pixel_pose(frame_shape)
+    normalized = keypoints.copy()
+    normalized[:, 0] /= frame_shape[1]
+    normalized[:, 1] /= frame_shape[0]
+
+    served = FeatureExtractor().extract(keypoints, 0.0, frame_shape)
+    trained = compute_pose_features(normalized)
+
+    assert served.vector.shape == (FEATURE_VECTOR_SIZE,)
+    np.testing.assert_allclose(served.vector, trained.vector, atol=1e-5)
+    np.testing.assert_allclose(served.angles, trained.angles, atol=1e-3)
+
+
+def test_raw_pixel_keypoints_differ_from_training_features():
+    keypoints = pixel_pose((480, 640))
+    served = FeatureExtractor().extract(keypoints, 0.0, (480, 640))
+    unnormalized = compute_pose_features(keypoints)
+    assert np.abs(served.vector - unnormalized.vector).max() > 0.01
+
+
+def test_to_normalized_inverts_pixel_scaling():
+    keypoints = pixel_pose((480, 640))
+    normalized = to_normalized(keypoints, (480, 640, 3))
+    np.testing.assert_allclose(normalized[:, 0] * 640, keypoints[:, 0], atol=1e-3)
+    np.testing.assert_allclose(normalized[:, 1] * 480, keypoints[:, 1], atol=1e-3)
+    np.testing.assert_array_equal(normalized[:, 2:], keypoints[:, 2:])
+
+
+def test_velocities_need_a_previous_pose():
+    extractor = FeatureExtractor()
+    first = extractor.extract(pixel_pose((480, 640), seed=1), 1.0, (480, 640))
+    second = extractor.extract(pixel_pose((480, 640), seed=2), 1.5, (480, 640))
+    assert first.velocity is None
+    assert second.velocity.shape == (33, 2)
+    assert extractor.extract(None, 2.0) is None
+    assert extractor.extract(pixel_pose((480, 640)), 2.5, (480, 640)).velocity is None
@@ -0,0 +1,163 @@
+import numpy as np
+import pytest
+
+from pose_features import ANGLE_NAMES, PoseFeatures
+from rep_counting import MAX_GAP_S, LandmarkRingBuffer, RepCounter
+
+FPS = 10.0
+
+
+def pose(angles=None, horizontal=False, visible=1.0):
+    """Features of a pose with the given feature angles (degrees; others 170)"""
+    values = np.full(len(ANGLE_NAMES), 170.0)
+    for name, angle in (angles or {}).items():
+        values[ANGLE_NAMES.index(name)] = angle
+    normalized = np.zeros((33, 3))
+    # Shoulders and ankles lie along the body: horizontal for a plank, vertical standing
+    for shoulder, ankle in ((11, 27), (12, 28)):
+        normalized[shoulder, :2] = (-1.0, 0.0) if horizontal else (0.0, -1.0)
+        normalized[ankle, :2] = (1.5, 0.1) if horizontal else (0.0, 1.5)
+    return PoseFeatures(normalized, np.full(33, visible), values, np.zeros(3), np.ones(()))
+
+
+def knees(angle):
+    return pose({'left_knee': angle, 'right_knee': angle})
+
+
+def feed(counter, exercise, poses, start=0.0):
+    """Feed poses at FPS; returns the last state and every event"""
+    events = []
+    state = None
+    for i, features in enumerate(poses):
+        state = counter.update(features, exercise, start + i / FPS)
+        events.extend(state['events'])
+    return state, events
+
+
+def squat_rep(frames=5):
+    """Stand, go below depth, stand up again (each stage held for `frames` frames)"""
+    return [knees(170)] * frames + [knees(130)] * frames + [knees(90)] * frames + \
+           [knees(130)] * frames + [knees(170)] * frames
+
+
+def test_full_squat_counts_one_rep_with_tempo():
+    state, events = feed(RepCounter(), 'squat', squat_rep())
+
+    assert state['reps'] == 1
+    assert state['partial_reps'] == 0
+    assert state['phase'] == 'rest'
+    phases = [event['phase'] for event in events if event['type'] == 'phase']
+    assert phases == ['rest', 'eccentric', 'bottom', 'concentric', 'rest']
+    tempo = state['last_rep']
+    assert tempo['duration_s'] == pytest.approx(
+        tempo['eccentric_s'] + tempo['bottom_s'] + tempo['concentric_s'], abs=1e-6)
+    assert all(value > 0 for value in tempo.values())
+
+
+def test_repeated_squats_keep_counting():
+    state, events = feed(RepCounter(), 'squat', squat_rep() * 3)
+    assert state['reps'] == 3
+    assert [event['count'] for event in events if event['type'] == 'rep'] == [1, 2, 3]
+
+
+def test_turning_back_before_depth_is_a_partial_rep():
+    poses = [knees(170)] * 5 + [knees(135)] * 5 + [knees(170)] * 5
+    state, _ = feed(RepCounter(), 'squat', poses)
+    assert state['reps'] == 0
+    assert state['partial_reps'] == 1
+
+
+def test_counting_waits_for_the_start_position():
+    counter = RepCounter()
+    state, _ = feed(counter, 'squat', [knees(90)] * 5 + [knees(130)] * 5)
+    assert state['phase'] == 'setup'
+
+    state, _ = feed(counter, 'squat', [knees(170)] * 5, start=1.0)
+    assert state['phase'] == 'rest'
+    assert state['reps'] == 0
+
+
+def test_smoothing_ignores_a_single_frame_spike():
+    poses = [knees(170)] * 5 + [knees(90)] + [knees(170)] * 5
+    state, events = feed(RepCounter(), 'squat', poses)
+    assert state['reps'] == 0
+    assert not any(event['type'] == 'phase' and event['phase'] == 'bottom' for event in events)
+
+
+def test_long_gap_abandons_the_unfinished_rep():
+    counter = RepCounter()
+    feed(counter, 'squat', [knees(170)] * 5 + [knees(130)] * 5 + [knees(90)] * 5)
+    assert counter.phase == 'bottom'
+
+    resume = 1.5 + MAX_GAP_S + 0.5
+    state = counter.update(knees(170), 'squat', resume)
+    assert state['reps'] == 0
+    assert state['phase'] == 'rest'
+
+
+def test_missing_pose_keeps_state_without_tracking():
+    counter = RepCounter()
+    feed(counter, 'squat', [knees(170)] * 5)
+    state = counter.update(None, 'squat', 0.6)
+    assert state['phase'] == 'rest'
+    assert state['angle'] is None
+    assert state['angular_velocity'] is None
+
+
+def test_plank_accumulates_hold_time():
+    counter = RepCounter()
+    holding = pose({'left_body_line': 175, 'right_body_line': 175}, horizontal=True)
+    state, _ = feed(counter, 'plank', [holding] * 31)
+    assert state['phase'] == 'hold'
+    assert state['hold_s'] == pytest.approx(3.0, abs=0.11)
+
+    # Sagging hips end the hold; the time held so far is kept
+    sagging = pose({'left_body_line': 140, 'right_body_line': 140}, horizontal=True)
+    state, events = feed(counter, 'plank', [sagging] * 5, start=3.1)
+    assert state['phase'] == 'rest'
+    assert [event['type'] for event in events].count('hold') == 1
+    assert state['hold_s'] == pytest.approx(3.1, abs=0.21)
+
+
+def test_plank_needs_a_horizontal_body():
+    standing = pose({'left_body_line': 178, 'right_body_line': 178}, horizontal=False)
+    state, _ = feed(RepCounter(), 'plank', [standing] * 10)
+    assert state['phase'] != 'hold'
+    assert state['hold_s'] == 0.0
+
+
+def test_invisible_joints_are_not_tracked():
+    state, _ = feed(RepCounter(), 'squat', [pose(visible=0.1)] * 5)
+    assert state['angle'] is None
+    assert state['phase'] == 'setup'
+
+
+def test_changing_exercise_resets_the_count():
+    counter = RepCounter()
+    feed(counter, 'squat', squat_rep())
+    assert counter.reps == 1
+    counter.update(pose(), 'pushup', 10.0)
+    assert counter.reps == 0
+    assert counter.exercise == 'pushup'
+
+
+def test_exercises_without_a_spec_return_none():
+    assert RepCounter().update(knees(170), 'general', 0.0) is None
+
+
+def test_ring_buffer_smoothing_and_velocity():
+    buffer = LandmarkRingBuffer(capacity=4, landmark_count=2, smoothing=2)
+    landmarks = np.zeros((2, 3))
+    for i, angle in enumerate([10.0, 20.0, 30.0, 40.0, 50.0, 60.0]):
+        buffer.push(landmarks, i * 0.5, angle)
+
+    assert buffer.count == 4
+    assert buffer.smoothed_angle() == pytest.approx(55.0)
+    # Oldest kept entry is 30 degrees at t=1.0, newest 60 at t=2.5
+    assert buffer.angular_velocity(frames=10) == pytest.approx(20.0)
+    assert buffer.angular_velocity(frames=1) == pytest.approx(20.0)
+
+
+def test_ring_buffer_rejects_bad_smoothing():
+    with pytest.raises(ValueError):
+        LandmarkRingBuffer(capacity=3, smoothing=4)
@@ -0,0 +1,85 @@
+import numpy as np
+
+import result_cache
+from result_cache import ResultCache, frame_hash
+
+
+def frame(value=0, shape=(48, 64, 3)):
+    image = np.zeros(shape, dtype=np.uint8)
+    image[10:20, 10:20] = value
+    return image
+
+
+def result(size=1000):
+    return {'payload': b'x' * size}
+
+
+def test_frame_hash_is_bit_exact():
+    assert frame_hash(frame(200)) == frame_hash(frame(200).copy())
+    shifted = np.roll(frame(200), 1, axis=1)
+    assert frame_hash(shifted) != frame_hash(frame(200))
+    assert frame_hash(frame(201)) != frame_hash(frame(200))
+    # Same bytes, different layout
+    assert frame_hash(frame(0, (64, 48, 3))) != frame_hash(frame(0))
+
+
+def test_sessions_and_options_are_part_of_the_key():
+    image = frame(200)
+    key = ResultCache.key(image, {'exercise_type': 'squat'}, True, 'a')
+    assert key == ResultCache.key(image.copy(), {'exercise_type': 'squat', 'image': '...'}, True, 'a')
+    assert key != ResultCache.key(image, {'exercise_type': 'squat'}, True, 'b')
+    assert key != ResultCache.key(image, {'exercise_type': 'pushup'}, True, 'a')
+    assert key != ResultCache.key(image, {'exercise_type': 'squat'}, False, 'a')
+
+
+def test_hits_are_marked_copies():
+    cache = ResultCache(max_bytes=1 << 20)
+    stored = result()
+    cache.put('k', stored)
+    hit = cache.get('k')
+    assert hit['cached'] is True
+    assert 'cached' not in stored
+    assert cache.get('missing') is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = ResultCache(max_bytes=3500)
+    for key in 'abc':
+        cache.put(key, result())
+    cache.get('a')
+    cache.put('d', result())
+
+    assert cache.get('b') is None
+    assert all(cache.get(key) is not None for key in 'acd')
+    assert cache.evictions == 1
+    assert cache.stats()['bytes'] <= 3500
+
+
+def test_oversized_results_are_not_stored():
+    cache = ResultCache(max_bytes=500)
+    cache.put('k', result(1000))
+    assert cache.stats()['entries'] == 0
+
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(result_cache.time, 'monotonic', lambda: now[0])
+    cache = ResultCache(max_bytes=1 << 20, ttl_s=30.0)
+    cache.put('k', result())
+
+    now[0] = 129.0
+    assert cache.get('k') is not None
+    now[0] = 130.5
+    assert cache.get('k') is None
+    assert cache.expirations == 1
+    assert cache.stats()['entries'] == 0
+
+
+def test_zero_budget_disables_and_clear_empties():
+    assert not ResultCache(max_bytes=0).enabled
+    cache = ResultCache(max_bytes=1 << 20)
+    cache.put('k', result())
+    cache.clear()
+    assert cache.get('k') is None
+    assert cache.stats()['bytes'] == 0
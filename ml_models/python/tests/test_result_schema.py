@@ -0,0 +1,107 @@
+import cv2
+import numpy as np
+import pytest
+
+from result_schema import apply_output_options, encode_mask, mask_polygon, mask_rle, pack_keypoints
+
+
+def decode_rle(counts, shape):
+    """Inverse of mask_rle: alternating background / foreground runs"""
+    values = np.repeat(np.arange(len(counts)) % 2, counts).astype(bool)
+    return values.reshape(shape)
+
+
+def soft_mask(height=60, width=80):
+    mask = np.zeros((height, width), dtype=np.float32)
+    mask[15:45, 20:50] = 0.9
+    return mask
+
+
+@pytest.mark.parametrize('binary', [
+    np.zeros((3, 4), dtype=bool),
+    np.ones((3, 4), dtype=bool),
+    np.eye(4, dtype=bool),
+    soft_mask() > 0.5,
+])
+def test_rle_round_trips(binary):
+    counts = mask_rle(binary)
+    assert sum(counts) == binary.size
+    np.testing.assert_array_equal(decode_rle(counts, binary.shape), binary)
+
+
+def test_rle_starts_with_a_background_run():
+    assert mask_rle(np.array([[True, True, False]])) == [0, 2, 1]
+    assert mask_rle(np.array([[False, True, True]])) == [1, 2]
+    assert mask_rle(np.zeros((0, 0), dtype=bool)) == []
+
+
+def test_polygon_outlines_the_largest_region():
+    mask = soft_mask()
+    mask[2:5, 2:5] = 1.0
+    points = np.array(mask_polygon(mask))
+    assert len(points) == 4
+    assert points[:, 0].min() == 20 and points[:, 0].max() == 49
+    assert points[:, 1].min() == 15 and points[:, 1].max() == 44
+    assert mask_polygon(np.zeros((10, 10), dtype=np.float32)) == []
+
+
+def test_raster_encodings_are_downscaled_to_mask_size():
+    encoded = encode_mask(soft_mask(), 'rle', max_size=40)
+    assert (encoded['width'], encoded['height']) == (40, 30)
+    assert (encoded['frame_width'], encoded['frame_height']) == (80, 60)
+    assert sum(encoded['counts']) == 40 * 30
+
+    downsampled = encode_mask(soft_mask(), 'downsampled')
+    assert len(downsampled['data']) == downsampled['width'] * downsampled['height']
+
+
+def test_png_encoding_decodes_to_the_thresholded_mask():
+    encoded = encode_mask(soft_mask(), 'png')
+    decoded = cv2.imdecode(np.frombuffer(encoded['data'], np.uint8), cv2.IMREAD_GRAYSCALE)
+    np.testing.assert_array_equal(decoded > 0, soft_mask() > 0.5)
+
+
+def detection_result():
+    keypoint_array = np.arange(33 * 4, dtype=np.float32).reshape(33, 4)
+    return {
+        'pose_detection': {
+            'keypoints': [{'x': float(x), 'y': float(y), 'z': float(z), 'visibility': float(v)}
+                          for x, y, z, v in keypoint_array],
+            'landmarks': keypoint_array[:, :3].tolist(),
+            'keypoint_array': keypoint_array,
+            'features': object(),
+            'segmentation_mask': soft_mask()
+        }
+    }
+
+
+def test_defaults_drop_the_mask_and_intermediates():
+    pose = apply_output_options(detection_result(), {})['pose_detection']
+    assert pose['segmentation_mask'] is None
+    assert 'keypoint_array' not in pose and 'features' not in pose
+    assert len(pose['keypoints']) == 33 and 'landmarks' in pose
+
+
+@pytest.mark.parametrize('keypoints_format', ['flat', 'binary'])
+def test_compact_keypoint_formats(keypoints_format):
+    pose = apply_output_options(detection_result(), {'keypoints_format': keypoints_format,
+                                                     'mask': 'rle'})['pose_detection']
+    keypoints = pose['keypoints']
+    if keypoints_format == 'binary':
+        keypoints = np.frombuffer(keypoints, dtype=np.float32)
+    np.testing.assert_array_equal(keypoints, np.arange(33 * 4, dtype=np.float32))
+    assert pose['keypoints_shape'] == [33, 4]
+    assert 'landmarks' not in pose
+    assert pose['segmentation_mask']['encoding'] == 'rle'
+
+
+def test_pack_keypoints_matches_the_array_layout():
+    pose = detection_result()['pose_detection']
+    np.testing.assert_array_equal(pack_keypoints(pose['keypoints']), pose['keypoint_array'].ravel())
+    assert pack_keypoints([]).size == 0
+
+
+@pytest.mark.parametrize('options', [{'mask': 'jpeg'}, {'keypoints_format': 'xml'}, {'mask_size': 'big'}])
+def test_invalid_options_are_value_errors(options):
+    with pytest.raises(ValueError):
+        apply_output_options(detection_result(), options)
@@ -0,0 +1,78 @@
+import os
+
+import pytest
+
+from train_exercise_classifier import serving_model_dir
+from training_jobs import TrainingJob, TrainingJobManager, resolve_training_parameters
+
+
+class FakeServer:
+    """Loads a staged "model" (its model.txt) and records what was swapped in"""
+
+    def __init__(self, model_dir):
+        self.model_dir = model_dir
+        self.installed = []
+
+    def load(self, path):
+        with open(os.path.join(path, 'model.txt')) as f:
+            model = f.read()
+        if model == 'broken':
+            raise ValueError('cannot load')
+        return model
+
+    def install(self, model):
+        # The new version is already the one on disk when the swap happens
+        assert self.load(serving_model_dir(self.model_dir)) == model
+        self.installed.append(model)
+
+
+@pytest.fixture
+def server(tmp_path):
+    return FakeServer(str(tmp_path))
+
+
+def promote(server, content):
+    manager = TrainingJobManager(server.model_dir, server.load, server.install)
+    job = TrainingJob({})
+    staging_dir = os.path.join(server.model_dir, '.staging', job.id)
+    os.makedirs(staging_dir)
+    with open(os.path.join(staging_dir, 'model.txt'), 'w') as f:
+        f.write(content)
+    manager._promote(job, staging_dir)
+    return job
+
+
+def test_promotion_switches_the_serving_link(server):
+    job = promote(server, 'v1')
+    assert server.installed == ['v1']
+    assert serving_model_dir(server.model_dir) == os.path.realpath(
+        os.path.join(server.model_dir, 'versions', job.id))
+    assert not os.path.exists(os.path.join(server.model_dir, '.staging', job.id))
+
+
+def test_unloadable_model_leaves_the_serving_model_untouched(server):
+    promote(server, 'v1')
+    serving = serving_model_dir(server.model_dir)
+
+    with pytest.raises(ValueError):
+        promote(server, 'broken')
+    assert serving_model_dir(server.model_dir) == serving
+    assert server.installed == ['v1']
+    assert os.listdir(os.path.join(server.model_dir, 'versions')) == [os.path.basename(serving)]
+
+
+def test_only_the_current_and_previous_versions_are_kept(server):
+    jobs = [promote(server, f'v{i}') for i in range(3)]
+    versions = sorted(os.listdir(os.path.join(server.model_dir, 'versions')))
+    assert versions == sorted(job.id for job in jobs[1:])
+    assert server.installed == ['v0', 'v1', 'v2']
+
+
+def test_flat_model_dir_is_served_without_a_link(server):
+    assert serving_model_dir(server.model_dir) == server.model_dir
+
+
+@pytest.mark.parametrize('options', [{'epochs': 0}, {'batch_size': 'many'}, {'num_samples': 10 ** 6}])
+def test_invalid_training_parameters(options):
+    with pytest.raises(ValueError):
+        resolve_training_parameters(options)
@@ -0,0 +1,69 @@
+import threading
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+import video_analysis
+from video_analysis import VideoAnalyzer
+
+
+class FakeDetector:
+    """Never finds a person; optionally raises on one frame"""
+
+    analysis_profile = 'pose_only'
+
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+        self.calls = 0
+
+    def process_video_frame(self, frame, exercise_type, analysis_profile, adaptive, roi):
+        self.calls += 1
+        if self.calls == self.fail_on:
+            raise RuntimeError('boom')
+        return {'pose_detection': {'is_human_detected': False, 'keypoint_array': None}}
+
+
+@pytest.fixture
+def clip(tmp_path):
+    path = str(tmp_path / 'clip.avi')
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 30.0, (64, 48))
+    for i in range(40):
+        writer.write(np.full((48, 64, 3), i * 5, dtype=np.uint8))
+    writer.release()
+    return path
+
+
+def run_with_timeout(analyzer, path, timeout=10.0):
+    outcome = {}
+
+    def target():
+        try:
+            outcome['result'] = analyzer.analyze(path, include_track=False)
+        except Exception as e:
+            outcome['error'] = e
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), 'analyze() did not return'
+    return outcome
+
+
+def test_every_frame_reaches_the_summary(clip):
+    outcome = run_with_timeout(VideoAnalyzer(FakeDetector(), queue_size=1), clip)
+    report = outcome['result']['report']
+    assert report['frames_inferred'] == 40
+
+
+def test_detector_errors_are_raised_while_the_postprocessor_is_behind(clip, monkeypatch):
+    add = video_analysis._ClipSummary.add
+
+    def slow_add(self, *args):
+        time.sleep(0.25)
+        add(self, *args)
+
+    monkeypatch.setattr(video_analysis._ClipSummary, 'add', slow_add)
+    outcome = run_with_timeout(VideoAnalyzer(FakeDetector(fail_on=6), queue_size=1), clip)
+    assert str(outcome.get('error')) == 'boom'
@@ -0,0 +1,60 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Sequence
+
+
+class StageTimer:
+    """
+    Collect wall-clock durations (in milliseconds) for the named stages of a request
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the enclosed block and add it to the named stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000.0
+            self.stages[name] = self.stages.get(name, 0.0) + elapsed_ms
+
+    def as_dict(self) -> Dict[str, float]:
+        """Return the per-stage breakdown plus the total time since creation"""
+        timings = {name: round(ms, 3) for name, ms in self.stages.items()}
+        timings['total'] = round((time.perf_counter() - self._start) * 1000.0, 3)
+        return timings
+
+
+class Histogram:
+    """
+    Thread-safe fixed-bucket histogram (each bucket counts values <= its upper bound)
+    """
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = sorted(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += value
+
+    def as_dict(self) -> Dict:
+        with self._lock:
+            labels = [f'<={bound:g}' for bound in self.bounds] + ['+inf']
+            return {
+                'buckets': dict(zip(labels, self.counts)),
+                'count': self.count,
+                'mean': round(self.total / self.count, 3) if self.count else 0.0
+            }
@@ -1,142 +1,132 @@
-import tensorflow as tf
 import numpy as np
-import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder, StandardScaler
 import json
 import os
-import cv2
-from typing import List, Dict, Tuple
-import matplotlib.pyplot as plt
-import seaborn as sns
+from typing import TYPE_CHECKING, List, Dict, Optional, Sequence, Tuple, Union
+
+# TensorFlow, scikit-learn, pandas and matplotlib are imported where they are
+# first needed, so serving processes start without the training-only stack
+if TYPE_CHECKING:
+    import tensorflow as tf
+
+from classifier_inference import ClassifierInference, DEFAULT_INFERENCE_BACKEND
+from landmark_store import LandmarkDataset, is_landmark_dataset
+from pose_features import (FEATURE_SET, LEGACY_FEATURE_SET, POSE_LANDMARK_COUNT,
+                           compute_pose_features, classifier_input)
+from synthetic_poses import (DEFAULT_AUGMENTATION, DEFAULT_NOISE, EXERCISES, POSE_TEMPLATES, TEMPLATES,
+                             iter_synthetic_poses)
+
+# Default classifier architecture (see create_model)
+DEFAULT_HIDDEN_UNITS = (256, 128, 64, 32)
+# Dropout after batch-normalized layers / after the others, unless given per layer
+DEFAULT_DROPOUT = (0.3, 0.2)
+DEFAULT_LEARNING_RATE = 0.001
+BATCH_NORM_LAYERS = 2
+
+# Models promoted by training jobs live in <model_dir>/versions/<job_id>, and
+# the <model_dir>/current symlink points at the one being served
+MODEL_VERSIONS_DIR = 'versions'
+SERVING_MODEL_LINK = 'current'
+
+def serving_model_dir(model_dir: str) -> str:
+    """
+    Directory holding the model to serve from `model_dir`
+    
+    The `current` link is resolved once, so every file of one load comes from
+    the same version even if a training job promotes another one meanwhile.
+    Without a promoted version the model files sit in `model_dir` itself.
+    """
+    link = os.path.join(model_dir, SERVING_MODEL_LINK)
+    return os.path.realpath(link) if os.path.islink(link) else model_dir
 
 class ExerciseClassifierTrainer:
     """
     Train a custom exercise classifier using pose landmarks
     """
     
-    def __init__(self, data_dir: str = "data", model_dir: str = "trained_models"):
+    def __init__(self, data_dir: str = "data", model_dir: str = "trained_models",
+                 inference_backend: str = DEFAULT_INFERENCE_BACKEND):
         self.data_dir = data_dir
         self.model_dir = model_dir
         self.model = None
-        self.label_encoder = LabelEncoder()
-        self.scaler = StandardScaler()
+        # Created on first use (see the label_encoder / scaler properties)
+        self._label_encoder = None
+        self._scaler = None
+        # Input space the model is trained on (see pose_features); loaded models
+        # saved without one take raw landmarks
+        self.feature_set = FEATURE_SET
+        
+        # Per-frame inference path, rebuilt whenever self.model changes
+        self.inference_backend = inference_backend
+        self.inference = None
         
         # Create directories if they don't exist
         os.makedirs(data_dir, exist_ok=True)
         os.makedirs(model_dir, exist_ok=True)
     
-    def generate_synthetic_data(self, num_samples: int = 1000) -> Tuple[np.ndarray, np.ndarray]:
+    @property
+    def label_encoder(self):
+        if self._label_encoder is None:
+            from sklearn.preprocessing import LabelEncoder
+            self._label_encoder = LabelEncoder()
+        return self._label_encoder
+    
+    @label_encoder.setter
+    def label_encoder(self, label_encoder):
+        self._label_encoder = label_encoder
+    
+    @property
+    def scaler(self):
+        if self._scaler is None:
+            from sklearn.preprocessing import StandardScaler
+            self._scaler = StandardScaler()
+        return self._scaler
+    
+    @scaler.setter
+    def scaler(self, scaler):
+        self._scaler = scaler
+    
+    def generate_synthetic_data(self, num_samples: int = 1000, seed: Optional[int] = None,
+                                augment: bool = False) -> Tuple[np.ndarray, np.ndarray]:
         """
         Generate synthetic pose data for training
-        This simulates different exercise poses
-        """
-        exercises = ['pushup', 'squat', 'plank', 'jumping_jack', 'lunge']
-        X = []
-        y = []
-        
-        for _ in range(num_samples):
-            exercise = np.random.choice(exercises)
-            
-            # Generate synthetic landmarks based on exercise type
-            landmarks = self.generate_exercise_landmarks(exercise)
-            
-            X.append(landmarks.flatten())
-            y.append(exercise)
-        
-        return np.array(X), np.array(y)
+        This simulates different exercise poses (see synthetic_poses); the whole
+        set is generated in vectorized chunks. `augment` adds rotation, scale
+        and limb-length jitter.
+        """
+        augmentation = DEFAULT_AUGMENTATION if augment else None
+        chunks = list(iter_synthetic_poses(num_samples, seed=seed, augmentation=augmentation))
+        if not chunks:
+            return np.zeros((0, POSE_LANDMARK_COUNT * 3), dtype=np.float32), np.array([], dtype=str)
+        
+        X = np.concatenate([poses.reshape(len(poses), -1) for poses, _ in chunks])
+        y = np.array(EXERCISES)[np.concatenate([labels for _, labels in chunks])]
+        return X, y
     
     def generate_exercise_landmarks(self, exercise: str) -> np.ndarray:
         """
-        Generate synthetic landmarks for different exercises
-        """
-        # Base pose landmarks (33 points from MediaPipe)
-        landmarks = np.zeros((33, 3))
-        
-        if exercise == 'pushup':
-            # Pushup position - body horizontal
-            landmarks[11] = [0.3, 0.2, 0]  # Left shoulder
-            landmarks[12] = [0.7, 0.2, 0]  # Right shoulder
-            landmarks[13] = [0.2, 0.4, 0]  # Left elbow
-            landmarks[14] = [0.8, 0.4, 0]  # Right elbow
-            landmarks[15] = [0.1, 0.6, 0]  # Left wrist
-            landmarks[16] = [0.9, 0.6, 0]  # Right wrist
-            landmarks[23] = [0.4, 0.5, 0]  # Left hip
-            landmarks[24] = [0.6, 0.5, 0]  # Right hip
-            landmarks[25] = [0.3, 0.7, 0]  # Left knee
-            landmarks[26] = [0.7, 0.7, 0]  # Right knee
-            landmarks[27] = [0.2, 0.9, 0]  # Left ankle
-            landmarks[28] = [0.8, 0.9, 0]  # Right ankle
-            
-        elif exercise == 'squat':
-            # Squat position - knees bent
-            landmarks[11] = [0.3, 0.3, 0]  # Left shoulder
-            landmarks[12] = [0.7, 0.3, 0]  # Right shoulder
-            landmarks[23] = [0.4, 0.4, 0]  # Left hip
-            landmarks[24] = [0.6, 0.4, 0]  # Right hip
-            landmarks[25] = [0.3, 0.6, 0]  # Left knee (bent)
-            landmarks[26] = [0.7, 0.6, 0]  # Right knee (bent)
-            landmarks[27] = [0.2, 0.8, 0]  # Left ankle
-            landmarks[28] = [0.8, 0.8, 0]  # Right ankle
-            
-        elif exercise == 'plank':
-            # Plank position - straight line
-            landmarks[11] = [0.3, 0.2, 0]  # Left shoulder
-            landmarks[12] = [0.7, 0.2, 0]  # Right shoulder
-            landmarks[13] = [0.2, 0.3, 0]  # Left elbow
-            landmarks[14] = [0.8, 0.3, 0]  # Right elbow
-            landmarks[15] = [0.1, 0.4, 0]  # Left wrist
-            landmarks[16] = [0.9, 0.4, 0]  # Right wrist
-            landmarks[23] = [0.4, 0.5, 0]  # Left hip
-            landmarks[24] = [0.6, 0.5, 0]  # Right hip
-            landmarks[25] = [0.3, 0.6, 0]  # Left knee
-            landmarks[26] = [0.7, 0.6, 0]  # Right knee
-            landmarks[27] = [0.2, 0.7, 0]  # Left ankle
-            landmarks[28] = [0.8, 0.7, 0]  # Right ankle
-            
-        elif exercise == 'jumping_jack':
-            # Jumping jack position - arms up
-            landmarks[11] = [0.2, 0.1, 0]  # Left shoulder
-            landmarks[12] = [0.8, 0.1, 0]  # Right shoulder
-            landmarks[13] = [0.1, 0.2, 0]  # Left elbow
-            landmarks[14] = [0.9, 0.2, 0]  # Right elbow
-            landmarks[15] = [0.0, 0.3, 0]  # Left wrist
-            landmarks[16] = [1.0, 0.3, 0]  # Right wrist
-            landmarks[23] = [0.4, 0.4, 0]  # Left hip
-            landmarks[24] = [0.6, 0.4, 0]  # Right hip
-            landmarks[25] = [0.3, 0.6, 0]  # Left knee
-            landmarks[26] = [0.7, 0.6, 0]  # Right knee
-            landmarks[27] = [0.2, 0.8, 0]  # Left ankle
-            landmarks[28] = [0.8, 0.8, 0]  # Right ankle
-            
-        elif exercise == 'lunge':
-            # Lunge position - one leg forward
-            landmarks[11] = [0.3, 0.3, 0]  # Left shoulder
-            landmarks[12] = [0.7, 0.3, 0]  # Right shoulder
-            landmarks[23] = [0.4, 0.4, 0]  # Left hip
-            landmarks[24] = [0.6, 0.4, 0]  # Right hip
-            landmarks[25] = [0.2, 0.6, 0]  # Left knee (forward)
-            landmarks[26] = [0.7, 0.7, 0]  # Right knee (back)
-            landmarks[27] = [0.1, 0.8, 0]  # Left ankle (forward)
-            landmarks[28] = [0.8, 0.9, 0]  # Right ankle (back)
-        
-        # Add some noise to make it more realistic
-        noise = np.random.normal(0, 0.02, landmarks.shape)
-        landmarks += noise
-        
-        # Ensure all values are between 0 and 1
-        landmarks = np.clip(landmarks, 0, 1)
-        
-        return landmarks
+        Generate synthetic landmarks for one exercise (its template plus noise)
+        """
+        if exercise not in POSE_TEMPLATES:
+            raise ValueError(f"No pose template for exercise '{exercise}'. Expected one of {EXERCISES}")
+        landmarks = TEMPLATES[EXERCISES.index(exercise)] + np.random.normal(0, DEFAULT_NOISE, TEMPLATES.shape[1:])
+        return np.clip(landmarks, 0, 1)
     
     def load_real_data(self, data_file: str) -> Tuple[np.ndarray, np.ndarray]:
         """
         Load real pose data from file
+        `data_file` is a landmark CSV or a landmark_store dataset directory (a
+        single-shard dataset is memory-mapped, not read). Everything else is
+        loaded into memory; use train_streaming for large or sharded datasets.
         """
+        if is_landmark_dataset(data_file):
+            return LandmarkDataset(data_file).to_arrays()
+        
         if not os.path.exists(data_file):
             print(f"Data file {data_file} not found. Generating synthetic data...")
             return self.generate_synthetic_data()
         
+        import pandas as pd
+        
         data = pd.read_csv(data_file)
         X = data.drop('exercise', axis=1).values
         y = data['exercise'].values
@@ -147,11 +137,13 @@ class ExerciseClassifierTrainer:
         """
         Preprocess the data for training
         """
+        from sklearn.model_selection import train_test_split
+        
         # Encode labels
         y_encoded = self.label_encoder.fit_transform(y)
         
-        # Scale features
-        X_scaled = self.scaler.fit_transform(X)
+        # Turn landmark rows into the model's input features and scale them
+        X_scaled = self.scaler.fit_transform(self.classifier_features(X))
         
         # Split data
         X_train, X_test, y_train, y_test = train_test_split(
@@ -160,30 +152,41 @@ class ExerciseClassifierTrainer:
         
         return X_train, X_test, y_train, y_test
     
-    def create_model(self, input_shape: int, num_classes: int) -> tf.keras.Model:
+    def create_model(self, input_shape: int, num_classes: int, hidden_units: Sequence[int] = DEFAULT_HIDDEN_UNITS,
+                     dropout: Optional[Union[float, Sequence[float]]] = None,
+                     learning_rate: float = DEFAULT_LEARNING_RATE) -> 'tf.keras.Model':
         """
         Create the neural network model
+        
+        One ReLU Dense layer per `hidden_units` entry, each followed by dropout
+        (one rate for all layers or one per layer); the first two also get
+        batch normalization. The defaults are the original architecture.
         """
-        model = tf.keras.Sequential([
-            tf.keras.layers.Dense(256, activation='relu', input_shape=(input_shape,)),
-            tf.keras.layers.BatchNormalization(),
-            tf.keras.layers.Dropout(0.3),
-            
-            tf.keras.layers.Dense(128, activation='relu'),
-            tf.keras.layers.BatchNormalization(),
-            tf.keras.layers.Dropout(0.3),
-            
-            tf.keras.layers.Dense(64, activation='relu'),
-            tf.keras.layers.Dropout(0.2),
-            
-            tf.keras.layers.Dense(32, activation='relu'),
-            tf.keras.layers.Dropout(0.2),
-            
-            tf.keras.layers.Dense(num_classes, activation='softmax')
-        ])
+        import tensorflow as tf
+        
+        if dropout is None:
+            dropout = [DEFAULT_DROPOUT[0] if i < BATCH_NORM_LAYERS else DEFAULT_DROPOUT[1]
+                       for i in range(len(hidden_units))]
+        elif np.ndim(dropout) == 0:
+            dropout = [dropout] * len(hidden_units)
+        dropout = list(dropout)
+        if len(dropout) != len(hidden_units):
+            raise ValueError(f"Expected {len(hidden_units)} dropout rates, got {len(dropout)}")
+        
+        layers = []
+        for i, (units, rate) in enumerate(zip(hidden_units, dropout)):
+            if i == 0:
+                layers.append(tf.keras.layers.Dense(units, activation='relu', input_shape=(input_shape,)))
+            else:
+                layers.append(tf.keras.layers.Dense(units, activation='relu'))
+            if i < BATCH_NORM_LAYERS:
+                layers.append(tf.keras.layers.BatchNormalization())
+            layers.append(tf.keras.layers.Dropout(rate))
+        layers.append(tf.keras.layers.Dense(num_classes, activation='softmax'))
+        model = tf.keras.Sequential(layers)
         
         model.compile(
-            optimizer=tf.keras.optimizers.Adam(learning_rate=0.001),
+            optimizer=tf.keras.optimizers.Adam(learning_rate=learning_rate),
             loss='sparse_categorical_crossentropy',
             metrics=['accuracy']
         )
@@ -192,15 +195,64 @@ class ExerciseClassifierTrainer:
     
     def train_model(self, X_train: np.ndarray, y_train: np.ndarray, 
                    X_test: np.ndarray, y_test: np.ndarray, 
-                   epochs: int = 100, batch_size: int = 32) -> Dict:
+                   epochs: int = 100, batch_size: int = 32,
+                   extra_callbacks: Optional[List['tf.keras.callbacks.Callback']] = None,
+                   model_params: Optional[Dict] = None, verbose: int = 1) -> Dict:
         """
         Train the model
+        
+        `extra_callbacks` run alongside the built-in ones (e.g. progress reporting).
+        `model_params` are create_model arguments (hidden_units, dropout, learning_rate).
+        """
+        return self._fit_model(
+            X_train.shape[1], len(np.unique(y_train)),
+            {'x': X_train, 'y': y_train, 'validation_data': (X_test, y_test), 'batch_size': batch_size},
+            {'x': X_test, 'y': y_test},
+            epochs, extra_callbacks, model_params, verbose
+        )
+    
+    def train_streaming(self, source, epochs: int = 100, batch_size: int = 32,
+                        test_fraction: Optional[float] = None, shuffle_buffer: Optional[int] = None,
+                        extra_callbacks: Optional[List['tf.keras.callbacks.Callback']] = None,
+                        model_params: Optional[Dict] = None) -> Dict:
+        """
+        Train on sharded landmark files without loading them into memory
+        
+        `source` is a directory, glob or list of shards (see pose_dataset). One
+        streaming pass fits the scaler and label encoder, then every epoch
+        re-reads the shards through a shuffled, prefetched tf.data pipeline.
+        `test_fraction` and `shuffle_buffer` default to pose_dataset's defaults.
+        """
+        from sklearn.preprocessing import LabelEncoder, StandardScaler
+        from pose_dataset import DEFAULT_SHUFFLE_BUFFER, DEFAULT_TEST_FRACTION, StreamingPoseDataset
+        
+        dataset = StreamingPoseDataset(source, self.classifier_features,
+                                       test_fraction=test_fraction or DEFAULT_TEST_FRACTION)
+        summary = dataset.fit_preprocessors(StandardScaler(), LabelEncoder())
+        self.scaler, self.label_encoder = dataset.scaler, dataset.label_encoder
+        print(f"Streaming {summary['train']} training and {summary['test']} test rows "
+              f"from {len(dataset.shards)} shards")
+        
+        validation = dataset.validation()
+        results = self._fit_model(
+            summary['feature_size'], len(summary['classes']),
+            {'x': dataset.training(batch_size, shuffle_buffer or DEFAULT_SHUFFLE_BUFFER), 'validation_data': validation},
+            {'x': validation},
+            epochs, extra_callbacks, model_params
+        )
+        results['dataset'] = summary
+        return results
+    
+    def _fit_model(self, input_shape: int, num_classes: int, fit_data: Dict, evaluation_data: Dict,
+                   epochs: int, extra_callbacks: Optional[List['tf.keras.callbacks.Callback']],
+                   model_params: Optional[Dict] = None, verbose: int = 1) -> Dict:
         """
-        input_shape = X_train.shape[1]
-        num_classes = len(np.unique(y_train))
+        Build, fit and evaluate a fresh model on arrays or tf.data datasets
+        """
+        import tensorflow as tf
         
         # Create model
-        self.model = self.create_model(input_shape, num_classes)
+        self.model = self.create_model(input_shape, num_classes, **(model_params or {}))
         
         # Callbacks
         callbacks = [
@@ -211,20 +263,18 @@ class ExerciseClassifierTrainer:
                 save_best_only=True,
                 monitor='val_accuracy'
             )
-        ]
+        ] + list(extra_callbacks or [])
         
         # Train model
         history = self.model.fit(
-            X_train, y_train,
-            validation_data=(X_test, y_test),
             epochs=epochs,
-            batch_size=batch_size,
             callbacks=callbacks,
-            verbose=1
+            verbose=verbose,
+            **fit_data
         )
         
         # Evaluate model
-        test_loss, test_accuracy = self.model.evaluate(X_test, y_test, verbose=0)
+        test_loss, test_accuracy = self.model.evaluate(verbose=0, **evaluation_data)
         
         return {
             'history': history.history,
@@ -236,6 +286,8 @@ class ExerciseClassifierTrainer:
         """
         Plot training history
         """
+        import matplotlib.pyplot as plt
+        
         fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 4))
         
         # Plot accuracy
@@ -279,52 +331,114 @@ class ExerciseClassifierTrainer:
         import joblib
         joblib.dump(self.scaler, os.path.join(self.model_dir, 'scaler.pkl'))
         joblib.dump(self.label_encoder, os.path.join(self.model_dir, 'label_encoder.pkl'))
+        with open(os.path.join(self.model_dir, 'features.json'), 'w') as f:
+            json.dump({'feature_set': self.feature_set}, f)
+        
+        # Files saved directly into model_dir take over from a promoted training job's model
+        link = os.path.join(self.model_dir, SERVING_MODEL_LINK)
+        if os.path.islink(link):
+            os.remove(link)
         
         print(f"Model saved to {model_path}")
         print(f"Preprocessors saved to {self.model_dir}")
     
-    def load_model_and_preprocessors(self, model_name: str = 'exercise_classifier'):
+    def load_model_and_preprocessors(self, model_name: str = 'exercise_classifier',
+                                     model_dir: Optional[str] = None):
         """
         Load the trained model and preprocessors
+        
+        By default the serving model of self.model_dir is loaded (see
+        serving_model_dir); `model_dir` loads the files of another directory.
         """
         import joblib
+        import tensorflow as tf
+        
+        model_dir = model_dir or serving_model_dir(self.model_dir)
         
         # Load model
-        model_path = os.path.join(self.model_dir, f'{model_name}.h5')
+        model_path = os.path.join(model_dir, f'{model_name}.h5')
         self.model = tf.keras.models.load_model(model_path)
         
         # Load preprocessors
-        self.scaler = joblib.load(os.path.join(self.model_dir, 'scaler.pkl'))
-        self.label_encoder = joblib.load(os.path.join(self.model_dir, 'label_encoder.pkl'))
-        
-        print(f"Model loaded from {model_path}")
+        self.scaler = joblib.load(os.path.join(model_dir, 'scaler.pkl'))
+        self.label_encoder = joblib.load(os.path.join(model_dir, 'label_encoder.pkl'))
+        features_path = os.path.join(model_dir, 'features.json')
+        if os.path.exists(features_path):
+            with open(features_path) as f:
+                self.feature_set = json.load(f)['feature_set']
+        else:
+            self.feature_set = LEGACY_FEATURE_SET
+        
+        # Build the inference path now rather than on the first frame
+        self.get_inference()
+        
+        print(f"Model loaded from {model_path} (inference backend: {self.inference.backend}, "
+              f"features: {self.feature_set})")
+    
+    def get_inference(self) -> ClassifierInference:
+        """
+        Inference path for the current model, scaler and backend
+        """
+        if self.inference is None or self.inference.model is not self.model:
+            self.inference = ClassifierInference(self.model, self.scaler, self.inference_backend)
+        return self.inference
+    
+    def classifier_features(self, landmarks: np.ndarray) -> np.ndarray:
+        """
+        Model input rows for landmarks: one (33, C) pose, a flat vector, or a batch of either
+        """
+        landmarks = np.asarray(landmarks, dtype=np.float32)
+        if landmarks.ndim == 2 and landmarks.shape[0] == POSE_LANDMARK_COUNT and landmarks.shape[1] <= 4:
+            landmarks = landmarks[None]
+        landmarks = landmarks.reshape(len(landmarks) if landmarks.ndim > 1 else 1, -1)
+        if landmarks.shape[1] % POSE_LANDMARK_COUNT:
+            raise ValueError(f"Expected {POSE_LANDMARK_COUNT} landmarks per pose, got rows of {landmarks.shape[1]} values")
+        
+        poses = landmarks.reshape(len(landmarks), POSE_LANDMARK_COUNT, -1)
+        features = compute_pose_features(poses) if self.feature_set != LEGACY_FEATURE_SET else None
+        return classifier_input(features, poses, self.feature_set)
     
     def predict_exercise(self, landmarks: np.ndarray) -> Dict:
         """
         Predict exercise from landmarks
         """
+        return self.predict_features_batch(self.classifier_features(landmarks))[0]
+    
+    def predict_exercise_batch(self, landmarks: np.ndarray) -> List[Dict]:
+        """
+        Predict exercises for a batch of landmark vectors in one forward pass
+        """
+        return self.predict_features_batch(self.classifier_features(landmarks))
+    
+    def predict_features(self, features: np.ndarray) -> Dict:
+        """
+        Predict exercise from one row of model input features (see classifier_features)
+        """
+        return self.predict_features_batch(np.asarray(features).reshape(1, -1))[0]
+    
+    def predict_features_batch(self, features: np.ndarray) -> List[Dict]:
+        """
+        Predict exercises for a batch of model input rows in one forward pass
+        """
+        batch_size = len(features)
         if self.model is None:
-            return {'exercise': 'unknown', 'confidence': 0.0}
-        
-        # Preprocess landmarks
-        landmarks_scaled = self.scaler.transform(landmarks.reshape(1, -1))
+            return [{'exercise': 'unknown', 'confidence': 0.0} for _ in range(batch_size)]
         
-        # Make prediction
-        prediction = self.model.predict(landmarks_scaled, verbose=0)
+        # Scale and run the model through the inference backend
+        predictions = self.get_inference().predict_proba(np.asarray(features).reshape(batch_size, -1))
         
         # Get class and confidence
-        class_idx = np.argmax(prediction[0])
-        confidence = prediction[0][class_idx]
-        exercise = self.label_encoder.inverse_transform([class_idx])[0]
-        
-        return {
-            'exercise': exercise,
-            'confidence': float(confidence),
-            'all_predictions': {
-                self.label_encoder.inverse_transform([i])[0]: float(prediction[0][i])
-                for i in range(len(prediction[0]))
-            }
-        }
+        class_indices = np.argmax(predictions, axis=1).tolist()
+        classes = self.label_encoder.classes_.tolist()
+        
+        results = []
+        for class_idx, probabilities in zip(class_indices, predictions.tolist()):
+            results.append({
+                'exercise': classes[class_idx],
+                'confidence': probabilities[class_idx],
+                'all_predictions': dict(zip(classes, probabilities))
+            })
+        return results
 
 # Example usage
 if __name__ == "__main__":
@@ -0,0 +1,308 @@
+import multiprocessing
+import os
+import queue
+import shutil
+import signal
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+from train_exercise_classifier import MODEL_VERSIONS_DIR, SERVING_MODEL_LINK
+
+# Training parameters accepted by a job, with their defaults and allowed range
+TRAINING_PARAMETERS = {
+    'num_samples': (1000, 10, 100000),
+    'epochs': (50, 1, 500),
+    'batch_size': (32, 1, 4096)
+}
+
+JOB_STATES = ('queued', 'running', 'succeeded', 'failed', 'cancelled')
+FINISHED_STATES = ('succeeded', 'failed', 'cancelled')
+# Finished jobs kept for polling
+MAX_FINISHED_JOBS = 20
+
+_STAGING_DIR = '.staging'
+
+
+class TrainingBusyError(RuntimeError):
+    """Raised when a training job is submitted while another one is still running"""
+
+
+def resolve_training_parameters(options: Dict) -> Dict:
+    """Validate a training request's parameters and fill in the defaults"""
+    params = {}
+    for name, (default, minimum, maximum) in TRAINING_PARAMETERS.items():
+        value = options.get(name, default)
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f'{name} must be an integer')
+        if not minimum <= value <= maximum:
+            raise ValueError(f'{name} must be between {minimum} and {maximum}')
+        params[name] = value
+    return params
+
+
+def _training_main(params: Dict, staging_dir: str, events):
+    """
+    Training process: generate data, train and save into `staging_dir`
+
+    Progress goes back to the server as ('stage' | 'epoch' | 'done' | 'failed', payload)
+    events. Nothing outside `staging_dir` is touched; the server promotes the model.
+    """
+    # The server handles Ctrl+C and cancels jobs explicitly
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        import tensorflow as tf
+        from train_exercise_classifier import ExerciseClassifierTrainer
+
+        class ProgressCallback(tf.keras.callbacks.Callback):
+            def on_epoch_end(self, epoch, logs=None):
+                metrics = {name: round(float(value), 6) for name, value in (logs or {}).items()}
+                events.put(('epoch', dict(metrics, epoch=epoch + 1)))
+
+        trainer = ExerciseClassifierTrainer(model_dir=staging_dir)
+
+        events.put(('stage', 'generating_data'))
+        X, y = trainer.generate_synthetic_data(params['num_samples'])
+        X_train, X_test, y_train, y_test = trainer.preprocess_data(X, y)
+
+        events.put(('stage', 'training'))
+        results = trainer.train_model(
+            X_train, y_train, X_test, y_test,
+            epochs=params['epochs'], batch_size=params['batch_size'],
+            extra_callbacks=[ProgressCallback()]
+        )
+
+        events.put(('stage', 'saving'))
+        trainer.save_model_and_preprocessors()
+        events.put(('done', {
+            'test_accuracy': float(results['test_accuracy']),
+            'test_loss': float(results['test_loss']),
+            'epochs_run': len(results['history'].get('loss', []))
+        }))
+    except Exception as e:
+        events.put(('failed', f'{type(e).__name__}: {e}'))
+
+
+class TrainingJob:
+    def __init__(self, params: Dict):
+        self.id = uuid.uuid4().hex
+        self.params = params
+        self.status = 'queued'
+        self.stage: Optional[str] = None
+        self.epochs: List[Dict] = []
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        # Bumped on every change, so watchers can wait for the next one
+        self.version = 0
+        self.process = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    def as_dict(self) -> Dict:
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'stage': self.stage,
+            'params': self.params,
+            'epoch': len(self.epochs),
+            'epochs': list(self.epochs),
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+
+
+class TrainingJobManager:
+    """
+    Run classifier training in a separate process and promote the model on success
+
+    One job runs at a time. The job trains into a staging directory inside
+    `model_dir`. Once it saved successfully, the directory becomes the version
+    `model_dir/versions/<job_id>` and `load_model(version_dir)` must load it.
+    Only then is the `model_dir/current` link switched to the new version (one
+    atomic rename) and `on_model_ready(model)` called to swap the loaded model
+    in. A failed or cancelled job, or a model that does not load, leaves the
+    serving model untouched on disk and in memory.
+    """
+
+    def __init__(self, model_dir: str, load_model: Callable[[str], Any],
+                 on_model_ready: Callable[[Any], None]):
+        self.model_dir = model_dir
+        self.load_model = load_model
+        self.on_model_ready = on_model_ready
+
+        # Spawned (not forked) so the job never inherits the server's TensorFlow state
+        self._context = multiprocessing.get_context('spawn')
+        self._jobs: Dict[str, TrainingJob] = {}
+        self._active: Optional[TrainingJob] = None
+        self._condition = threading.Condition()
+
+    def submit(self, options: Dict) -> Dict:
+        """Start a training job; returns its state (with `job_id`)"""
+        params = resolve_training_parameters(options)
+        with self._condition:
+            if self._active is not None:
+                raise TrainingBusyError(f'Training job {self._active.id} is still running')
+            job = TrainingJob(params)
+            self._jobs[job.id] = job
+            self._active = job
+            self._prune()
+
+        staging_dir = os.path.join(self.model_dir, _STAGING_DIR, job.id)
+        os.makedirs(staging_dir, exist_ok=True)
+        events = self._context.Queue()
+        job.process = self._context.Process(
+            target=_training_main, args=(params, staging_dir, events),
+            name=f'training-{job.id[:8]}', daemon=True
+        )
+        try:
+            job.process.start()
+        except Exception as e:
+            self._finish(job, status='failed', error=f'Could not start the training process: {e}')
+            raise
+        self._update(job, status='running', started_at=time.time())
+
+        threading.Thread(
+            target=self._follow, args=(job, events, staging_dir), name=f'training-monitor-{job.id[:8]}', daemon=True
+        ).start()
+        return job.as_dict()
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._condition:
+            job = self._jobs.get(job_id)
+            return job.as_dict() if job is not None else None
+
+    def list(self) -> List[Dict]:
+        with self._condition:
+            return [job.as_dict() for job in self._jobs.values()]
+
+    def wait_for_change(self, job_id: str, version: int, timeout: float) -> Optional[tuple]:
+        """
+        Block until the job changes past `version` (or `timeout` passes);
+        returns (version, state), or None for unknown jobs
+        """
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            self._condition.wait_for(lambda: job.version != version or job.finished, timeout)
+            return job.version, job.as_dict()
+
+    def cancel(self, job_id: str) -> Optional[Dict]:
+        """Stop a running job; the serving model is not touched"""
+        with self._condition:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        with self._condition:
+            # A model that is already being promoted is past the point of no return
+            if not job.finished and job.stage != 'promoting':
+                job.process.terminate()
+                self._finish(job, status='cancelled')
+            return job.as_dict()
+
+    def shutdown(self):
+        with self._condition:
+            job = self._active
+        if job is not None:
+            self.cancel(job.id)
+
+    def _follow(self, job: TrainingJob, events, staging_dir: str):
+        """Apply a job's progress events, then promote or discard its model"""
+        outcome = None
+        while outcome is None:
+            try:
+                kind, payload = events.get(timeout=1.0)
+            except queue.Empty:
+                if job.finished:
+                    break
+                # A finished process flushes its last events before exiting
+                if not job.process.is_alive() and events.empty():
+                    outcome = ('failed', f'Training process exited with code {job.process.exitcode}')
+                continue
+
+            if kind == 'stage':
+                self._update(job, stage=payload)
+            elif kind == 'epoch':
+                with self._condition:
+                    job.epochs.append(payload)
+                self._update(job)
+            else:
+                outcome = (kind, payload)
+
+        job.process.join(5.0)
+        if outcome is not None and not job.finished:
+            kind, payload = outcome
+            if kind == 'done':
+                with self._condition:
+                    promote = not job.finished
+                    if promote:
+                        self._update(job, stage='promoting')
+                if promote:
+                    try:
+                        self._promote(job, staging_dir)
+                        self._finish(job, status='succeeded', result=payload)
+                    except Exception as e:
+                        self._finish(job, status='failed', error=f'Promoting the trained model failed: {e}')
+            else:
+                self._finish(job, status='failed', error=payload)
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+    def _promote(self, job: TrainingJob, staging_dir: str):
+        """Validate the staged model, make it the serving version and hand it to the server"""
+        versions_dir = os.path.join(self.model_dir, MODEL_VERSIONS_DIR)
+        version_dir = os.path.join(versions_dir, job.id)
+        os.makedirs(versions_dir, exist_ok=True)
+        os.rename(staging_dir, version_dir)
+        try:
+            model = self.load_model(version_dir)
+        except Exception:
+            shutil.rmtree(version_dir, ignore_errors=True)
+            raise
+
+        # Repoint the serving link in one rename; readers resolve it once per load
+        link = os.path.join(self.model_dir, SERVING_MODEL_LINK)
+        previous = os.path.realpath(link) if os.path.islink(link) else None
+        staged_link = f'{link}.{job.id}'
+        os.symlink(os.path.join(MODEL_VERSIONS_DIR, job.id), staged_link)
+        os.replace(staged_link, link)
+        self.on_model_ready(model)
+
+        # Keep the previous version: a worker may still be loading it
+        keep = {os.path.realpath(version_dir), previous}
+        for name in os.listdir(versions_dir):
+            path = os.path.join(versions_dir, name)
+            if os.path.realpath(path) not in keep:
+                shutil.rmtree(path, ignore_errors=True)
+
+    def _update(self, job: TrainingJob, **changes):
+        with self._condition:
+            for name, value in changes.items():
+                setattr(job, name, value)
+            job.version += 1
+            self._condition.notify_all()
+
+    def _finish(self, job: TrainingJob, **changes):
+        with self._condition:
+            if job.finished:
+                return
+            if self._active is job:
+                self._active = None
+            self._update(job, finished_at=time.time(), **changes)
+        print(f"Training job {job.id} {changes['status']}")
+
+    def _prune(self):
+        """Forget the oldest finished jobs beyond MAX_FINISHED_JOBS (caller holds the lock)"""
+        finished = [job for job in self._jobs.values() if job.finished]
+        for job in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job.id]
@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+"""
+Server-side analysis of recorded exercise videos
+
+A clip is decoded frame by frame from disk (never loaded whole), run through
+one HumanDetectionModel in tracking mode and summarized into a per-frame
+landmark track plus an aggregate report. Decoding, inference and
+post-processing run as three stages connected by bounded queues, so they
+overlap and memory stays flat however long the clip is.
+"""
+
+import queue
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from form_rules import form_recommendations, form_scores
+from frame_scheduler import KeyframeInterpolator
+from pose_features import FeatureExtractor, PoseFeatures, classifier_input
+from rep_counting import RepCounter
+
+# Containers produced by the app's recording flow (and common camera exports)
+VIDEO_TYPES = ('video/mp4', 'video/webm', 'video/quicktime')
+
+DEFAULT_QUEUE_SIZE = 8
+DEFAULT_CLASSIFY_CHUNK = 32
+
+# Marks the end of a stage's output
+_END = object()
+
+
+def probe_video(path: str) -> Dict:
+    """Container metadata reported by OpenCV (frame_count/fps may be 0 for some webm files)"""
+    capture = cv2.VideoCapture(path)
+    try:
+        if not capture.isOpened():
+            raise ValueError('Could not open video')
+        return {
+            'width': int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            'height': int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            'fps': float(capture.get(cv2.CAP_PROP_FPS) or 0.0),
+            'frame_count': max(int(capture.get(cv2.CAP_PROP_FRAME_COUNT)), 0)
+        }
+    finally:
+        capture.release()
+
+
+def iter_video_frames(path: str, sample_fps: Optional[float] = None,
+                      max_frames: Optional[int] = None) -> Iterator[Tuple[int, float, np.ndarray]]:
+    """
+    Yield (frame_index, timestamp_s, BGR frame) from a video file, one frame at a time
+
+    With `sample_fps`, frames between samples are only grabbed (demuxed and
+    decoded but never converted to BGR), which makes sparse sampling cheaper.
+    """
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise ValueError('Could not open video')
+
+    fps = capture.get(cv2.CAP_PROP_FPS) or 0.0
+    interval = 1.0 / sample_fps if sample_fps else 0.0
+    next_sample = 0.0
+    index = -1
+    yielded = 0
+
+    try:
+        while max_frames is None or yielded < max_frames:
+            if not capture.grab():
+                break
+            index += 1
+
+            # Container timestamps when available (webm often has no reliable fps)
+            position_ms = capture.get(cv2.CAP_PROP_POS_MSEC)
+            if position_ms > 0 or not fps:
+                timestamp = position_ms / 1000.0
+            else:
+                timestamp = index / fps
+            if interval and timestamp + 1e-6 < next_sample:
+                continue
+
+            ok, frame = capture.retrieve()
+            if not ok:
+                break
+            next_sample = timestamp + interval
+            yielded += 1
+            yield index, timestamp, frame
+    finally:
+        capture.release()
+
+
+def _put(target: queue.Queue, item, stop: threading.Event):
+    """Blocking put that gives up once the pipeline is stopping"""
+    while True:
+        try:
+            target.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            if stop.is_set():
+                return
+
+
+def _drain(source: queue.Queue):
+    while True:
+        try:
+            source.get_nowait()
+        except queue.Empty:
+            return
+
+
+class _ClipSummary:
+    """
+    Post-processing state for one clip: the landmark track and running aggregates
+
+    Aggregates are kept as running sums and counters; only the (optional)
+    track grows with the clip, by one (33, 4) float32 array per frame.
+    """
+
+    def __init__(self, classifier, exercise_type: str, include_track: bool, classify_chunk: int,
+                 frame_shape: Tuple[int, int]):
+        self.classifier = classifier
+        self.exercise_type = exercise_type
+        self.include_track = include_track
+        self.classify_chunk = classify_chunk
+        # Pose features are computed once per frame and shared by reps, form and classification
+        self.feature_extractor = FeatureExtractor()
+        # (height, width) of the frames the keypoints are in
+        self.frame_shape = frame_shape
+
+        self.frames = 0
+        self.frames_with_person = 0
+        self.first_timestamp = None
+        self.last_timestamp = 0.0
+        self.form_score_sum = 0.0
+        self.confidence_sum = 0.0
+        self.exercise_votes: Counter = Counter()
+        self.recommendations: Counter = Counter()
+        # Reps are counted on clip time, after interpolation fills in skipped frames
+        self.rep_counter = RepCounter()
+        self.reps: Optional[Dict] = None
+        self.rep_tempos: List[Dict] = []
+
+        self.frame_indices: List[int] = []
+        self.timestamps: List[float] = []
+        self.keypoints: List[Optional[np.ndarray]] = []
+        self._pending: List[Tuple[PoseFeatures, np.ndarray]] = []
+
+    def add(self, index: int, timestamp: float, keypoints: Optional[np.ndarray]):
+        self.frames += 1
+        if self.first_timestamp is None:
+            self.first_timestamp = timestamp
+        self.last_timestamp = timestamp
+
+        if self.include_track:
+            self.frame_indices.append(index)
+            self.timestamps.append(round(timestamp, 4))
+            self.keypoints.append(keypoints)
+
+        features = self.feature_extractor.extract(keypoints, timestamp, self.frame_shape)
+        self.reps = self.rep_counter.update(features, self.exercise_type, timestamp)
+        if self.reps is not None:
+            self.rep_tempos.extend(
+                dict(event['tempo'], timestamp_s=round(event['timestamp'], 3))
+                for event in self.reps['events'] if event['type'] == 'rep'
+            )
+
+        if keypoints is None:
+            return
+
+        self.frames_with_person += 1
+        self._pending.append((features, keypoints))
+        if len(self._pending) >= self.classify_chunk:
+            self.flush()
+
+    def flush(self):
+        """Score form rules for the buffered poses and classify them in one batched forward pass"""
+        if not self._pending:
+            return
+        features = PoseFeatures.stack([features for features, _ in self._pending])
+        keypoints = np.stack([keypoints for _, keypoints in self._pending])
+        self._pending = []
+
+        self.form_score_sum += float(form_scores(features).sum())
+        for recommendations in form_recommendations(features, self.exercise_type):
+            self.recommendations.update(recommendations)
+
+        if self.classifier is None:
+            return
+        rows = classifier_input(features, keypoints, self.classifier.feature_set)
+        for prediction in self.classifier.predict_features_batch(rows):
+            self.exercise_votes[prediction['exercise']] += 1
+            self.confidence_sum += prediction['confidence']
+
+    def report(self) -> Dict:
+        detected = self.frames_with_person
+        classified = sum(self.exercise_votes.values())
+        exercise = self.exercise_votes.most_common(1)[0][0] if classified else None
+
+        return {
+            'frames_analyzed': self.frames,
+            'frames_with_person': detected,
+            'detection_rate': round(detected / self.frames, 4) if self.frames else 0.0,
+            'duration_s': round(self.last_timestamp - (self.first_timestamp or 0.0), 3),
+            'mean_form_score': round(self.form_score_sum / detected, 4) if detected else 0.0,
+            'exercise_classification': {
+                'exercise': exercise,
+                'mean_confidence': round(self.confidence_sum / classified, 4) if classified else 0.0,
+                'votes': dict(self.exercise_votes)
+            },
+            'recommendations': [
+                {'recommendation': text, 'frames': count}
+                for text, count in self.recommendations.most_common()
+            ],
+            'reps': self._rep_report()
+        }
+
+    def _rep_report(self) -> Optional[Dict]:
+        """Rep totals and per-rep tempo, or None for exercises without a rep / hold definition"""
+        if self.reps is None:
+            return None
+        return {
+            'reps': self.reps['reps'],
+            'partial_reps': self.reps['partial_reps'],
+            'hold_s': self.reps['hold_s'],
+            'tempo': self.rep_tempos
+        }
+
+    def track(self) -> Dict:
+        return {
+            'frame_index': self.frame_indices,
+            'timestamp_s': self.timestamps,
+            # Per frame: (33, 4) pixel x, y, z, visibility, or null when nobody was detected
+            'keypoints': self.keypoints
+        }
+
+
+class VideoAnalyzer:
+    """
+    Three-stage producer/consumer pipeline over one clip
+
+        decode thread  --(bounded queue of frames)-->     inference (caller thread)
+        inference      --(bounded queue of landmarks)-->  post-processing thread
+
+    The detector keeps MediaPipe tracking state across the clip's frames, so it
+    must not serve other requests while a clip is being analyzed. The
+    post-processing stage checks form rules and classifies poses in chunks of
+    `classify_chunk` frames (one vectorized pass each) and accumulates the report.
+
+    With `adaptive` frame skipping, frames the detector's scheduler skips are
+    held back until the next keyframe and get landmarks interpolated between
+    the keyframes around them.
+    """
+
+    def __init__(self, detector, classifier=None, exercise_type: str = 'general',
+                 analysis_profile: Optional[str] = None, queue_size: int = DEFAULT_QUEUE_SIZE,
+                 classify_chunk: int = DEFAULT_CLASSIFY_CHUNK, adaptive: bool = False, roi: bool = False):
+        self.detector = detector
+        self.classifier = classifier
+        self.exercise_type = exercise_type
+        self.analysis_profile = analysis_profile or detector.analysis_profile
+        self.queue_size = queue_size
+        self.classify_chunk = classify_chunk
+        self.adaptive = adaptive
+        self.roi = roi
+
+    def analyze(self, path: str, sample_fps: Optional[float] = None, max_frames: Optional[int] = None,
+                include_track: bool = True) -> Dict:
+        """Analyze a video file and return its landmark track and aggregate report"""
+        video = probe_video(path)
+        started = time.perf_counter()
+
+        frames: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        poses: queue.Queue = queue.Queue(maxsize=self.queue_size * 4)
+        stop = threading.Event()
+        errors: List[Exception] = []
+        stage_ms = {'decode': 0.0, 'inference': 0.0, 'postprocess': 0.0}
+        summary = _ClipSummary(self.classifier, self.exercise_type, include_track, self.classify_chunk,
+                               (video['height'], video['width']))
+
+        decoder = threading.Thread(
+            target=self._decode_stage, args=(path, sample_fps, max_frames, frames, stop, errors, stage_ms),
+            name='video-decode', daemon=True
+        )
+        postprocessor = threading.Thread(
+            target=self._postprocess_stage, args=(poses, summary, stop, errors, stage_ms),
+            name='video-postprocess', daemon=True
+        )
+        decoder.start()
+        postprocessor.start()
+
+        interpolator = KeyframeInterpolator()
+        frames_inferred = 0
+        try:
+            while not stop.is_set():
+                item = frames.get()
+                if item is _END:
+                    break
+                index, timestamp, frame = item
+
+                start = time.perf_counter()
+                result = self.detector.process_video_frame(
+                    frame, self.exercise_type, self.analysis_profile, self.adaptive, self.roi
+                )
+                pose = result['pose_detection']
+                keypoints = pose['keypoint_array'] if pose['is_human_detected'] else None
+                skipped = result.get('frame_skipping', {}).get('skipped', False)
+                frames_inferred += not skipped
+                stage_ms['inference'] += (time.perf_counter() - start) * 1000.0
+
+                for ready in interpolator.add(index, timestamp, keypoints, skipped):
+                    _put(poses, ready, stop)
+
+            for ready in interpolator.flush():
+                _put(poses, ready, stop)
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            _put(poses, _END, stop)
+            if stop.is_set():
+                # Unblock a decoder waiting on a full queue
+                _drain(frames)
+            decoder.join()
+            postprocessor.join()
+
+        if errors:
+            raise errors[0]
+
+        total_ms = (time.perf_counter() - started) * 1000.0
+        report = summary.report()
+        report['frames_inferred'] = frames_inferred
+        report['timings_ms'] = {name: round(ms, 3) for name, ms in stage_ms.items()}
+        report['timings_ms']['total'] = round(total_ms, 3)
+        report['processing_fps'] = round(summary.frames / (total_ms / 1000.0), 2) if total_ms > 0 else 0.0
+
+        analysis = {
+            'video': video,
+            'exercise_type': self.exercise_type,
+            'analysis_profile': self.analysis_profile,
+            'sample_fps': sample_fps,
+            'frame_skipping': 'adaptive' if self.adaptive else 'off',
+            'roi': 'bbox' if self.roi else 'off',
+            'report': report
+        }
+        if include_track:
+            analysis['track'] = summary.track()
+        return analysis
+
+    def _decode_stage(self, path, sample_fps, max_frames, frames: queue.Queue, stop: threading.Event,
+                      errors: List[Exception], stage_ms: Dict[str, float]):
+        try:
+            iterator = iter_video_frames(path, sample_fps, max_frames)
+            while not stop.is_set():
+                start = time.perf_counter()
+                item = next(iterator, _END)
+                stage_ms['decode'] += (time.perf_counter() - start) * 1000.0
+                if item is _END:
+                    break
+                _put(frames, item, stop)
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            _put(frames, _END, stop)
+
+    def _postprocess_stage(self, poses: queue.Queue, summary: _ClipSummary, stop: threading.Event,
+                           errors: List[Exception], stage_ms: Dict[str, float]):
+        try:
+            while True:
+                # Poll so a failing stage that could not queue _END still ends this one
+                if stop.is_set():
+                    _drain(poses)
+                    return
+                try:
+                    item = poses.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if item is _END:
+                    break
+                start = time.perf_counter()
+                summary.add(*item)
+                stage_ms['postprocess'] += (time.perf_counter() - start) * 1000.0
+
+            start = time.perf_counter()
+            summary.flush()
+            stage_ms['postprocess'] += (time.perf_counter() - start) * 1000.0
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+            _drain(poses)
+
+
+def main():
+    import argparse
+    import json
+
+    from frame_scheduler import FRAME_SKIPPING_MODES
+    from roi_tracking import ROI_MODES
+    from human_detection_model import HumanDetectionModel, ANALYSIS_PROFILES, DEFAULT_ANALYSIS_PROFILE
+    from result_encoding import encode_result
+    from train_exercise_classifier import ExerciseClassifierTrainer
+
+    parser = argparse.ArgumentParser(description="Analyze a recorded exercise video")
+    parser.add_argument('video', help="Path to an mp4/webm clip")
+    parser.add_argument('--exercise', default='general', help="Exercise type for form analysis")
+    parser.add_argument('--profile', choices=ANALYSIS_PROFILES, default='pose_only',
+                        help=f"Analysis profile (server default: {DEFAULT_ANALYSIS_PROFILE})")
+    parser.add_argument('--sample-fps', type=float, default=None, help="Analyze at most this many frames per second")
+    parser.add_argument('--max-frames', type=int, default=None)
+    parser.add_argument('--frame-skipping', choices=FRAME_SKIPPING_MODES, default='off',
+                        help="'adaptive' skips pose inference on near-static frames")
+    parser.add_argument('--roi', choices=ROI_MODES, default='off',
+                        help="'bbox' crops each frame around the previous pose before inference")
+    parser.add_argument('--model-dir', default='trained_models', help="Trained exercise classifier directory")
+    parser.add_argument('--no-track', action='store_true', help="Only output the aggregate report")
+    parser.add_argument('--output', help="Write the full JSON analysis here instead of stdout")
+    args = parser.parse_args()
+
+    classifier = ExerciseClassifierTrainer(model_dir=args.model_dir)
+    try:
+        classifier.load_model_and_preprocessors()
+    except Exception:
+        print("No trained classifier found; skipping exercise classification")
+        classifier = None
+
+    detector = HumanDetectionModel(analysis_profile=args.profile)
+    try:
+        analyzer = VideoAnalyzer(detector, classifier, args.exercise, args.profile,
+                                 adaptive=args.frame_skipping == 'adaptive', roi=args.roi == 'bbox')
+        analysis = analyzer.analyze(
+            args.video, args.sample_fps, args.max_frames, include_track=not args.no_track
+        )
+    finally:
+        detector.close()
+
+    if args.output:
+        with open(args.output, 'wb') as f:
+            f.write(encode_result(analysis))
+        print(json.dumps(analysis['report'], indent=2))
+        print(f"Full analysis written to {args.output}")
+    else:
+        print(encode_result(analysis).decode('utf-8'))
+
+
+if __name__ == "__main__":
+    main()
@@ -37,15 +37,18 @@ def install_dependencies():
         print(f"❌ Failed to install dependencies: {e}")
         return False
 
-def start_server():
+def start_server(workers: int = 0):
     """Start the ML API server"""
     print("Starting ML API server...")
     try:
         # Change to the python directory
         os.chdir(Path(__file__).parent / "python")
         
-        # Start the server
-        subprocess.run([sys.executable, "api_server.py"])
+        # Start the server (production mode with inference workers if requested)
+        if workers > 0:
+            subprocess.run([sys.executable, "serve.py", "--workers", str(workers)])
+        else:
+            subprocess.run([sys.executable, "api_server.py"])
     except KeyboardInterrupt:
         print("\n🛑 Server stopped by user")
     except Exception as e:
@@ -67,6 +70,13 @@ def test_server():
 
 def main():
     """Main function"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Start the ML API server")
+    parser.add_argument('--workers', type=int, default=0,
+                        help="Run in production mode with this many inference worker processes")
+    args = parser.parse_args()
+    
     print("🚀 Starting ML API Server Setup")
     print("=" * 50)
     
@@ -87,7 +97,7 @@ def main():
     print("Press Ctrl+C to stop the server")
     print("=" * 50)
     
-    start_server()
+    start_server(args.workers)
 
 if __name__ == "__main__":
     main()
@@ -1,5 +1,5 @@
 import { useEffect, useRef, useState } from 'react';
-import { MLModelIntegration, MLDetectionResult } from '../../ml_models/inference/ml_integration';
+import { MLModelIntegration, MLDetectionResult, AnalysisProfile } from '../../ml_models/inference/ml_integration';
 
 export interface UsePythonMLDetectionOptions {
   enablePoseDetection?: boolean;
@@ -7,6 +7,7 @@ export interface UsePythonMLDetectionOptions {
   enableFormAnalysis?: boolean;
   detectionThreshold?: number;
   exerciseType?: string;
+  analysisProfile?: AnalysisProfile;
   onDetectionChange?: (result: MLDetectionResult) => void;
   onServerStatusChange?: (isRunning: boolean) => void;
 }
@@ -21,6 +22,7 @@ export const usePythonMLDetection = (
     enableFormAnalysis = true,
     detectionThreshold = 0.5,
     exerciseType = 'general',
+    analysisProfile,
     onDetectionChange,
     onServerStatusChange
   } = options;
@@ -65,9 +67,25 @@ export const usePythonMLDetection = (
     initializeML();
   }, [onServerStatusChange]);
 
-  // Detection loop
+  // Streaming session (preferred when the server supports it)
   useEffect(() => {
-    if (!isModelLoaded || !videoRef.current || isDetecting) return;
+    if (!isModelLoaded || !videoRef.current || !mlIntegration.current.canStream()) return;
+
+    const stream = mlIntegration.current.openStream(videoRef.current, {
+      exerciseType,
+      analysisProfile,
+      onResult: (result) => {
+        setDetectionResult(result);
+        onDetectionChange?.(result);
+      }
+    });
+
+    return () => stream.close();
+  }, [isModelLoaded, videoRef, exerciseType, analysisProfile, onDetectionChange]);
+
+  // Polling detection loop (fallback for servers without streaming)
+  useEffect(() => {
+    if (!isModelLoaded || !videoRef.current || isDetecting || mlIntegration.current.canStream()) return;
 
     const detectWithML = async () => {
       if (!videoRef.current || !videoRef.current.videoWidth || !videoRef.current.videoHeight) {
@@ -85,7 +103,8 @@ export const usePythonMLDetection = (
       try {
         const result = await mlIntegration.current.processFrame(
           videoRef.current,
-          exerciseType
+          exerciseType,
+          analysisProfile
         );
 
         setDetectionResult(result);
@@ -113,7 +132,7 @@ export const usePythonMLDetection = (
         cancelAnimationFrame(animationFrameRef.current);
       }
     };
-  }, [isModelLoaded, videoRef, exerciseType, onDetectionChange, isDetecting, processInterval]);
+  }, [isModelLoaded, videoRef, exerciseType, analysisProfile, onDetectionChange, isDetecting, processInterval]);
 
   // Train classifier function
   const trainClassifier = async (options: {